@@ -1,748 +1,25 @@
-from flask import Flask, request, session, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.types import JSON
-from whitenoise import WhiteNoise
-from datetime import datetime
-import urllib.parse
+"""
+Punto de entrada: `gunicorn app:app` y `flask --app app <comando>`. El código
+vive en el paquete coraksmart; aquí sólo se crea la app y el hook de fork.
+"""
 import os
-import sys
-import json
-import string
-import random
-import functools
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-import click
 
-import requests
-from uuid import uuid4
+from coraksmart import create_app
+from coraksmart.extensions import db, reiniciar_conexiones_tras_fork as _reiniciar_conexiones
 
+app = create_app()
 
-app = Flask(__name__)
-app.jinja_env.add_extension('jinja2.ext.do')
 
-# --- SECRET KEY CONFIGURATION ---
-SECRET_KEY = os.environ.get('SECRET_KEY')
-if not SECRET_KEY:
-    if os.environ.get('RENDER'):
-        raise ValueError("No SECRET_KEY set for production environment!")
-    else:
-        SECRET_KEY = 'dev-secret-key-for-local-testing-only'
-        print("WARNING: Using default SECRET_KEY for local development.", file=sys.stderr)
-app.secret_key = SECRET_KEY
+def reiniciar_conexiones_tras_fork():
+    """Para el post_fork de gunicorn.conf.py."""
+    _reiniciar_conexiones(app)
 
-# --- DATABASE CONFIGURATION ---
-# Use the DATABASE_URL from Render, fallback to a local SQLite DB for development
-db_url = os.environ.get('DATABASE_URL', 'sqlite:///corak.db')
-if db_url.startswith("postgres://"):
-    db_url = db_url.replace("postgres://", "postgresql://", 1)
-app.config['SQLALCHEMY_DATABASE_URI'] = db_url
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
-
-# --- WHITENOISE CONFIGURATION ---
-app.wsgi_app = WhiteNoise(app.wsgi_app, root="static/", max_age=31536000)
-
-# --- CONSTANTS ---
-UPLOAD_FOLDER = 'static'
-ADMIN_PASSWORD_HASH = os.environ.get("ADMIN_PASSWORD_HASH") # It's better to use env vars
-
-# --- SUPABASE STORAGE CONFIG ---
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-SUPABASE_BUCKET = os.environ.get("SUPABASE_BUCKET", "media")
-
-def subir_a_supabase(file_storage):
-    """
-    Sube el archivo a Supabase Storage (bucket público) y regresa la URL pública.
-    """
-    nombre = f"{uuid4().hex}_{secure_filename(file_storage.filename)}"
-    ruta = f"uploads/{nombre}"  # carpeta lógica en el bucket
-    url_upload = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{ruta}"
-
-    resp = requests.post(
-        url_upload,
-        headers={
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Content-Type": file_storage.mimetype or "application/octet-stream",
-            "x-upsert": "false",
-        },
-        data=file_storage.read(),
-        timeout=30,
-    )
-    resp.raise_for_status()
-    return f"{SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{ruta}"
-
-
-# --- DATABASE MODELS ---
-class Product(db.Model):
-    id = db.Column(db.String, primary_key=True)
-    nombre = db.Column(db.String(100), nullable=False)
-    descripcion = db.Column(db.Text)
-    precio = db.Column(db.Float)
-    stock = db.Column(db.Integer)
-    imagen = db.Column(db.String(512))
-    whatsapp_asignado = db.Column(db.String(10), default='1')
-    orden = db.Column(db.Integer, default=999)
-    promocion = db.Column(db.Boolean, default=False)
-    variaciones = db.Column(JSON)
-    bundle_items = db.Column(JSON)
-    bundle_precio = db.Column(db.Float)
-    imagenes_adicionales = db.Column(JSON)
-    aura_multiplier = db.Column(db.Float, default=1.0)
-
-
-    def to_dict(self):
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
-
-class User(db.Model):
-    emoji = db.Column(db.String(10), primary_key=True)
-    password_hash = db.Column(db.String(256))
-    aura_points = db.Column(db.Integer, default=0)
-    claimed_levels = db.Column(JSON, default=list)
-    reward_codes = db.Column(JSON, default=dict)
-
-    def to_dict(self):
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
-
-class Order(db.Model):
-    id = db.Column(db.String(100), primary_key=True)
-    user_emoji = db.Column(db.String(10), db.ForeignKey('user.emoji'))
-    timestamp = db.Column(db.String(100))
-    detalle = db.Column(JSON)
-    detalle_completo = db.Column(JSON)
-    total = db.Column(db.Float)
-    aura_ganada = db.Column(db.Integer)
-    aura_potencial = db.Column(db.Integer)
-    aura_otorgada = db.Column(db.Integer)
-    delivery_info = db.Column(JSON)
-    completado = db.Column(db.Boolean, default=False)
-    whatsapp_usado = db.Column(JSON)
-
-    def to_dict(self):
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
-
-class Config(db.Model):
-    key = db.Column(db.String(50), primary_key=True)
-    value = db.Column(db.Text)
-
-class AuraLevel(db.Model):
-    level = db.Column(db.Integer, primary_key=True)
-    points_needed = db.Column(db.Float, nullable=False)
-    flame_color = db.Column(db.String(50))
-    name = db.Column(db.String(100))
-    prize = db.Column(db.String(255))
-    character_size = db.Column(db.Integer)
-
-    def to_dict(self):
-        d = {c.name: getattr(self, c.name) for c in self.__table__.columns}
-        if d.get('points_needed') == -float('inf'):
-             d['points_needed'] = "-Infinity"
-        return d
-
-class Emoji(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    emoji = db.Column(db.String(10), unique=True, nullable=False)
-
-
-# --- DATA HELPER FUNCTIONS ---
-
-@functools.lru_cache()
-def get_default_config():
-    return {
-        "horarios_atencion": "Lunes a Viernes: 9:00 AM - 6:00 PM",
-        "whatsapp_principal": "5215513361764",
-        "whatsapp_secundario": "5215625877420",
-        "whatsapp_1": "5215513361764",
-        "whatsapp_2": "5215625877420",
-        "whatsapp_3": "",
-        "whatsapp_1_nombre": "Corak",
-        "whatsapp_2_nombre": "Rubadub",
-        "whatsapp_3_nombre": "Terciario"
-    }
-
-def get_config():
-    """Cargar configuración desde la base de datos."""
-    config_db = Config.query.all()
-    if not config_db:
-        return get_default_config()
-    return {item.key: item.value for item in config_db}
-
-def get_aura_levels():
-    """Cargar niveles de aura desde la base de datos."""
-    levels_db = AuraLevel.query.order_by(AuraLevel.level).all()
-    if not levels_db:
-        return [] # Should be populated by migration script
-
-    levels = []
-    for level in levels_db:
-        level_dict = level.to_dict()
-        if level_dict.get("points_needed") == "negative_infinity":
-            level_dict["points_needed"] = -float('inf')
-        levels.append(level_dict)
-    return levels
-
-def get_emoji_list():
-    """Cargar lista de emojis desde la base de datos."""
-    emojis_db = Emoji.query.order_by(Emoji.id).all()
-    if not emojis_db:
-        return [] # Should be populated by migration script
-    return [e.emoji for e in emojis_db]
-
-
-# --- API & AUTH ROUTES ---
-
-@app.route('/api/get-emojis')
-def api_get_emojis():
-    """API endpoint to get all emojis and occupied ones."""
-    all_emojis = get_emoji_list()
-    occupied_users = User.query.with_entities(User.emoji).all()
-    occupied_emojis = [user.emoji for user in occupied_users]
-    return jsonify({
-        'all_emojis': all_emojis,
-        'occupied_emojis': occupied_emojis
-    })
-
-@app.route('/api/profile')
-def api_profile():
-    """API endpoint to get the current user's profile info."""
-    user_emoji = session.get('logged_in_user_emoji')
-    if not user_emoji:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = User.query.get(user_emoji)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    # Calculate current level
-    aura_points = user.aura_points or 0
-    aura_levels = get_aura_levels()
-    current_level_info = {}
-    if aura_levels:
-        current_level_info = aura_levels[0]
-        for level_info in reversed(aura_levels):
-            points_needed = level_info.get("points_needed", 0)
-            if isinstance(points_needed, str):
-                try:
-                    points_needed = float(points_needed)
-                except (ValueError, TypeError):
-                    points_needed = 0
-
-            if aura_points >= points_needed:
-                current_level_info = level_info
-                break
-
-    return jsonify({
-        "emoji": user.emoji,
-        "aura_points": aura_points,
-        "aura_level": current_level_info.get('level', 0),
-        "level_name": current_level_info.get('name', 'N/A')
-    })
-
-
-# --- AURA SYSTEM & ID GENERATORS ---
-
-def codificar_numero(numero):
-    if not isinstance(numero, int) or numero < 0: return str(numero)
-    letras = string.ascii_uppercase
-    indice_letra = numero % 26
-    letra_codificada = letras[indice_letra]
-    numero_ciclo = numero // 26
-    return f"{letra_codificada}{numero_ciclo}" if numero_ciclo > 0 else letra_codificada
-
-def generar_id_pedido():
-    now = datetime.now()
-    order_count = Order.query.count()
-    parte_fecha = f"{codificar_numero(now.day - 1)}{codificar_numero(now.month - 1)}{now.strftime('%y')}"
-    parte_hora = f"{codificar_numero(now.hour)}{codificar_numero(now.minute)}{codificar_numero(now.second)}"
-    parte_pedido = codificar_numero(100 + order_count)
-    sello_aleatorio = "".join(random.choices(string.ascii_uppercase + string.digits, k=3))
-    return f"{parte_fecha}-{parte_hora}-{parte_pedido}-{sello_aleatorio}"
-
-def generar_codigo_recompensa():
-    return "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-
-def crear_mensaje_pedido(pedido, detalle_completo):
-    delivery_info = pedido.get("delivery_info", {})
-    mensaje_partes = [f"¡Que onda! 🛒", f"*Pedido #{pedido['id']}*"]
-    for cart_id, info in detalle_completo.items():
-        mensaje_partes.append(f"• {info['cantidad']}x {info['nombre']}")
-    mensaje_partes.extend([f"*Total: ${pedido['total']:.2f}*",
-                           f"📅 *Horario:* {delivery_info.get('day', 'N/A')} a las {delivery_info.get('time', 'N/A')}"])
-    if delivery_info.get('station'): mensaje_partes.append(f"📍 *Zona:* {delivery_info.get('station', 'N/A')}")
-    if delivery_info.get('instructions'): mensaje_partes.append(f"📝 *Notas:* {delivery_info['instructions']}")
-    if delivery_info.get('phone'): mensaje_partes.append(f"📱 *Teléfono:* {delivery_info['phone']}")
-    return "\n".join(mensaje_partes)
-
-def determinar_whatsapp_destino(carrito, productos):
-    CONFIG = get_config()
-    whatsapp_counts = {"1": 0, "2": 0, "3": 0}
-    for product_cart_id, cantidad in carrito.items():
-        product_id = product_cart_id.split('-')[0]
-        if product_id in productos:
-            whatsapp_asignado = productos[product_id].get('whatsapp_asignado', '1')
-            whatsapp_counts[whatsapp_asignado] += cantidad
-    
-    max_whatsapp = max(whatsapp_counts, key=whatsapp_counts.get)
-    whatsapp_map = {
-        "1": CONFIG.get('whatsapp_1'), "2": CONFIG.get('whatsapp_2'), "3": CONFIG.get('whatsapp_3')
-    }
-    whatsapp_numero = whatsapp_map.get(max_whatsapp) or CONFIG.get('whatsapp_principal')
-    return whatsapp_numero, max_whatsapp
-# --- MAIN VIEWS (DEPRECATED) ---
-# The frontend is now handled by the React application in the /web directory.
-# This route is now a simple API status check.
-@app.route("/")
-def index():
-    return jsonify({"status": "ok", "message": "Flask API is running. Frontend is served separately."})
-
-@app.route('/procesar_pedido', methods=['POST'])
-def procesar_pedido():
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"success": False, "message": "No has iniciado sesión."}), 401
-
-    user_emoji = session["logged_in_user_emoji"]
-    carrito = session.get('carrito', {})
-    if not carrito:
-        return jsonify({"success": False, "message": "Tu carrito está vacío."}), 400
-
-    products_db = Product.query.all()
-    productos_dict = {p.id: p for p in products_db}
-
-    total = 0
-    aura_total = 0
-    detalle_completo = {}
-
-    for cart_id, cant in carrito.items():
-        parts = cart_id.split('-', 1)
-        base_id = parts[0]
-        prod_data = productos_dict.get(base_id)
-
-        if not prod_data:
-            return jsonify({"success": False, "message": f"Producto {base_id} no encontrado."}), 404
-
-        precio_item = prod_data.precio or 0
-        aura_multiplier = prod_data.aura_multiplier or 3.0
-
-        if prod_data.bundle_precio is not None:
-             precio_item = prod_data.bundle_precio
-        elif len(parts) > 1 and prod_data.variaciones:
-            variation_id = parts[1]
-            variation_data = prod_data.variaciones.get(variation_id)
-            if variation_data:
-                precio_item = variation_data.get("precio", 0)
-
-        total += precio_item * cant
-        aura_total += int((precio_item * aura_multiplier) * cant)
-
-        detalle_completo[cart_id] = {
-            "nombre": prod_data.nombre,
-            "precio": precio_item,
-            "cantidad": cant,
-            "subtotal": precio_item * cant
-        }
-
-    delivery_info = {
-        "day": request.form.get("delivery_day"),
-        "time": request.form.get("delivery_time"),
-        "station": request.form.get("delivery_station"),
-        "instructions": request.form.get("special_instructions"),
-        "phone": request.form.get("phone_number"),
-        "location_type": request.form.get("location_type")
-    }
-
-    new_order = Order(
-        id=generar_id_pedido(),
-        user_emoji=user_emoji,
-        timestamp=datetime.now().isoformat(),
-        detalle=carrito,
-        detalle_completo=detalle_completo,
-        total=total,
-        aura_ganada=aura_total,
-        delivery_info=delivery_info,
-        completado=False
-    )
-    db.session.add(new_order)
-    db.session.commit()
-
-    session.pop('carrito', None)
-
-    whatsapp_numero, _ = determinar_whatsapp_destino(carrito, {p.id: p.to_dict() for p in products_db})
-    mensaje = crear_mensaje_pedido(new_order.to_dict(), detalle_completo)
-    whatsapp_link = f"https://wa.me/{whatsapp_numero}?text={urllib.parse.quote(mensaje)}"
-
-    return jsonify({
-        "success": True,
-        "message": "Pedido procesado con éxito. Serás redirigido a WhatsApp.",
-        "whatsapp_link": whatsapp_link
-    })
-
-# ... Will continue to refactor all routes and helpers
-# This is a very large file. The agent will continue refactoring.
-# For brevity, I will now apply the fully refactored file.
-
-
-@app.route("/logout")
-def logout():
-    session.pop("logged_in", None)
-    session.pop("logged_in_user_emoji", None)
-    flash("Has cerrado sesión.", "success")
-    return redirect(url_for("entrar"))
-
-
-
-
-
-
-@app.route("/admin/eliminar-producto/<product_id>", methods=["POST"])
-def admin_eliminar_producto(product_id):
-    if not session.get("logged_in"):
-        return jsonify({"success": False, "message": "Not authorized"}), 401
-
-    # Check if the product is part of any bundle
-    bundles_containing_product = []
-    all_bundles = Product.query.filter(Product.bundle_items.isnot(None)).all()
-    for bundle in all_bundles:
-        try:
-            item_ids_json = bundle.bundle_items
-            if isinstance(item_ids_json, str):
-                item_ids = json.loads(item_ids_json)
-            else:
-                item_ids = item_ids_json # Assume it's already a list/dict
-
-            if isinstance(item_ids, list) and product_id in item_ids:
-                bundles_containing_product.append(bundle.nombre)
-        except (json.JSONDecodeError, TypeError):
-            # Ignore bundles with malformed data
-            continue
-    
-    if bundles_containing_product:
-        bundle_names = ", ".join(bundles_containing_product)
-        return jsonify({
-            "success": False,
-            "message": f"El producto no puede ser eliminado porque es parte de los siguientes bundles: {bundle_names}"
-        }), 400
-
-    producto = db.session.get(Product, product_id)
-    if producto:
-        db.session.delete(producto)
-        db.session.commit()
-        return jsonify({"success": True})
-
-    return jsonify({"success": False, "message": "Producto no encontrado"}), 404
-
-@app.route("/admin/completar-pedido/<pedido_id>", methods=["POST"])
-def admin_completar_pedido(pedido_id):
-    if not session.get("logged_in"):
-        return redirect(url_for("login"))
-
-    order = Order.query.get(pedido_id)
-    if order:
-        user = User.query.get(order.user_emoji)
-
-        # Toggle completion status
-        order.completado = not order.completado
-
-        if user and order.aura_ganada:
-            if order.completado:
-                user.aura_points = (user.aura_points or 0) + order.aura_ganada
-                flash(f"Pedido completado. Se sumaron {order.aura_ganada} puntos de Aura a {user.emoji}.", "success")
-            else:
-                user.aura_points = (user.aura_points or 0) - order.aura_ganada
-                flash(f"Pedido desmarcado. Se restaron {order.aura_ganada} puntos de Aura a {user.emoji}.", "warning")
-
-        db.session.commit()
-    else:
-        flash("Pedido no encontrado.", "error")
-
-    return redirect(url_for("admin"))
-
-@app.route("/admin/delete-order/<pedido_id>", methods=["POST"])
-def admin_delete_order(pedido_id):
-    if not session.get("logged_in"):
-        return redirect(url_for("login"))
-
-    order = Order.query.get(pedido_id)
-    if order:
-        db.session.delete(order)
-        db.session.commit()
-        flash(f"Pedido {pedido_id} eliminado.", "success")
-    else:
-        flash("Pedido no encontrado.", "error")
-
-    return redirect(url_for("admin"))
-
-@app.route("/admin/recompensas", methods=["POST"])
-def admin_recompensas():
-    if not session.get("logged_in"):
-        return jsonify({"success": False, "message": "No autorizado"}), 401
-
-    data = request.get_json()
-    user_emoji = data.get("user_emoji")
-    level = data.get("level")
-    action = data.get("action")
-
-    user = User.query.get(user_emoji)
-    if not user:
-        return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
-
-    claimed_levels = user.claimed_levels or []
-    if level in claimed_levels:
-        return jsonify({"success": False, "message": "Esta recompensa ya fue procesada."}), 400
-
-    if action == "confirm":
-        user.claimed_levels = claimed_levels + [level]
-
-        reward_codes = user.reward_codes or {}
-        new_code = generar_codigo_recompensa()
-        reward_codes[str(level)] = new_code
-        user.reward_codes = reward_codes
-
-        db.session.commit()
-        return jsonify({"success": True, "message": f"Recompensa para {user_emoji} confirmada. Código: {new_code}"})
-
-    elif action == "reject":
-        user.claimed_levels = claimed_levels + [level]
-        db.session.commit()
-        return jsonify({"success": True, "message": f"Recompensa para {user_emoji} rechazada."})
-
-    else:
-        return jsonify({"success": False, "message": "Acción no válida"}), 400
-
-
-
-@app.route('/api/get-emojis')
-def get_emojis_api():
-    all_emojis_from_db = get_emoji_list()
-    users = User.query.all()
-    occupied_emojis = [user.emoji for user in users]
-    return jsonify({
-        "all_emojis": all_emojis_from_db,
-        "occupied_emojis": occupied_emojis
-    })
-
-@app.route('/api/emoji-access', methods=['POST'])
-def emoji_access_api():
-    data = request.get_json()
-    emoji = data.get("emoji")
-    password = data.get("password")
-
-    if not emoji or not password:
-        return jsonify({"success": False, "message": "Datos inválidos."})
-
-    all_emojis_from_db = get_emoji_list()
-    if emoji not in all_emojis_from_db:
-        return jsonify({"success": False, "message": "Emoji no válido."})
-
-    user = User.query.get(emoji)
-    if user:
-        if check_password_hash(user.password_hash, password):
-            session["logged_in_user_emoji"] = emoji
-            return jsonify({"success": True})
-        else:
-            return jsonify({"success": False, "message": "Contraseña incorrecta."})
-    else:
-        new_user = User(
-            emoji=emoji,
-            password_hash=generate_password_hash(password)
-        )
-        db.session.add(new_user)
-        db.session.commit()
-        session["logged_in_user_emoji"] = emoji
-        return jsonify({"success": True, "message": "¡Avatar registrado con éxito!"})
-
-
-
-# --- API RUTAS PARA CARRITO ---
-
-@app.route('/api/carrito')
-def api_carrito():
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"carrito": {}, "productos_detalle": {}}), 401
-    
-    carrito = session.get('carrito', {})
-    products_db = Product.query.all()
-    productos_dict = {p.id: p.to_dict() for p in products_db}
-    
-    productos_detalle = {}
-    for cart_id, cantidad in carrito.items():
-        base_id = cart_id.split('-')[0]
-        if base_id in productos_dict:
-            producto = productos_dict[base_id]
-            productos_detalle[cart_id] = {
-                "nombre": producto["nombre"],
-                "precio": producto.get("precio", 0),
-                "imagen": producto.get("imagen", "")
-            }
-    
-    return jsonify({
-        "carrito": carrito,
-        "productos_detalle": productos_detalle
-    })
-
-@app.route('/api/agregar/<product_id>', methods=['POST'])
-def api_agregar_carrito(product_id):
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"success": False}), 401
-    
-    carrito = session.get('carrito', {})
-    carrito[product_id] = carrito.get(product_id, 0) + 1
-    session['carrito'] = carrito
-    
-    # Retornar datos actualizados
-    products_db = Product.query.all()
-    productos_dict = {p.id: p.to_dict() for p in products_db}
-    
-    productos_detalle = {}
-    for cart_id, cantidad in carrito.items():
-        base_id = cart_id.split('-')[0]
-        if base_id in productos_dict:
-            producto = productos_dict[base_id]
-            productos_detalle[cart_id] = {
-                "nombre": producto["nombre"],
-                "precio": producto.get("precio", 0),
-                "imagen": producto.get("imagen", "")
-            }
-    
-    return jsonify({
-        "carrito": carrito,
-        "productos_detalle": productos_detalle
-    })
-
-@app.route('/api/quitar/<product_id>', methods=['POST'])
-def api_quitar_carrito(product_id):
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"success": False}), 401
-    
-    carrito = session.get('carrito', {})
-    if product_id in carrito:
-        carrito[product_id] -= 1
-        if carrito[product_id] <= 0:
-            del carrito[product_id]
-    session['carrito'] = carrito
-    
-    # Retornar datos actualizados
-    products_db = Product.query.all()
-    productos_dict = {p.id: p.to_dict() for p in products_db}
-    
-    productos_detalle = {}
-    for cart_id, cantidad in carrito.items():
-        base_id = cart_id.split('-')[0]
-        if base_id in productos_dict:
-            producto = productos_dict[base_id]
-            productos_detalle[cart_id] = {
-                "nombre": producto["nombre"],
-                "precio": producto.get("precio", 0),
-                "imagen": producto.get("imagen", "")
-            }
-    
-    return jsonify({
-        "carrito": carrito,
-        "productos_detalle": productos_detalle
-    })
-
-@app.route('/api/limpiar', methods=['POST'])
-def api_limpiar_carrito():
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"success": False}), 401
-    
-    session['carrito'] = {}
-    return jsonify({
-        "carrito": {},
-        "productos_detalle": {}
-    })
-
-@app.route('/generate-reward-code', methods=['POST'])
-def generate_reward_code():
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"success": False, "message": "No autorizado"}), 401
-    
-    user_emoji = session["logged_in_user_emoji"]
-    data = request.get_json()
-    level = data.get("level")
-    
-    user = User.query.get(user_emoji)
-    if not user:
-        return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
-    
-    # Verificar que el usuario puede reclamar este nivel
-    claimed_levels = user.claimed_levels or []
-    if level in claimed_levels:
-        return jsonify({"success": False, "message": "Esta recompensa ya fue reclamada"}), 400
-    
-    # Verificar que el usuario tiene suficientes puntos
-    aura_levels = get_aura_levels()
-    level_info = next((l for l in aura_levels if l["level"] == level), None)
-    if not level_info or user.aura_points < level_info["points_needed"]:
-        return jsonify({"success": False, "message": "No tienes suficientes puntos para este nivel"}), 400
-    
-    # Generar código y marcar como reclamado
-    code = generar_codigo_recompensa()
-    user.claimed_levels = claimed_levels + [level]
-    
-    reward_codes = user.reward_codes or {}
-    reward_codes[str(level)] = code
-    user.reward_codes = reward_codes
-    
-    db.session.commit()
-    
-    return jsonify({"success": True, "code": code})
-
-@app.route('/reclamar_recompensa', methods=['POST'])
-def reclamar_recompensa():
-    if not session.get("logged_in_user_emoji"):
-        return jsonify({"success": False, "message": "No autorizado"}), 401
-    
-    user_emoji = session["logged_in_user_emoji"]
-    user = User.query.get(user_emoji)
-    if not user:
-        return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
-    
-    # Obtener recompensas pendientes
-    pending_rewards = check_pending_rewards(user_emoji)
-    if not pending_rewards:
-        return jsonify({"success": False, "message": "No tienes recompensas pendientes"}), 400
-    
-    # Reclamar la primera recompensa pendiente
-    reward = pending_rewards[0]
-    level = reward["level"]
-    
-    claimed_levels = user.claimed_levels or []
-    user.claimed_levels = claimed_levels + [level]
-    
-    # Generar código de recompensa
-    code = generar_codigo_recompensa()
-    reward_codes = user.reward_codes or {}
-    reward_codes[str(level)] = code
-    user.reward_codes = reward_codes
-    
-    db.session.commit()
-    
-    return jsonify({"success": True, "code": code, "level": level, "prize": reward["prize"]})
-
-
-# --- INIT DB COMMAND ---
-@app.cli.command("init-db")
-def init_db_command():
-    """Creates the database tables."""
-    db.create_all()
-    print("Initialized the database.")
-
-@app.cli.command("hash-password")
-@click.argument("password")
-def hash_password_command(password):
-    """Hashes the given password."""
-    hashed_password = generate_password_hash(password)
-    print("--- Hashed Admin Password ---")
-    print(hashed_password)
-    print("--- End Hashed Admin Password ---")
-    print("\nSet this value as the ADMIN_PASSWORD_HASH environment variable.")
 
 if __name__ == "__main__":
     with app.app_context():
         # This is a simple way to ensure tables are created for local dev
         # For production, a proper migration tool like Alembic is recommended
         db.create_all()
-    
+
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_ENV') == 'development')
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_ENV') == 'development')
@@ -0,0 +1,92 @@
+"""
+Latencia de checkout con 10k, 100k y 1M pedidos existentes.
+
+Compara el conteo que usaba generar_id_pedido (Order.query.count()) con el
+OrderSequence actual y mide procesar_pedido completo a través del test client.
+
+    python benchmarks/bench_checkout_ids.py [--sizes 10000,100000,1000000] [--iterations 200]
+                                            [--database-url postgresql://...]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import percentiles, use_database
+
+
+def seed_orders(conn, table, start, stop, chunk=20000):
+    for base in range(start, stop, chunk):
+        rows = [
+            {"id": f"seed-{n}", "user_emoji": "🐱", "timestamp": "2025-01-01T00:00:00",
+             "total": 10.0, "aura_ganada": 30, "completado": True}
+            for n in range(base, min(stop, base + chunk))
+        ]
+        conn.execute(table.insert(), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--database-url", help="por defecto, un SQLite temporal")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    use_database(args.database_url)
+
+    from app import app
+    from coraksmart.extensions import db
+    from coraksmart.models import Order, Product, User
+
+    app.config["TESTING"] = True
+    results = {"database": os.environ["DATABASE_URL"].split("://")[0], "sizes": []}
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(emoji="🐱", password_hash="x"))
+        db.session.add(Product(id="choco", nombre="Chocolate", precio=5.0, aura_multiplier=3.0))
+        db.session.commit()
+
+    client = app.test_client()
+    seeded = 0
+    for size in sizes:
+        with app.app_context():
+            with db.engine.begin() as conn:
+                seed_orders(conn, Order.__table__, seeded, size)
+            seeded = size
+
+            count_samples = []
+            for _ in range(min(args.iterations, 50)):
+                start = time.perf_counter()
+                Order.query.count()
+                count_samples.append(time.perf_counter() - start)
+                db.session.rollback()
+
+        checkout_samples = []
+        for _ in range(args.iterations):
+            with client.session_transaction() as session:
+                session["logged_in_user_emoji"] = "🐱"
+            client.post("/api/agregar/choco")
+            client.post("/api/agregar/choco")
+            start = time.perf_counter()
+            response = client.post("/procesar_pedido", data={"delivery_day": "Lunes"})
+            checkout_samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.data
+        seeded += args.iterations
+
+        results["sizes"].append({
+            "orders": size,
+            "legacy_count_query": percentiles(count_samples),
+            "checkout": percentiles(checkout_samples),
+        })
+        print(json.dumps(results["sizes"][-1]), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark del arranque de un worker.
+
+Cada corrida abre un intérprete nuevo que importa `app` (crea la app con
+create_app) y hace el primer request a cada ruta, y luego un segundo para
+comparar. Con --fork además mide lo que paga un worker de gunicorn con
+preload_app: un proceso hijo del que ya importó la app, reiniciando las
+conexiones como en post_fork. Reporta p50/p95/p99 y qué dependencias pesadas
+quedaron importadas, en JSON.
+
+    python benchmarks/bench_startup.py --runs 20
+    python benchmarks/bench_startup.py --fork --database-url postgresql://localhost/coraksmart_bench
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import ROOT, git_commit, percentiles, use_database
+
+ROUTES = ("/", "/api/get-emojis", "/api/carrito", "/api/profile")
+HEAVY_MODULES = ("requests", "flask_migrate", "alembic", "PIL", "brotli")
+
+
+def _primeros_requests(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["logged_in_user_emoji"] = "🐱"
+    tiempos = {}
+    for route in ROUTES:
+        start = time.perf_counter()
+        client.get(route)
+        primero = time.perf_counter() - start
+        start = time.perf_counter()
+        client.get(route)
+        tiempos[route] = (primero, time.perf_counter() - start)
+    return tiempos
+
+
+def _medir_en_proceso_nuevo():
+    """Se ejecuta en el intérprete hijo: imprime los tiempos como JSON."""
+    start = time.perf_counter()
+    import app as app_module
+    import_s = time.perf_counter() - start
+    tiempos = _primeros_requests(app_module.app)
+    print(json.dumps({"import_s": import_s, "routes": tiempos,
+                      "heavy": [m for m in HEAVY_MODULES if m in sys.modules]}))
+
+
+def _medir_con_fork(runs):
+    import app as app_module
+    resultados = []
+    for _ in range(runs):
+        lectura, escritura = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(lectura)
+            app_module.reiniciar_conexiones_tras_fork()
+            with os.fdopen(escritura, "w") as fh:
+                fh.write(json.dumps({"routes": _primeros_requests(app_module.app)}))
+            os._exit(0)
+        os.close(escritura)
+        with os.fdopen(lectura) as fh:
+            resultados.append(json.loads(fh.read()))
+        os.waitpid(pid, 0)
+    return resultados
+
+
+def _resumen(corridas):
+    resumen = {}
+    if corridas and "import_s" in corridas[0]:
+        resumen["import"] = percentiles([c["import_s"] for c in corridas])
+    resumen["first_request"] = {r: percentiles([c["routes"][r][0] for c in corridas]) for r in ROUTES}
+    resumen["second_request"] = {r: percentiles([c["routes"][r][1] for c in corridas]) for r in ROUTES}
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de la app.")
+    parser.add_argument("--database-url", help="por defecto, un SQLite temporal")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--fork", action="store_true", help="mide también workers creados con fork (preload_app)")
+    parser.add_argument("--output", help="archivo JSON de salida (por defecto, stdout)")
+    args = parser.parse_args(argv)
+
+    database_url = use_database(args.database_url, name="bench_startup.db")
+    seed = ("from app import app\n"
+            "from coraksmart.extensions import db\n"
+            "from coraksmart.models import Emoji, User\n"
+            "with app.app_context():\n"
+            "    db.drop_all(); db.create_all()\n"
+            "    db.session.add_all([Emoji(emoji='🐱'), User(emoji='🐱', password_hash='x')])\n"
+            "    db.session.commit()\n")
+    subprocess.run([sys.executable, "-c", seed], cwd=ROOT, check=True, stderr=subprocess.DEVNULL)
+
+    corridas = []
+    for _ in range(args.runs):
+        salida = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        corridas.append(json.loads(salida.strip().splitlines()[-1]))
+
+    report = {
+        "commit": git_commit(),
+        "database": database_url.split("://")[0],
+        "config": {"runs": args.runs},
+        "cold": _resumen(corridas),
+        "heavy_modules_loaded": sorted({m for c in corridas for m in c["heavy"]}),
+    }
+    if args.fork:
+        report["forked"] = _resumen(_medir_con_fork(args.runs))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--child"]:
+        _medir_en_proceso_nuevo()
+    else:
+        main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de checkouts concurrentes que compiten por las últimas unidades.
+
+En cada ronda se fija el stock de un producto y `--clients` clientes, con el
+producto ya en el carrito, llaman a procesar_pedido a la vez. Reporta latencia
+p50/p95/p99, respuestas por status, unidades vendidas y si hubo sobreventa
+(stock negativo o más unidades vendidas que las disponibles), en JSON.
+
+    python benchmarks/bench_stock_race.py --clients 32 --stock 10
+    python benchmarks/bench_stock_race.py --database-url postgresql://localhost/coraksmart_bench
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import git_commit, percentiles, use_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carreras por el último stock.")
+    parser.add_argument("--database-url", help="por defecto, un SQLite temporal")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--stock", type=int, default=10, help="unidades disponibles por ronda")
+    parser.add_argument("--units", type=int, default=1, help="unidades por pedido")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="archivo JSON de salida (por defecto, stdout)")
+    args = parser.parse_args(argv)
+
+    database_url = use_database(args.database_url, name="bench_stock.db")
+    from sqlalchemy import update
+    from app import app
+    from coraksmart.extensions import db
+    from coraksmart.models import Product, User
+    from coraksmart.orders import order_sequence
+
+    app.config["TESTING"] = False
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    emojis = [f"r{i}" for i in range(args.clients)]
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Product(id="ultimo", nombre="Último", precio=10.0, stock=args.stock))
+        db.session.add_all([User(emoji=e, password_hash="x") for e in emojis])
+        db.session.commit()
+    order_sequence._reset()
+
+    latencies, status, rounds = [], Counter(), []
+    lock = threading.Lock()
+    for _ in range(args.rounds):
+        with app.app_context():
+            db.session.execute(update(Product).where(Product.id == "ultimo").values(stock=args.stock))
+            db.session.commit()
+
+        clients = []
+        for emoji in emojis:
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session["logged_in_user_emoji"] = emoji
+            for _ in range(args.units):
+                client.post("/api/agregar/ultimo")
+            clients.append(client)
+
+        barrier = threading.Barrier(len(clients))
+        round_status = Counter()
+
+        def checkout(client):
+            barrier.wait()
+            start = time.perf_counter()
+            response = client.post("/procesar_pedido", data={"delivery_day": "Lunes"})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                round_status[response.status_code] += 1
+
+        threads = [threading.Thread(target=checkout, args=(c,)) for c in clients]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        with app.app_context():
+            remaining = db.session.get(Product, "ultimo").stock
+        sold = round_status[200] * args.units
+        status.update(round_status)
+        rounds.append({
+            "wall_s": round(wall, 4),
+            "status": {str(k): v for k, v in sorted(round_status.items())},
+            "sold_units": sold,
+            "remaining_stock": remaining,
+            "oversold": remaining < 0 or sold > args.stock or sold + remaining != args.stock,
+        })
+
+    report = {
+        "commit": git_commit(),
+        "database": database_url.split("://")[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("database_url", "output")},
+        "checkout": {"requests": len(latencies), **percentiles(latencies),
+                     "status": {str(k): v for k, v in sorted(status.items())}},
+        "rounds": rounds,
+        "oversold_rounds": sum(r["oversold"] for r in rounds),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Utilidades compartidas por los benchmarks."""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def use_database(database_url=None, name="bench.db"):
+    """
+    Fija DATABASE_URL antes de importar `app` (el engine se crea al importarlo).
+    Sin URL se usa un SQLite desechable.
+    """
+    if not database_url:
+        tmpdir = tempfile.mkdtemp(prefix="coraksmart-bench-")
+        database_url = f"sqlite:///{os.path.join(tmpdir, name)}"
+    os.environ["DATABASE_URL"] = database_url
+    return database_url
+
+
+def percentiles(samples):
+    """p50/p95/p99 en milisegundos de una lista de duraciones en segundos."""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL que ejecuta el hilo actual."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
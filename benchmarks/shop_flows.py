@@ -0,0 +1,220 @@
+"""
+Benchmark de los flujos de la tienda con clientes concurrentes.
+
+Siembra productos, usuarios, pedidos y niveles de aura y ejecuta cada flujo
+(login por emoji, agregar/quitar del carrito, procesar_pedido, api_profile y
+completar pedidos desde admin, uno a uno y en lote) a través de la app Flask. Reporta por endpoint
+latencia p50/p95/p99, throughput y consultas SQL por request, en JSON para
+comparar entre commits.
+
+    python benchmarks/shop_flows.py --output bench.json
+    python benchmarks/shop_flows.py --database-url postgresql://localhost/coraksmart_bench
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import QueryCounter, git_commit, percentiles, use_database
+
+PASSWORD = "bench-password"
+FLOWS = ("emoji_login", "cart", "checkout", "profile", "admin_complete", "admin_bulk_complete")
+BULK_BATCH = 20
+
+
+def seed(app, products, users, orders, aura_levels):
+    from werkzeug.security import generate_password_hash
+    from coraksmart.extensions import db
+    from coraksmart.models import AuraLevel, Emoji, Order, Product, User
+
+    password_hash = generate_password_hash(PASSWORD)
+    emojis = [f"u{i}" for i in range(users)]
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        with db.engine.begin() as conn:
+            conn.execute(Emoji.__table__.insert(),
+                         [{"id": i + 1, "emoji": e} for i, e in enumerate(emojis)])
+            conn.execute(User.__table__.insert(),
+                         [{"emoji": e, "password_hash": password_hash, "aura_points": random.randint(0, 5000),
+                           "claimed_levels": [], "reward_codes": {}} for e in emojis])
+            conn.execute(Product.__table__.insert(),
+                         [{"id": f"p{i}", "nombre": f"Producto {i}", "precio": 10.0 + i % 7, "stock": 10_000,
+                           "whatsapp_asignado": str(1 + i % 2), "orden": i, "promocion": False,
+                           "aura_multiplier": 3.0} for i in range(products)])
+            conn.execute(AuraLevel.__table__.insert(),
+                         [{"level": i + 1, "points_needed": float(i * 500), "name": f"Nivel {i + 1}",
+                           "flame_color": "blue", "prize": "premio", "character_size": 100}
+                          for i in range(aura_levels)])
+            for base in range(0, orders, 5000):
+                conn.execute(Order.__table__.insert(), [
+                    {"id": f"seed-{n}", "user_emoji": emojis[n % users], "timestamp": f"2025-01-01T00:00:{n % 60:02d}",
+                     "detalle": {"p0": 1}, "detalle_completo": {}, "total": 10.0, "aura_ganada": 30,
+                     "completado": False}
+                    for n in range(base, min(orders, base + 5000))
+                ])
+    return emojis
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, endpoint, elapsed, status, queries):
+        with self._lock:
+            entry = self.samples.setdefault(endpoint, {"latencies": [], "status": Counter(), "queries": []})
+            entry["latencies"].append(elapsed)
+            entry["status"][status] += 1
+            entry["queries"].append(queries)
+
+
+def make_flows(app, emojis, products, orders, counter, recorder):
+    order_ids = iter(f"seed-{n}" for n in range(orders))
+    order_lock = threading.Lock()
+
+    def timed(endpoint, call):
+        counter.reset()
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        recorder.add(endpoint, elapsed, response.status_code, counter.count)
+        return response
+
+    def login(client, emoji):
+        with client.session_transaction() as session:
+            session["logged_in_user_emoji"] = emoji
+            session["logged_in"] = True
+
+    def emoji_login(client, emoji):
+        timed("emoji_access_api", lambda: client.post(
+            "/api/emoji-access", json={"emoji": emoji, "password": PASSWORD}))
+
+    def cart(client, emoji):
+        login(client, emoji)
+        product_id = f"p{random.randrange(products)}"
+        timed("api_agregar_carrito", lambda: client.post(f"/api/agregar/{product_id}"))
+        timed("api_carrito", lambda: client.get("/api/carrito"))
+        timed("api_quitar_carrito", lambda: client.post(f"/api/quitar/{product_id}"))
+
+    def checkout(client, emoji):
+        login(client, emoji)
+        for _ in range(3):
+            product_id = f"p{random.randrange(products)}"
+            for _ in range(random.randint(1, 3)):
+                client.post(f"/api/agregar/{product_id}")
+        timed("procesar_pedido", lambda: client.post("/procesar_pedido", data={
+            "delivery_day": "Lunes", "delivery_time": "12:00", "phone_number": "5500000000"}))
+
+    def profile(client, emoji):
+        login(client, emoji)
+        timed("api_profile", lambda: client.get("/api/profile"))
+
+    def admin_complete(client, emoji):
+        login(client, emoji)
+        with order_lock:
+            order_id = next(order_ids, None)
+        if order_id is not None:
+            timed("admin_completar_pedido", lambda: client.post(f"/admin/completar-pedido/{order_id}"))
+
+    def admin_bulk_complete(client, emoji):
+        login(client, emoji)
+        with order_lock:
+            batch = [order_id for _, order_id in zip(range(BULK_BATCH), order_ids)]
+        if batch:
+            timed("admin_completar_pedidos", lambda: client.post(
+                "/admin/completar-pedidos", json={"ids": batch, "accion": "completar"}))
+
+    return {"emoji_login": emoji_login, "cart": cart, "checkout": checkout,
+            "profile": profile, "admin_complete": admin_complete, "admin_bulk_complete": admin_bulk_complete}
+
+
+def run_flow(app, flow, emojis, clients, iterations):
+    def worker(n):
+        client = app.test_client()
+        for i in range(n):
+            flow(client, random.choice(emojis))
+
+    per_client = [iterations // clients + (1 if i < iterations % clients else 0) for i in range(clients)]
+    threads = [threading.Thread(target=worker, args=(n,)) for n in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def summarize(samples, wall_times):
+    report = {}
+    for endpoint, entry in sorted(samples.items()):
+        latencies, queries = entry["latencies"], entry["queries"]
+        wall = wall_times.get(endpoint)
+        report[endpoint] = {
+            "requests": len(latencies),
+            "errors": sum(n for status, n in entry["status"].items() if status >= 500),
+            "status": {str(k): v for k, v in sorted(entry["status"].items())},
+            **percentiles(latencies),
+            "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+            "queries_mean": round(sum(queries) / len(queries), 2),
+            "queries_max": max(queries),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de flujos de la tienda.")
+    parser.add_argument("--database-url", help="por defecto, un SQLite temporal")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--aura-levels", type=int, default=7)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=200, help="iteraciones por flujo")
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="archivo JSON de salida (por defecto, stdout)")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    database_url = use_database(args.database_url)
+    from app import app
+    from coraksmart.extensions import db
+
+    app.config["TESTING"] = False
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    emojis = seed(app, args.products, args.users, args.orders, args.aura_levels)
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    recorder = Recorder()
+    flows = make_flows(app, emojis, args.products, args.orders, counter, recorder)
+    wall_times = {}
+    for name in args.flows.split(","):
+        before = set(recorder.samples)
+        elapsed = run_flow(app, flows[name], emojis, args.clients, args.iterations)
+        for endpoint in set(recorder.samples) - before:
+            wall_times[endpoint] = elapsed
+
+    report = {
+        "commit": git_commit(),
+        "database": database_url.split("://")[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("database_url", "output")},
+        "endpoints": summarize(recorder.samples, wall_times),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+CorakSmart: tienda con sistema de aura. `create_app()` arma la app de Flask;
+`app.py` en la raíz la expone para gunicorn y `flask --app app`.
+
+Las cachés (VersionedCache) guardan su valor por app en app.extensions;
+order_sequence, password_hasher, login_throttle y el cart store en memoria
+son del proceso y los comparten todas sus apps; los límites del hasher y los
+fallos del throttle, además, viven en memoria compartida entre los workers.
+
+Lo que ningún request necesita al arrancar (Flask-Migrate/alembic, requests,
+Pillow, brotli) se importa en el primer uso.
+"""
+import os
+
+from flask import Flask
+
+from . import assets, cache, cli, metrics, querybudget, replica, settings
+from .extensions import db, migraciones_command
+
+
+def create_app(config=None):
+    app = Flask(__name__,
+                static_folder=os.path.join(settings.PROJECT_ROOT, "static"),
+                template_folder=os.path.join(settings.PROJECT_ROOT, "templates"))
+    app.jinja_env.add_extension('jinja2.ext.do')
+    app.config.from_mapping(settings.desde_entorno())
+    if config:
+        app.config.update(config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS",
+                          settings.engine_options(app.config["SQLALCHEMY_DATABASE_URI"]))
+
+    db.init_app(app)
+    metrics.init_app(app)
+    querybudget.init_app(app)
+    cache.init_app(app)
+    replica.init_app(app)
+    assets.init_app(app)
+
+    from .blueprints import admin, auth, rewards, shop
+    for blueprint in (shop.bp, auth.bp, admin.bp, rewards.bp):
+        app.register_blueprint(blueprint)
+
+    cli.init_app(app)
+    app.cli.add_command(migraciones_command)
+    return app
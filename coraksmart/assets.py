@@ -0,0 +1,109 @@
+# `flask build-assets` deja en ASSETS_BUILD_DIR una copia de cada archivo de
+# static/ con el hash del contenido en el nombre, sus versiones .gz/.br y un
+# manifest.json. Con manifest, WhiteNoise registra los archivos desde él (sin
+# recorrer static/): /static/<nombre con hash> se sirve como inmutable y el
+# nombre original sigue en / con un max-age corto. Sin build, como antes.
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from flask import current_app, url_for
+from whitenoise import WhiteNoise
+
+from .settings import PROJECT_ROOT
+
+STATIC_FOLDER = os.path.join(PROJECT_ROOT, "static")
+ASSETS_BUILD_DIR = os.environ.get("ASSETS_BUILD_DIR", os.path.join(PROJECT_ROOT, "static_build"))
+ASSET_MANIFEST = os.path.join(ASSETS_BUILD_DIR, "manifest.json")
+# max-age de los archivos sin hash en el nombre.
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", 3600))
+HASHED_ASSET_RE = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+COMPRESSIBLE_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".txt", ".map", ".xml", ".ico")
+
+def cargar_manifest(ruta=ASSET_MANIFEST):
+    """{ruta original: ruta con hash} del último build-assets; vacío si no hay build."""
+    try:
+        with open(ruta) as fh:
+            return json.load(fh)["paths"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def _es_inmutable(path, url):
+    return HASHED_ASSET_RE.search(url) is not None
+
+def configurar_whitenoise(wsgi_app, manifest, build_dir=ASSETS_BUILD_DIR):
+    if not manifest:
+        return WhiteNoise(wsgi_app, root=STATIC_FOLDER + "/", max_age=STATIC_MAX_AGE,
+                          immutable_file_test=_es_inmutable)
+    whitenoise = WhiteNoise(wsgi_app, max_age=STATIC_MAX_AGE, immutable_file_test=_es_inmutable)
+    for original, hashed in manifest.items():
+        path = os.path.join(build_dir, hashed)
+        whitenoise.add_file_to_dictionary(f"/static/{hashed}", path)
+        whitenoise.add_file_to_dictionary(f"/{original}", path)
+    return whitenoise
+
+def asset_url(filename):
+    """URL de un archivo de static/: la versión con hash si hay build, si no la de siempre."""
+    hashed = current_app.extensions["asset_manifest"].get(filename)
+    if hashed:
+        return f"/static/{hashed}"
+    return url_for('static', filename=filename)
+
+def construir_assets(origen=STATIC_FOLDER, destino=ASSETS_BUILD_DIR):
+    """
+    Copia cada archivo de `origen` a `destino` con el hash de su contenido en
+    el nombre, agrega .gz (y .br si está instalado brotli) a los de texto y
+    escribe el manifest. Regresa el manifest.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    manifest = {}
+    for carpeta, subcarpetas, archivos in os.walk(origen):
+        # Por si el destino está dentro del origen.
+        subcarpetas[:] = [d for d in subcarpetas
+                          if os.path.abspath(os.path.join(carpeta, d)) != os.path.abspath(destino)]
+        for nombre in sorted(archivos):
+            fuente = os.path.join(carpeta, nombre)
+            relativa = os.path.relpath(fuente, origen).replace(os.sep, "/")
+            with open(fuente, "rb") as fh:
+                data = fh.read()
+            if HASHED_ASSET_RE.search(nombre):
+                hashed = relativa  # Ya trae hash (p. ej. las variantes de imágenes).
+            else:
+                stem, ext = os.path.splitext(relativa)
+                hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            salida = os.path.join(destino, hashed)
+            manifest[relativa] = hashed
+            if os.path.exists(salida):
+                continue
+            os.makedirs(os.path.dirname(salida), exist_ok=True)
+            with open(salida, "wb") as fh:
+                fh.write(data)
+            if not nombre.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            comprimidos = {".gz": gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                comprimidos[".br"] = brotli.compress(data)
+            for sufijo, contenido in comprimidos.items():
+                # Como WhiteNoise: sólo si ahorra al menos un 5%.
+                if len(contenido) < len(data) * 0.95:
+                    with open(salida + sufijo, "wb") as fh:
+                        fh.write(contenido)
+
+    temporal = os.path.join(destino, "manifest.json.tmp")
+    with open(temporal, "w") as fh:
+        json.dump({"version": 1, "paths": manifest}, fh, indent=2, sort_keys=True)
+    os.replace(temporal, os.path.join(destino, "manifest.json"))
+    return manifest
+
+def init_app(app):
+    """Envuelve la app con WhiteNoise y publica asset_url() en los templates."""
+    manifest = cargar_manifest()
+    app.extensions["asset_manifest"] = manifest
+    app.wsgi_app = configurar_whitenoise(app.wsgi_app, manifest)
+    app.add_template_global(asset_url)
@@ -0,0 +1,103 @@
+# Los puntos y las recompensas se actualizan con UPDATE condicionales en vez
+# de leer el User, modificarlo en Python y guardar: dos workers a la vez no
+# pierden cambios ni reclaman dos veces el mismo nivel.
+import collections
+from bisect import bisect_right
+
+from sqlalchemy import select, update, func, case
+
+from .extensions import db
+from .helpers import get_aura_level_index
+from .leaderboard import registrar_cambios_de_puntos
+from .models import User, Order
+
+REWARD_CLAIM_ATTEMPTS = 5
+
+RECOMPENSA_OK = "ok"
+RECOMPENSA_SIN_USUARIO = "sin_usuario"
+RECOMPENSA_YA_RECLAMADA = "ya_reclamada"
+RECOMPENSA_SIN_PUNTOS = "sin_puntos"
+RECOMPENSA_CONFLICTO = "conflicto"
+
+
+def ajustar_aura(deltas):
+    """
+    Suma a cada usuario su delta ({emoji: delta}) en un solo UPDATE, atómico
+    por fila, y lleva los puntos resultantes al histograma del leaderboard.
+    """
+    deltas = {emoji: delta for emoji, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    users = User.__table__
+    filas = db.session.execute(
+        update(users)
+        .where(users.c.emoji.in_(list(deltas)))
+        .values(aura_points=func.coalesce(users.c.aura_points, 0) + case(deltas, value=users.c.emoji))
+        .returning(users.c.emoji, users.c.aura_points)
+    )
+    cambios = collections.Counter()
+    for emoji, puntos in filas:
+        cambios[puntos - deltas[emoji]] -= 1
+        cambios[puntos] += 1
+    registrar_cambios_de_puntos(cambios)
+
+def alternar_pedido(pedido_id):
+    """
+    Invierte `completado` y devuelve (completado, user_emoji, aura_ganada) en
+    una sola sentencia; None si el pedido no existe.
+    """
+    nuevo = case((Order.completado.is_(True), False), else_=True)
+    return db.session.execute(
+        update(Order).where(Order.id == pedido_id).values(completado=nuevo)
+        .returning(Order.completado, Order.user_emoji, Order.aura_ganada)
+    ).first()
+
+def registrar_recompensa(user_emoji, level, code=None, min_points=None):
+    """
+    Marca `level` como reclamado (y guarda `code` si se da) solo si no estaba
+    reclamado, el usuario sigue teniendo `min_points` y nadie cambió sus
+    recompensas desde la lectura. Devuelve uno de los estados RECOMPENSA_*.
+    """
+    for _ in range(REWARD_CLAIM_ATTEMPTS):
+        row = db.session.execute(
+            select(User.claimed_levels, User.reward_codes, User.rewards_version, User.aura_points)
+            .where(User.emoji == user_emoji)
+        ).first()
+        if row is None:
+            return RECOMPENSA_SIN_USUARIO
+        claimed_levels = list(row.claimed_levels or [])
+        if level in claimed_levels:
+            return RECOMPENSA_YA_RECLAMADA
+        if min_points is not None and (row.aura_points or 0) < min_points:
+            return RECOMPENSA_SIN_PUNTOS
+        reward_codes = dict(row.reward_codes or {})
+        if code is not None:
+            reward_codes[str(level)] = code
+
+        guardas = [User.emoji == user_emoji, User.rewards_version == row.rewards_version]
+        if min_points is not None:
+            guardas.append(func.coalesce(User.aura_points, 0) >= min_points)
+        actualizado = db.session.execute(
+            update(User).where(*guardas).values(
+                claimed_levels=claimed_levels + [level],
+                reward_codes=reward_codes,
+                rewards_version=User.rewards_version + 1,
+            )
+        ).rowcount
+        if actualizado:
+            return RECOMPENSA_OK
+        db.session.rollback()
+    return RECOMPENSA_CONFLICTO
+
+def check_pending_rewards(user_emoji):
+    """Niveles alcanzados por el usuario que aún no reclama, del más bajo al más alto."""
+    row = db.session.execute(
+        select(User.aura_points, User.claimed_levels).where(User.emoji == user_emoji)
+    ).first()
+    if row is None:
+        return []
+    index = get_aura_level_index()
+    claimed = set(row.claimed_levels or [])
+    alcanzados = index.levels[:bisect_right(index.thresholds, row.aura_points or 0)]
+    return sorted((l for l in alcanzados if l["level"] not in claimed), key=lambda l: l["level"])
+
@@ -0,0 +1,225 @@
+"""Panel de administración: productos, pedidos y completado en lote."""
+import os
+from datetime import date, timedelta
+
+from flask import Blueprint, request, session, jsonify
+from sqlalchemy import select, update, and_, or_
+
+from ..aura import ajustar_aura, alternar_pedido
+from ..extensions import db
+from ..helpers import get_productos, codificar_cursor, decodificar_cursor
+from ..models import Product, Order, bundles_que_contienen
+from ..querybudget import query_budget
+from ..replica import solo_lectura
+from ..rollups import emitir_ventas, quitar_pedido, resumen_ventas
+
+ADMIN_PASSWORD_HASH = os.environ.get("ADMIN_PASSWORD_HASH") # It's better to use env vars
+
+bp = Blueprint("admin", __name__)
+
+@bp.route("/admin/eliminar-producto/<product_id>", methods=["POST"])
+def admin_eliminar_producto(product_id):
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "Not authorized"}), 401
+
+    # Check if the product is part of any bundle
+    bundles_containing_product = bundles_que_contienen(product_id)
+
+    if bundles_containing_product:
+        bundle_names = ", ".join(bundles_containing_product)
+        return jsonify({
+            "success": False,
+            "message": f"El producto no puede ser eliminado porque es parte de los siguientes bundles: {bundle_names}"
+        }), 400
+
+    producto = db.session.get(Product, product_id)
+    if producto:
+        db.session.delete(producto)
+        db.session.commit()
+        return jsonify({"success": True})
+
+    return jsonify({"success": False, "message": "Producto no encontrado"}), 404
+
+@bp.route("/admin/completar-pedido/<pedido_id>", methods=["POST"])
+@query_budget(5)
+def admin_completar_pedido(pedido_id):
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    # Toggle completion status
+    resultado = alternar_pedido(pedido_id)
+    if resultado is None:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Pedido no encontrado."}), 404
+    completado, user_emoji, aura_ganada = resultado
+
+    # Los rollups de ventas se actualizan desde el outbox-worker.
+    emitir_ventas([pedido_id])
+    message = "Pedido completado." if completado else "Pedido desmarcado."
+    if user_emoji and aura_ganada:
+        if completado:
+            ajustar_aura({user_emoji: aura_ganada})
+            message = f"Pedido completado. Se sumaron {aura_ganada} puntos de Aura a {user_emoji}."
+        else:
+            ajustar_aura({user_emoji: -aura_ganada})
+            message = f"Pedido desmarcado. Se restaron {aura_ganada} puntos de Aura a {user_emoji}."
+
+    db.session.commit()
+    return jsonify({"success": True, "completado": completado, "message": message})
+
+BULK_COMPLETION_ACTIONS = ("completar", "desmarcar", "alternar")
+BULK_COMPLETION_MAX_ORDERS = 500
+
+@bp.route("/admin/completar-pedidos", methods=["POST"])
+@query_budget(7)
+def admin_completar_pedidos():
+    """
+    Completa, desmarca o alterna varios pedidos en una sola transacción.
+    Body: {"ids": [...], "accion": "completar" | "desmarcar" | "alternar"}.
+    El aura se suma/resta con un UPDATE por usuario con el total de sus pedidos.
+    """
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    accion = data.get("accion", "alternar")
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) for i in ids):
+        return jsonify({"success": False, "message": "ids debe ser una lista de ids de pedido."}), 400
+    if len(ids) > BULK_COMPLETION_MAX_ORDERS:
+        return jsonify({"success": False, "message": f"Máximo {BULK_COMPLETION_MAX_ORDERS} pedidos por request."}), 400
+    if accion not in BULK_COMPLETION_ACTIONS:
+        return jsonify({"success": False, "message": "Acción no válida"}), 400
+    ids = list(dict.fromkeys(ids))
+
+    pedidos = {row.id: row for row in db.session.execute(
+        select(Order.id, Order.user_emoji, Order.aura_ganada, Order.completado).where(Order.id.in_(ids)))}
+
+    a_completar, a_desmarcar = [], []
+    aura_por_usuario = {}
+    resultados = []
+    for order_id in ids:
+        pedido = pedidos.get(order_id)
+        if pedido is None:
+            resultados.append({"id": order_id, "success": False, "message": "Pedido no encontrado."})
+            continue
+        actual = bool(pedido.completado)
+        nuevo = {"completar": True, "desmarcar": False, "alternar": not actual}[accion]
+        delta = 0
+        if nuevo != actual:
+            (a_completar if nuevo else a_desmarcar).append(order_id)
+            if pedido.user_emoji and pedido.aura_ganada:
+                delta = pedido.aura_ganada if nuevo else -pedido.aura_ganada
+                aura_por_usuario[pedido.user_emoji] = aura_por_usuario.get(pedido.user_emoji, 0) + delta
+        resultados.append({"id": order_id, "success": True, "completado": nuevo,
+                           "cambio": nuevo != actual, "aura_delta": delta})
+
+    # El estado leído se exige en el WHERE: si otro worker cambió algún pedido
+    # entre la lectura y la escritura no se aplica nada.
+    no_completado = or_(Order.completado.is_(False), Order.completado.is_(None))
+    cambiados = 0
+    if a_completar:
+        cambiados += db.session.execute(
+            update(Order).where(Order.id.in_(a_completar), no_completado).values(completado=True)).rowcount
+    if a_desmarcar:
+        cambiados += db.session.execute(
+            update(Order).where(Order.id.in_(a_desmarcar), Order.completado.is_(True)).values(completado=False)).rowcount
+    if cambiados != len(a_completar) + len(a_desmarcar):
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Algunos pedidos cambiaron mientras tanto, intenta de nuevo."}), 409
+
+    ajustar_aura(aura_por_usuario)
+    if a_completar or a_desmarcar:
+        emitir_ventas(a_completar + a_desmarcar)
+    db.session.commit()
+
+    return jsonify({"success": True, "resultados": resultados, "aura_por_usuario": aura_por_usuario})
+
+ORDER_LIST_COLUMNS = ("id", "user_emoji", "timestamp", "total", "aura_ganada",
+                      "aura_potencial", "aura_otorgada", "completado")
+ORDER_LIST_HEAVY_COLUMNS = ("detalle", "detalle_completo", "delivery_info", "whatsapp_usado")
+ORDER_LIST_MAX_LIMIT = 200
+
+@bp.route("/admin/api/pedidos")
+@solo_lectura
+@query_budget(1)
+def admin_api_pedidos():
+    """
+    Lista de pedidos, del más reciente al más antiguo, paginada por cursor
+    sobre (timestamp, id). Filtros: completado, user_emoji. Las columnas JSON
+    pesadas solo se leen si se piden en ?fields=detalle,delivery_info,...
+    """
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), ORDER_LIST_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit no válido"}), 400
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    invalid = [f for f in fields if f not in ORDER_LIST_HEAVY_COLUMNS]
+    if invalid:
+        return jsonify({"success": False, "message": f"Campos no válidos: {', '.join(invalid)}"}), 400
+
+    columnas = [getattr(Order, c) for c in ORDER_LIST_COLUMNS + tuple(fields)]
+    # Los pedidos sin timestamp no tienen posición estable en el cursor.
+    query = select(*columnas).where(Order.timestamp.isnot(None))
+    completado = request.args.get("completado")
+    if completado is not None:
+        query = query.where(Order.completado == (completado.lower() in ("1", "true", "si", "sí")))
+    if request.args.get("user_emoji"):
+        query = query.where(Order.user_emoji == request.args["user_emoji"])
+    if request.args.get("cursor"):
+        cursor = decodificar_cursor(request.args["cursor"], (str, str))
+        if cursor is None:
+            return jsonify({"success": False, "message": "cursor no válido"}), 400
+        timestamp, order_id = cursor
+        query = query.where(or_(Order.timestamp < timestamp,
+                                and_(Order.timestamp == timestamp, Order.id < order_id)))
+    query = query.order_by(Order.timestamp.desc(), Order.id.desc()).limit(limit + 1)
+
+    rows = db.session.execute(query).mappings().all()
+    pedidos = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = codificar_cursor(pedidos[-1]["timestamp"], pedidos[-1]["id"])
+    return jsonify({"success": True, "pedidos": pedidos, "next_cursor": next_cursor})
+
+SALES_DEFAULT_DAYS = 30
+
+@bp.route("/admin/api/ventas")
+@solo_lectura
+@query_budget(5)
+def admin_api_ventas():
+    """
+    Ventas entre ?desde y ?hasta (YYYY-MM-DD; por defecto los últimos 30
+    días) por producto y variación, por día y por número de WhatsApp. Lee
+    sólo los rollups, nunca los pedidos.
+    """
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    try:
+        hasta = date.fromisoformat(request.args["hasta"]) if request.args.get("hasta") else date.today()
+        desde = (date.fromisoformat(request.args["desde"]) if request.args.get("desde")
+                 else hasta - timedelta(days=SALES_DEFAULT_DAYS - 1))
+    except ValueError:
+        return jsonify({"success": False, "message": "Fecha no válida, usa YYYY-MM-DD"}), 400
+
+    resumen = resumen_ventas(desde.isoformat(), hasta.isoformat())
+    productos = get_productos()
+    for fila in resumen["productos"]:
+        fila["nombre"] = productos.get(fila["product_id"], {}).get("nombre", fila["product_id"])
+    return jsonify({"success": True, "desde": desde.isoformat(), "hasta": hasta.isoformat(), **resumen})
+
+@bp.route("/admin/delete-order/<pedido_id>", methods=["POST"])
+def admin_delete_order(pedido_id):
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    # Se resta de los rollups de ventas en la misma transacción que el borrado.
+    if not quitar_pedido(pedido_id):
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Pedido no encontrado."}), 404
+    db.session.commit()
+    return jsonify({"success": True, "message": f"Pedido {pedido_id} eliminado."})
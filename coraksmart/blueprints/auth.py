@@ -0,0 +1,125 @@
+"""Acceso con emoji y contraseña, perfil y lista de emojis para el login."""
+import hashlib
+
+from flask import Blueprint, current_app, request, session, jsonify, flash, redirect, url_for
+
+from ..cache import estado_de_app, leer_version, EMOJIS_VERSION_KEY, USERS_VERSION_KEY
+from ..extensions import db
+from ..helpers import (emoji_cache, occupied_emoji_cache, get_emoji_list, get_aura_level_index,
+                       codificar_ocupacion, EMOJI_OCCUPANCY_FORMATS)
+from ..models import User
+from ..querybudget import query_budget
+from ..replica import solo_lectura
+from ..security import HashingBusy, password_hasher, login_throttle
+
+bp = Blueprint("auth", __name__)
+
+@bp.route('/api/get-emojis')
+@solo_lectura
+@query_budget(3)
+def api_get_emojis():
+    """
+    API endpoint to get all emojis and occupied ones.
+
+    ?format=indices|bitmap devuelve la ocupación compacta contra el orden de
+    all_emojis. El ETag depende de las versiones de emojis y usuarios, así que
+    el polling del login recibe 304 mientras nada cambie.
+    """
+    formato = request.args.get("format", "list")
+    if formato not in EMOJI_OCCUPANCY_FORMATS:
+        return jsonify({"error": f"Formato no válido: {formato}"}), 400
+
+    firma = f"{leer_version(EMOJIS_VERSION_KEY)}:{leer_version(USERS_VERSION_KEY)}:{formato}"
+    etag = hashlib.sha1(firma.encode("utf-8")).hexdigest()
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        # Respuestas ya armadas por ETag, en el estado de caché de la app.
+        payloads = estado_de_app().setdefault("emoji_payloads", {})
+        payload = payloads.get(etag)
+        if payload is None:
+            all_emojis = emoji_cache.get()
+            payload = {"all_emojis": all_emojis}
+            payload.update(codificar_ocupacion(all_emojis, occupied_emoji_cache.get(), formato))
+            if len(payloads) >= 2 * len(EMOJI_OCCUPANCY_FORMATS):
+                payloads.clear()
+            payloads[etag] = payload
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@bp.route('/api/profile')
+@solo_lectura
+@query_budget(3)
+def api_profile():
+    """API endpoint to get the current user's profile info."""
+    user_emoji = session.get('logged_in_user_emoji')
+    if not user_emoji:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    user = User.query.get(user_emoji)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    # Calculate current level
+    aura_points = user.aura_points or 0
+    current_level_info = get_aura_level_index().nivel_para(aura_points) or {}
+
+    return jsonify({
+        "emoji": user.emoji,
+        "aura_points": aura_points,
+        "aura_level": current_level_info.get('level', 0),
+        "level_name": current_level_info.get('name', 'N/A')
+    })
+
+@bp.route('/api/emoji-access', methods=['POST'])
+@query_budget(6)
+def emoji_access_api():
+    data = request.get_json()
+    emoji = data.get("emoji")
+    password = data.get("password")
+
+    if not emoji or not password:
+        return jsonify({"success": False, "message": "Datos inválidos."})
+
+    all_emojis_from_db = get_emoji_list()
+    if emoji not in all_emojis_from_db:
+        return jsonify({"success": False, "message": "Emoji no válido."})
+
+    if login_throttle.bloqueado(emoji):
+        return jsonify({"success": False, "message": "Demasiados intentos. Intenta más tarde."}), 429
+
+    user = User.query.get(emoji)
+    try:
+        if user:
+            valida = password_hasher.check(user.password_hash, password)
+        else:
+            password_hash = password_hasher.generate(password)
+    except HashingBusy:
+        return jsonify({"success": False, "message": "Servidor ocupado, intenta de nuevo."}), 503
+
+    if user:
+        if valida:
+            login_throttle.exito(emoji)
+            session["logged_in_user_emoji"] = emoji
+            return jsonify({"success": True})
+        else:
+            login_throttle.fallo(emoji)
+            return jsonify({"success": False, "message": "Contraseña incorrecta."})
+    else:
+        new_user = User(
+            emoji=emoji,
+            password_hash=password_hash
+        )
+        db.session.add(new_user)
+        db.session.commit()
+        session["logged_in_user_emoji"] = emoji
+        return jsonify({"success": True, "message": "¡Avatar registrado con éxito!"})
+
+@bp.route("/logout")
+def logout():
+    session.pop("logged_in", None)
+    session.pop("logged_in_user_emoji", None)
+    flash("Has cerrado sesión.", "success")
+    return redirect(url_for("entrar"))
@@ -0,0 +1,166 @@
+"""Recompensas por nivel de aura: códigos para el cliente, confirmación desde admin y leaderboard."""
+
+from flask import Blueprint, request, session, jsonify
+from sqlalchemy import select, and_, or_
+
+from ..aura import (registrar_recompensa, check_pending_rewards, RECOMPENSA_OK, RECOMPENSA_SIN_USUARIO,
+                    RECOMPENSA_YA_RECLAMADA, RECOMPENSA_SIN_PUNTOS, RECOMPENSA_CONFLICTO)
+from ..extensions import db
+from ..helpers import get_aura_level_index, codificar_cursor, decodificar_cursor
+from ..leaderboard import LEADERBOARD_MAX_LIMIT, leaderboard_cache
+from ..models import User
+from ..orders import generar_codigo_recompensa
+from ..querybudget import query_budget
+from ..replica import solo_lectura
+
+bp = Blueprint("rewards", __name__)
+
+@bp.route('/generate-reward-code', methods=['POST'])
+def generate_reward_code():
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+    
+    user_emoji = session["logged_in_user_emoji"]
+    data = request.get_json()
+    level = data.get("level")
+    
+    # Verificar que el nivel existe; los puntos y que no esté reclamado se
+    # verifican en el mismo UPDATE que lo marca como reclamado.
+    points_needed = get_aura_level_index().umbral(level)
+    if points_needed is None:
+        return jsonify({"success": False, "message": "No tienes suficientes puntos para este nivel"}), 400
+
+    code = generar_codigo_recompensa()
+    estado = registrar_recompensa(user_emoji, level, code=code, min_points=points_needed)
+    if estado == RECOMPENSA_SIN_USUARIO:
+        return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
+    if estado == RECOMPENSA_YA_RECLAMADA:
+        return jsonify({"success": False, "message": "Esta recompensa ya fue reclamada"}), 400
+    if estado == RECOMPENSA_SIN_PUNTOS:
+        return jsonify({"success": False, "message": "No tienes suficientes puntos para este nivel"}), 400
+    if estado == RECOMPENSA_CONFLICTO:
+        return jsonify({"success": False, "message": "La recompensa cambió mientras tanto, intenta de nuevo."}), 409
+    db.session.commit()
+    
+    return jsonify({"success": True, "code": code})
+
+@bp.route('/reclamar_recompensa', methods=['POST'])
+def reclamar_recompensa():
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+    
+    user_emoji = session["logged_in_user_emoji"]
+    
+    # Obtener recompensas pendientes
+    pending_rewards = check_pending_rewards(user_emoji)
+    if not pending_rewards:
+        return jsonify({"success": False, "message": "No tienes recompensas pendientes"}), 400
+    
+    # Reclamar la primera recompensa pendiente
+    reward = pending_rewards[0]
+    level = reward["level"]
+    
+    # Generar código de recompensa
+    code = generar_codigo_recompensa()
+    estado = registrar_recompensa(user_emoji, level, code=code,
+                                  min_points=get_aura_level_index().umbral(level))
+    if estado != RECOMPENSA_OK:
+        return jsonify({"success": False, "message": "La recompensa cambió mientras tanto, intenta de nuevo."}), 409
+    db.session.commit()
+    
+    return jsonify({"success": True, "code": code, "level": level, "prize": reward["prize"]})
+
+@bp.route("/admin/recompensas", methods=["POST"])
+def admin_recompensas():
+    if not session.get("logged_in"):
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    data = request.get_json()
+    user_emoji = data.get("user_emoji")
+    level = data.get("level")
+    action = data.get("action")
+
+    if action not in ("confirm", "reject"):
+        return jsonify({"success": False, "message": "Acción no válida"}), 400
+
+    new_code = generar_codigo_recompensa() if action == "confirm" else None
+    estado = registrar_recompensa(user_emoji, level, code=new_code)
+    if estado == RECOMPENSA_SIN_USUARIO:
+        return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
+    if estado == RECOMPENSA_YA_RECLAMADA:
+        return jsonify({"success": False, "message": "Esta recompensa ya fue procesada."}), 400
+    if estado == RECOMPENSA_CONFLICTO:
+        return jsonify({"success": False, "message": "La recompensa cambió mientras tanto, intenta de nuevo."}), 409
+    db.session.commit()
+
+    if action == "confirm":
+        return jsonify({"success": True, "message": f"Recompensa para {user_emoji} confirmada. Código: {new_code}"})
+    return jsonify({"success": True, "message": f"Recompensa para {user_emoji} rechazada."})
+
+@bp.route("/api/leaderboard")
+@solo_lectura
+@query_budget(4)
+def api_leaderboard():
+    """
+    Top de aura, de más a menos puntos, paginado por cursor sobre
+    (aura_points, emoji) con el índice ix_user_aura_points. La posición de
+    cada usuario sale del histograma en caché; los empates comparten lugar.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), LEADERBOARD_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit no válido"}), 400
+
+    query = select(User.emoji, User.aura_points).where(User.aura_points.isnot(None))
+    if request.args.get("cursor"):
+        cursor = decodificar_cursor(request.args["cursor"], (int, str))
+        if cursor is None:
+            return jsonify({"success": False, "message": "cursor no válido"}), 400
+        aura_points, emoji = cursor
+        query = query.where(or_(User.aura_points < aura_points,
+                                and_(User.aura_points == aura_points, User.emoji < emoji)))
+    rows = db.session.execute(query.order_by(User.aura_points.desc(), User.emoji.desc()).limit(limit + 1)).all()
+
+    index = leaderboard_cache.get()
+    niveles = get_aura_level_index()
+    usuarios = []
+    for emoji, aura_points in rows[:limit]:
+        nivel = niveles.nivel_para(aura_points) or {}
+        usuarios.append({"emoji": emoji, "aura_points": aura_points, "posicion": index.posicion(aura_points),
+                         "aura_level": nivel.get("level", 0), "level_name": nivel.get("name", "N/A")})
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = codificar_cursor(usuarios[-1]["aura_points"], usuarios[-1]["emoji"])
+    return jsonify({"success": True, "usuarios": usuarios, "total": index.total, "next_cursor": next_cursor})
+
+@bp.route("/api/leaderboard/me")
+@solo_lectura
+@query_budget(4)
+def api_leaderboard_me():
+    """Posición del usuario actual en el leaderboard, sin recorrer a los que van delante."""
+    user_emoji = session.get("logged_in_user_emoji")
+    if not user_emoji:
+        return jsonify({"success": False, "message": "No autorizado"}), 401
+
+    aura_points = db.session.execute(select(User.aura_points).where(User.emoji == user_emoji)).first()
+    if aura_points is None:
+        return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
+    aura_points = aura_points[0] or 0
+
+    index = leaderboard_cache.get()
+    nivel = get_aura_level_index().nivel_para(aura_points) or {}
+    return jsonify({"success": True, "emoji": user_emoji, "aura_points": aura_points,
+                    "posicion": index.posicion(aura_points), "total": index.total,
+                    "aura_level": nivel.get("level", 0), "level_name": nivel.get("name", "N/A")})
+
+@bp.route("/api/leaderboard/niveles")
+@solo_lectura
+@query_budget(3)
+def api_leaderboard_niveles():
+    """Usuarios en cada nivel de aura, contados sobre el histograma en caché."""
+    niveles = get_aura_level_index()
+    conteos = leaderboard_cache.get().por_nivel(niveles)
+    return jsonify({"success": True, "niveles": [
+        {"level": level, "name": niveles.by_level[level].get("name"), "usuarios": usuarios}
+        for level, usuarios in sorted(conteos.items())
+    ]})
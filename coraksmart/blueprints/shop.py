@@ -0,0 +1,176 @@
+"""Tienda: carrito del lado del servidor y checkout."""
+import urllib.parse
+from datetime import datetime
+
+from flask import Blueprint, request, session, jsonify
+
+from ..cache import cotizar_carrito, price_cache
+from ..cart import CART_MAX_LINES, cart_store, carrito_sid, get_carrito
+from ..extensions import db
+from ..helpers import get_productos, get_bundles, expandir_bundles, detalle_carrito
+from ..models import Order
+from ..orders import generar_id_pedido, crear_mensaje_pedido, determinar_whatsapp_destino, reservar_stock
+from ..outbox import emitir_evento
+from ..querybudget import query_budget
+from ..replica import solo_lectura
+from ..rollups import emitir_ventas
+
+bp = Blueprint("shop", __name__)
+
+# --- MAIN VIEWS (DEPRECATED) ---
+# The frontend is now handled by the React application in the /web directory.
+# This route is now a simple API status check.
+@bp.route("/")
+def index():
+    return jsonify({"status": "ok", "message": "Flask API is running. Frontend is served separately."})
+
+@bp.route('/procesar_pedido', methods=['POST'])
+@query_budget(7, en_frio=10)
+def procesar_pedido():
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"success": False, "message": "No has iniciado sesión."}), 401
+
+    user_emoji = session["logged_in_user_emoji"]
+    sid = carrito_sid()
+    if not sid:
+        return jsonify({"success": False, "message": "Tu carrito está vacío."}), 400
+    # El id se reserva antes de la primera consulta de db.session: OrderSequence
+    # usa otra conexión del pool y, si esta ya tuviera una, con muchos checkouts
+    # a la vez cada request retendría una esperando la segunda. Tampoco podría
+    # escribir en SQLite mientras este request tenga el stock bloqueado.
+    order_id = generar_id_pedido()
+    carrito = cart_store.get(sid)
+    if not carrito:
+        return jsonify({"success": False, "message": "Tu carrito está vacío."}), 400
+
+    cotizacion = cotizar_carrito(carrito)
+    if cotizacion.faltantes:
+        return jsonify({"success": False, "message": f"Producto {cotizacion.faltantes[0]} no encontrado."}), 404
+    detalle_completo = cotizacion.detalle
+
+    sin_stock = reservar_stock(expandir_bundles(carrito, get_bundles()))
+    if sin_stock:
+        db.session.rollback()
+        productos = get_productos()
+        nombres = ", ".join(productos[p]["nombre"] if p in productos else p for p in sin_stock)
+        return jsonify({"success": False, "message": f"No hay stock suficiente de: {nombres}.",
+                        "sin_stock": sin_stock}), 409
+
+    delivery_info = {
+        "day": request.form.get("delivery_day"),
+        "time": request.form.get("delivery_time"),
+        "station": request.form.get("delivery_station"),
+        "instructions": request.form.get("special_instructions"),
+        "phone": request.form.get("phone_number"),
+        "location_type": request.form.get("location_type")
+    }
+
+    whatsapp_numero, whatsapp_slot = determinar_whatsapp_destino(cotizacion.whatsapp_counts)
+    new_order = Order(
+        id=order_id,
+        user_emoji=user_emoji,
+        timestamp=datetime.now().isoformat(),
+        detalle=carrito,
+        detalle_completo=detalle_completo,
+        total=cotizacion.total,
+        aura_ganada=cotizacion.aura,
+        delivery_info=delivery_info,
+        completado=False,
+        whatsapp_usado=whatsapp_slot
+    )
+    db.session.add(new_order)
+    # Lo que no necesita el cliente para irse a WhatsApp lo hace el outbox-worker.
+    emitir_evento("pedido_creado", {
+        "order_id": order_id,
+        "user_emoji": user_emoji,
+        "total": cotizacion.total,
+        "aura_ganada": cotizacion.aura,
+        "whatsapp": whatsapp_slot,
+    })
+    emitir_ventas([order_id])
+    # Con el store en la base, el pedido y el vaciado del carrito van en la misma transacción.
+    cart_store.clear(sid)
+    db.session.commit()
+
+    mensaje = crear_mensaje_pedido({"id": order_id, "total": cotizacion.total, "delivery_info": delivery_info},
+                                   detalle_completo)
+    whatsapp_link = f"https://wa.me/{whatsapp_numero}?text={urllib.parse.quote(mensaje)}"
+
+    return jsonify({
+        "success": True,
+        "message": "Pedido procesado con éxito. Serás redirigido a WhatsApp.",
+        "whatsapp_link": whatsapp_link
+    })
+
+
+# --- API RUTAS PARA CARRITO ---
+
+@bp.route('/api/carrito')
+@solo_lectura
+@query_budget(3)
+def api_carrito():
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"carrito": {}, "productos_detalle": {}}), 401
+    
+    carrito = get_carrito()
+    return jsonify({
+        "carrito": carrito,
+        "productos_detalle": detalle_carrito(carrito)
+    })
+
+@bp.route('/api/agregar/<product_id>', methods=['POST'])
+@query_budget(6, en_frio=7)
+def api_agregar_carrito(product_id):
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"success": False}), 401
+    
+    # Sólo ids del catálogo: el store no guarda líneas basura ni ids más largos que cart_line.cart_id.
+    precios = price_cache.get()
+    if product_id not in precios:
+        return jsonify({"success": False, "message": "Producto no encontrado."}), 404
+
+    sid = carrito_sid(crear=True)
+    if not cart_store.incr(sid, product_id):
+        return jsonify({"success": False,
+                        "message": f"Tu carrito ya tiene {CART_MAX_LINES} productos distintos."}), 400
+    db.session.commit()
+    carrito = cart_store.get(sid)
+    
+    # Retornar datos actualizados
+    return jsonify({
+        "carrito": carrito,
+        "productos_detalle": detalle_carrito(carrito, precios)
+    })
+
+@bp.route('/api/quitar/<product_id>', methods=['POST'])
+@query_budget(4)
+def api_quitar_carrito(product_id):
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"success": False}), 401
+    
+    sid = carrito_sid()
+    carrito = {}
+    if sid:
+        cart_store.decr(sid, product_id)
+        db.session.commit()
+        carrito = cart_store.get(sid)
+    
+    # Retornar datos actualizados
+    return jsonify({
+        "carrito": carrito,
+        "productos_detalle": detalle_carrito(carrito)
+    })
+
+@bp.route('/api/limpiar', methods=['POST'])
+def api_limpiar_carrito():
+    if not session.get("logged_in_user_emoji"):
+        return jsonify({"success": False}), 401
+    
+    sid = carrito_sid()
+    if sid:
+        cart_store.clear(sid)
+        db.session.commit()
+    return jsonify({
+        "carrito": {},
+        "productos_detalle": {}
+    })
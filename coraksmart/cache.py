@@ -0,0 +1,363 @@
+import collections
+import threading
+import time
+import weakref
+from bisect import bisect_right
+from uuid import uuid4
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event, select
+
+from .extensions import db, upsert
+from .images import miniatura
+from .metrics import CACHE_LOOKUPS
+from .models import Product, User, Config, AuraLevel, Emoji, BundleItem
+from .querybudget import marcar_en_frio
+
+# Las claves de Config que empiezan con "_" son internas (sellos de versión,
+# contadores) y no forman parte de la configuración visible.
+INTERNAL_CONFIG_PREFIX = "_"
+CATALOG_VERSION_KEY = "_catalog_version"
+AURA_LEVELS_VERSION_KEY = "_aura_levels_version"
+
+CONFIG_VERSION_KEY = "_config_version"
+EMOJIS_VERSION_KEY = "_emojis_version"
+USERS_VERSION_KEY = "_users_version"
+# Se renueva a mano (renovar_version) cuando cambian los puntos de aura.
+LEADERBOARD_VERSION_KEY = "_leaderboard_version"
+
+# Modelo -> sello de versión que se renueva cuando cambian sus filas.
+VERSIONED_MODELS = {
+    Product: CATALOG_VERSION_KEY,
+    AuraLevel: AURA_LEVELS_VERSION_KEY,
+    Config: CONFIG_VERSION_KEY,
+    Emoji: EMOJIS_VERSION_KEY,
+    User: USERS_VERSION_KEY,
+}
+
+# Modelos cuyo sello solo cambia con altas y bajas (p. ej. los puntos de
+# aura de un usuario no cambian qué emojis están ocupados).
+MEMBERSHIP_VERSIONED_MODELS = {User}
+
+# Cachés registradas, por sello de versión.
+_versioned_caches = {}
+# Apps con estado de caché (init_app), para invalidar fuera de un app context.
+_apps = weakref.WeakSet()
+CACHE_EXTENSION = "coraksmart.caches"
+
+def estado_de_app():
+    """
+    Diccionario con el estado de las cachés de la app actual, guardado en
+    app.extensions: dos apps del mismo proceso (p. ej. contra bases
+    distintas) nunca ven los valores de la otra.
+    """
+    return current_app.extensions[CACHE_EXTENSION]
+
+
+def _clave_version(obj):
+    if isinstance(obj, Config) and obj.key.startswith(INTERNAL_CONFIG_PREFIX):
+        return None
+    return VERSIONED_MODELS.get(type(obj))
+
+def _cargar_versiones():
+    keys = set(VERSIONED_MODELS.values()) | {LEADERBOARD_VERSION_KEY}
+    rows = db.session.execute(select(Config.key, Config.value).where(Config.key.in_(keys)))
+    return {key: value for key, value in rows}
+
+def leer_version(key):
+    """Sello de versión actual; se lee una sola vez por request para todas las cachés."""
+    if not has_request_context():
+        return _cargar_versiones().get(key)
+    versiones = g.get("_cache_versions")
+    if versiones is None:
+        versiones = g._cache_versions = _cargar_versiones()
+    return versiones.get(key)
+
+def _olvidar_versiones(*args):
+    if has_app_context():
+        g.pop("_cache_versions", None)
+
+@event.listens_for(db.session, "before_flush")
+def _renovar_versiones(session, flush_context, instances):
+    """Renueva en la misma transacción el sello de los modelos modificados."""
+    keys = set()
+    for obj in list(session.new) + list(session.deleted):
+        keys.add(_clave_version(obj))
+    for obj in session.dirty:
+        if type(obj) not in MEMBERSHIP_VERSIONED_MODELS and session.is_modified(obj):
+            keys.add(_clave_version(obj))
+    keys.discard(None)
+    for key in keys:
+        session.merge(Config(key=key, value=uuid4().hex))
+    session.info.setdefault("versiones_renovadas", set()).update(keys)
+
+def renovar_version(session, key, conn=None):
+    """Renueva el sello `key` en la transacción de `session`, para cambios hechos con SQL directo."""
+    upsert(Config.__table__, [{"key": key, "value": uuid4().hex}], asignar=("value",), conn=conn)
+    session.info.setdefault("versiones_renovadas", set()).add(key)
+
+@event.listens_for(db.session, "after_commit")
+def _invalidar_caches_locales(session):
+    # Las cachés con TTL de este proceso no esperan a que venza el TTL.
+    for key in session.info.pop("versiones_renovadas", ()):
+        for cache in _versioned_caches.get(key, ()):
+            cache.invalidate()
+    _olvidar_versiones()
+
+@event.listens_for(db.session, "after_rollback")
+def _descartar_versiones(session):
+    session.info.pop("versiones_renovadas", None)
+    _olvidar_versiones()
+
+
+class _EstadoCache:
+    __slots__ = ("version", "value", "loaded", "loaded_at", "checked_at")
+
+    def __init__(self):
+        self.version = self.value = self.loaded_at = self.checked_at = None
+        self.loaded = False
+
+
+class VersionedCache:
+    """
+    Valor calculado en memoria del proceso que solo se reconstruye cuando
+    cambia su sello de versión en Config. Cada app guarda su propio valor
+    (estado_de_app); hits y misses son del proceso. Los valores devueltos
+    se comparten entre requests y no deben modificarse.
+
+    Con `ttl` (segundos) el sello solo se vuelve a consultar cuando vence el
+    TTL; los cambios hechos desde este mismo proceso invalidan de inmediato.
+    """
+
+    def __init__(self, version_key, loader, ttl=None, name=None):
+        self.version_key = version_key
+        self.name = name or version_key.strip("_").removesuffix("_version")
+        self.loader = loader
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        _versioned_caches.setdefault(version_key, []).append(self)
+
+    def _estado(self, app=None):
+        estados = app.extensions[CACHE_EXTENSION] if app is not None else estado_de_app()
+        return estados.setdefault(self, _EstadoCache())
+
+    def get(self):
+        estado = self._estado()
+        now = time.monotonic()
+        with self._lock:
+            if estado.loaded and self.ttl is not None and now - estado.checked_at < self.ttl:
+                self.hits += 1
+                CACHE_LOOKUPS.labels(self.name, "hit").inc()
+                return estado.value
+        version = leer_version(self.version_key)
+        with self._lock:
+            if estado.loaded and version == estado.version:
+                self.hits += 1
+                estado.checked_at = now
+                CACHE_LOOKUPS.labels(self.name, "hit").inc()
+                return estado.value
+            self.misses += 1
+        CACHE_LOOKUPS.labels(self.name, "miss").inc()
+        marcar_en_frio()
+        value = self.loader()
+        with self._lock:
+            estado.value, estado.version, estado.loaded = value, version, True
+            estado.loaded_at = estado.checked_at = now
+        return value
+
+    def invalidate(self):
+        """Descarta el valor de la app actual; fuera de un app context, el de todas."""
+        apps = [current_app._get_current_object()] if has_app_context() else list(_apps)
+        with self._lock:
+            for app in apps:
+                estado = self._estado(app)
+                estado.loaded, estado.value = False, None
+
+    def stats(self):
+        estado = self._estado()
+        now = time.monotonic()
+        return {
+            "version": estado.version,
+            "loaded": estado.loaded,
+            "entries": len(estado.value) if estado.loaded and hasattr(estado.value, "__len__") else None,
+            "ttl": self.ttl,
+            "age": round(now - estado.loaded_at, 3) if estado.loaded else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _cargar_catalogo():
+    return {p.id: p.to_dict() for p in Product.query.all()}
+
+# Diccionarios de producto (to_dict) indexados por id.
+catalog_cache = VersionedCache(CATALOG_VERSION_KEY, _cargar_catalogo)
+
+
+def _cargar_bundles():
+    bundles = {}
+    for item in BundleItem.query.all():
+        bundles.setdefault(item.bundle_id, {})[item.product_id] = item.cantidad
+    return bundles
+
+# bundle_id -> {product_id: cantidad}; BundleItem solo cambia junto con Product.
+bundle_cache = VersionedCache(CATALOG_VERSION_KEY, _cargar_bundles, name="bundles")
+
+
+# Sin aura_multiplier en el producto se usa este valor.
+DEFAULT_AURA_MULTIPLIER = 3.0
+WHATSAPP_SLOTS = ("1", "2", "3")
+
+# Precio unitario, aura por unidad, nombre a mostrar, número de WhatsApp y miniatura de un cart_id.
+LineaPrecio = collections.namedtuple("LineaPrecio", "precio aura nombre whatsapp base_id imagen")
+
+class PriceTable:
+    """
+    Tabla de precios compilada del catálogo: cada cart_id comprable (el id
+    del producto y "{id}-{variación}") resuelto a su LineaPrecio. El precio
+    de bundle gana sobre el de la variación, como en el checkout de siempre.
+    """
+
+    def __init__(self, productos):
+        self.lineas = {}
+        for product_id, producto in productos.items():
+            multiplicador = producto.get("aura_multiplier")
+            if multiplicador is None:
+                multiplicador = DEFAULT_AURA_MULTIPLIER
+            whatsapp = str(producto.get("whatsapp_asignado") or "1")
+            if whatsapp not in WHATSAPP_SLOTS:
+                whatsapp = "1"
+
+            def linea(precio):
+                return LineaPrecio(precio, precio * multiplicador, producto["nombre"], whatsapp,
+                                   product_id, miniatura(producto))
+
+            bundle_precio = producto.get("bundle_precio")
+            self.lineas[product_id] = linea(bundle_precio if bundle_precio is not None else producto.get("precio") or 0)
+            variaciones = producto.get("variaciones")
+            if isinstance(variaciones, dict):
+                for variation_id, variation in variaciones.items():
+                    if bundle_precio is not None:
+                        precio = bundle_precio
+                    elif isinstance(variation, dict):
+                        precio = variation.get("precio", 0)
+                    else:
+                        continue
+                    self.lineas.setdefault(f"{product_id}-{variation_id}", linea(precio))
+
+    def __len__(self):
+        return len(self.lineas)
+
+    def __contains__(self, cart_id):
+        """Si cart_id es exactamente un producto o una de sus variaciones (sin caer al producto base)."""
+        return cart_id in self.lineas
+
+    def get(self, cart_id):
+        """
+        LineaPrecio de cart_id; una variación desconocida cae al producto base
+        (el prefijo más largo que sea un id de producto, que también puede
+        tener guiones). None si no existe.
+        """
+        linea = self.lineas.get(cart_id)
+        base_id = cart_id
+        while linea is None and '-' in base_id:
+            base_id = base_id.rpartition('-')[0]
+            linea = self.lineas.get(base_id)
+            if linea is not None and linea.base_id != base_id:
+                linea = None  # Es otra variación, no el producto base.
+        return linea
+
+def _compilar_precios():
+    return PriceTable(catalog_cache.get())
+
+price_cache = VersionedCache(CATALOG_VERSION_KEY, _compilar_precios, name="prices")
+
+# Resultado de cotizar un carrito: detalle por línea, totales y unidades por número de WhatsApp.
+Cotizacion = collections.namedtuple("Cotizacion", "detalle total aura whatsapp_counts faltantes")
+
+def cotizar_carrito(carrito, precios=None):
+    """Cotiza {cart_id: cantidad} contra la tabla de precios en una sola pasada."""
+    if precios is None:
+        precios = price_cache.get()
+    detalle, faltantes = {}, []
+    total = 0
+    aura_total = 0
+    whatsapp_counts = dict.fromkeys(WHATSAPP_SLOTS, 0)
+    for cart_id, cantidad in carrito.items():
+        linea = precios.get(cart_id)
+        if linea is None:
+            faltantes.append(cart_id.split('-', 1)[0])
+            continue
+        subtotal = linea.precio * cantidad
+        total += subtotal
+        aura_total += int(linea.aura * cantidad)
+        whatsapp_counts[linea.whatsapp] += cantidad
+        detalle[cart_id] = {
+            "product_id": linea.base_id,
+            "nombre": linea.nombre,
+            "precio": linea.precio,
+            "cantidad": cantidad,
+            "subtotal": subtotal
+        }
+    return Cotizacion(detalle, total, aura_total, whatsapp_counts, faltantes)
+
+
+def _umbral_aura(points_needed):
+    """Normaliza points_needed ("-Infinity", "negative_infinity", texto) a float."""
+    if isinstance(points_needed, str):
+        if points_needed in ("-Infinity", "negative_infinity"):
+            return -float('inf')
+        try:
+            return float(points_needed)
+        except ValueError:
+            return 0.0
+    if points_needed is None:
+        return 0.0
+    return float(points_needed)
+
+class AuraLevelIndex:
+    """
+    Niveles de aura compilados: umbrales float ordenados para resolver el
+    nivel de cualquier cantidad de puntos con bisect en O(log n).
+    """
+
+    def __init__(self, levels):
+        compilados = sorted(((_umbral_aura(l.get("points_needed")), l) for l in levels),
+                            key=lambda par: (par[0], par[1]["level"]))
+        self.thresholds = [umbral for umbral, _ in compilados]
+        self.levels = [level for _, level in compilados]
+        self.by_level = {level["level"]: level for level in levels}
+        self._threshold_by_level = {level["level"]: umbral for umbral, level in compilados}
+        # Sin umbral alcanzado se usa el primer nivel, como antes.
+        self._default = min(levels, key=lambda l: l["level"]) if levels else None
+
+    def __len__(self):
+        return len(self.levels)
+
+    def nivel_para(self, puntos):
+        """Nivel (dict) que corresponde a `puntos`; None si no hay niveles."""
+        i = bisect_right(self.thresholds, puntos) - 1
+        return self.levels[i] if i >= 0 else self._default
+
+    def niveles_para(self, puntos_lista):
+        return [self.nivel_para(puntos) for puntos in puntos_lista]
+
+    def umbral(self, level):
+        """Puntos necesarios para `level` como float; None si el nivel no existe."""
+        return self._threshold_by_level.get(level)
+
+def _compilar_niveles_aura():
+    return AuraLevelIndex([level.to_dict() for level in AuraLevel.query.order_by(AuraLevel.level).all()])
+
+aura_level_cache = VersionedCache(AURA_LEVELS_VERSION_KEY, _compilar_niveles_aura)
+
+
+def _limpiar_versiones(exc):
+    g.pop("_cache_versions", None)
+
+def init_app(app):
+    app.extensions[CACHE_EXTENSION] = {}
+    _apps.add(app)
+    app.teardown_request(_limpiar_versiones)
@@ -0,0 +1,154 @@
+# El carrito vive del lado del servidor; la sesión firmada sólo guarda un
+# id corto (cart_sid). Agregar o quitar toca una sola línea en lugar de
+# volver a serializar y firmar todo el carrito en la cookie.
+import os
+import threading
+import time
+from uuid import uuid4
+
+from flask import session
+from sqlalchemy import select, update, insert, func, literal
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import CartLine
+
+CART_SESSION_KEY = "cart_sid"
+CART_MAX_AGE = float(os.environ.get("CART_MAX_AGE", 72 * 3600))
+# Líneas distintas por carrito; una más se rechaza (la cantidad de cada una no tiene tope).
+CART_MAX_LINES = int(os.environ.get("CART_MAX_LINES", 50))
+
+
+class DBCartStore:
+    """Carritos en la tabla cart_line. Las escrituras quedan en db.session; commit del caller."""
+
+    def get(self, sid):
+        rows = db.session.execute(
+            select(CartLine.cart_id, CartLine.cantidad).where(CartLine.cart_sid == sid)
+        )
+        return {cart_id: cantidad for cart_id, cantidad in rows}
+
+    def incr(self, sid, cart_id, n=1, max_lineas=CART_MAX_LINES):
+        """Suma n a la línea. Devuelve False, sin cambiar nada, si es nueva y el carrito ya tiene max_lineas."""
+        valores = {"cantidad": CartLine.cantidad + n, "updated_at": time.time()}
+        actualizadas = db.session.execute(
+            update(CartLine).where(CartLine.cart_sid == sid, CartLine.cart_id == cart_id).values(**valores)
+        ).rowcount
+        if actualizadas:
+            return True
+        lineas = select(func.count()).where(CartLine.cart_sid == sid).scalar_subquery()
+        nueva = select(literal(sid), literal(cart_id), literal(n), literal(time.time())).where(lineas < max_lineas)
+        try:
+            # El savepoint acota el error al INSERT: el resto de la transacción del caller sigue en pie.
+            with db.session.begin_nested():
+                insertadas = db.session.execute(
+                    insert(CartLine).from_select(["cart_sid", "cart_id", "cantidad", "updated_at"], nueva)
+                ).rowcount
+        except IntegrityError:
+            # Otra petición del mismo carrito insertó la línea primero.
+            db.session.execute(
+                update(CartLine).where(CartLine.cart_sid == sid, CartLine.cart_id == cart_id).values(**valores)
+            )
+            return True
+        return bool(insertadas)
+
+    def decr(self, sid, cart_id, n=1):
+        actualizadas = db.session.execute(
+            update(CartLine)
+            .where(CartLine.cart_sid == sid, CartLine.cart_id == cart_id, CartLine.cantidad > n)
+            .values(cantidad=CartLine.cantidad - n, updated_at=time.time())
+        ).rowcount
+        if not actualizadas:
+            db.session.execute(
+                CartLine.__table__.delete().where(CartLine.cart_sid == sid, CartLine.cart_id == cart_id)
+            )
+
+    def clear(self, sid):
+        db.session.execute(CartLine.__table__.delete().where(CartLine.cart_sid == sid))
+
+    def purge(self, max_age):
+        """Borra los carritos sin actividad en max_age segundos. Devuelve las líneas borradas."""
+        abandonados = (
+            select(CartLine.cart_sid)
+            .group_by(CartLine.cart_sid)
+            .having(func.max(CartLine.updated_at) < time.time() - max_age)
+        )
+        return db.session.execute(
+            CartLine.__table__.delete().where(CartLine.cart_sid.in_(abandonados))
+        ).rowcount
+
+
+class MemoryCartStore:
+    """
+    Carritos en memoria del proceso: sólo sirve con un único worker (o en
+    desarrollo), cada proceso de gunicorn tendría sus propios carritos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._carts = {}
+        self._touched = {}
+
+    def get(self, sid):
+        with self._lock:
+            return dict(self._carts.get(sid, {}))
+
+    def incr(self, sid, cart_id, n=1, max_lineas=CART_MAX_LINES):
+        with self._lock:
+            cart = self._carts.setdefault(sid, {})
+            if cart_id not in cart and len(cart) >= max_lineas:
+                return False
+            cart[cart_id] = cart.get(cart_id, 0) + n
+            self._touched[sid] = time.time()
+            return True
+
+    def decr(self, sid, cart_id, n=1):
+        with self._lock:
+            cart = self._carts.get(sid)
+            if not cart or cart_id not in cart:
+                return
+            if cart[cart_id] > n:
+                cart[cart_id] -= n
+            else:
+                del cart[cart_id]
+            self._touched[sid] = time.time()
+
+    def clear(self, sid):
+        with self._lock:
+            self._carts.pop(sid, None)
+            self._touched.pop(sid, None)
+
+    def purge(self, max_age):
+        limite = time.time() - max_age
+        with self._lock:
+            abandonados = [sid for sid, t in self._touched.items() if t < limite]
+            lineas = 0
+            for sid in abandonados:
+                lineas += len(self._carts.pop(sid, {}))
+                del self._touched[sid]
+        return lineas
+
+
+CART_STORES = {"db": DBCartStore, "memory": MemoryCartStore}
+cart_store = CART_STORES[os.environ.get("CART_STORE", "db")]()
+
+def carrito_sid(crear=False):
+    """
+    Id del carrito de la sesión; con crear=True lo genera si falta. Un carrito
+    heredado de la cookie (session['carrito']) se pasa al store la primera vez.
+    """
+    legado = session.pop("carrito", None)
+    sid = session.get(CART_SESSION_KEY)
+    if sid is None and (crear or legado):
+        sid = session[CART_SESSION_KEY] = uuid4().hex
+    if legado:
+        for cart_id, cantidad in legado.items():
+            if cantidad > 0:
+                cart_store.incr(sid, cart_id, cantidad)
+        db.session.commit()
+    return sid
+
+def get_carrito():
+    """{cart_id: cantidad} del carrito de la sesión actual."""
+    sid = carrito_sid()
+    return cart_store.get(sid) if sid else {}
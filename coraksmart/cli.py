@@ -0,0 +1,177 @@
+"""Comandos de `flask` (`flask --app app <comando>`)."""
+import hashlib
+import json
+import os
+import time
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+
+from .assets import STATIC_FOLDER, ASSETS_BUILD_DIR, construir_assets
+from .cache import catalog_cache, price_cache, aura_level_cache
+from .cart import CART_MAX_AGE, cart_store
+from .extensions import db
+from .helpers import config_cache
+from .images import UPLOAD_FOLDER, IMAGE_EXTENSIONS, IMAGE_VARIANTS_DIR, _variantes_o_vacio
+from .leaderboard import reconstruir_histograma
+from .models import Product
+from .outbox import OUTBOX_BATCH_SIZE, OUTBOX_RETENTION, procesar_outbox, purgar_eventos
+from .rollups import SALES_ROLLUP_BATCH_SIZE, reconstruir_ventas
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Creates the database tables."""
+    db.create_all()
+    print("Initialized the database.")
+
+@click.command("cache-status")
+@with_appcontext
+def cache_status_command():
+    """Prints the state of the in-process caches after loading them."""
+    caches = {"catalog": catalog_cache, "prices": price_cache, "aura_levels": aura_level_cache, "config": config_cache}
+    for cache in caches.values():
+        cache.get()
+    print(json.dumps({name: cache.stats() for name, cache in caches.items()}, indent=2))
+
+@click.command("purge-carts")
+@with_appcontext
+@click.option("--max-age", type=float, default=CART_MAX_AGE, show_default=True,
+              help="Segundos sin actividad tras los que un carrito se considera abandonado.")
+def purge_carts_command(max_age):
+    """Deletes abandoned server-side carts."""
+    lineas = cart_store.purge(max_age)
+    db.session.commit()
+    print(f"Purged {lineas} cart lines.")
+
+@click.command("outbox-worker")
+@with_appcontext
+@click.option("--batch-size", type=int, default=OUTBOX_BATCH_SIZE, show_default=True)
+@click.option("--poll-interval", type=float, default=1.0, show_default=True,
+              help="Segundos de espera cuando no hay eventos pendientes.")
+@click.option("--once", is_flag=True, help="Vacía el outbox y termina.")
+def outbox_worker_command(batch_size, poll_interval, once):
+    """Runs the outbox handlers for pending events."""
+    procesados = 0
+    try:
+        while True:
+            tomados = procesar_outbox(batch_size)
+            procesados += tomados
+            if not tomados:
+                if once:
+                    break
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    print(f"Processed {procesados} outbox events.")
+
+@click.command("purge-outbox")
+@with_appcontext
+@click.option("--max-age", type=float, default=OUTBOX_RETENTION, show_default=True,
+              help="Segundos que se conservan los eventos ya procesados.")
+def purge_outbox_command(max_age):
+    """Deletes processed outbox events older than the retention period."""
+    eventos = purgar_eventos(max_age)
+    db.session.commit()
+    print(f"Purged {eventos} outbox events.")
+
+@click.command("build-image-variants")
+@with_appcontext
+@click.option("--folder", default=UPLOAD_FOLDER, show_default=True, help="Carpeta con las imágenes originales.")
+def build_image_variants_command(folder):
+    """Builds WebP variants for the images in static/ and links them to products."""
+    destino = os.path.join(folder, IMAGE_VARIANTS_DIR)
+    ruta_manifest = os.path.join(destino, "manifest.json")
+    os.makedirs(destino, exist_ok=True)
+    try:
+        with open(ruta_manifest) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = {}
+
+    antes = despues = 0
+    for nombre in sorted(os.listdir(folder)):
+        if not nombre.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(folder, nombre), "rb") as fh:
+            data = fh.read()
+        fuente = hashlib.sha256(data).hexdigest()
+        if manifest.get(nombre, {}).get("source") == fuente:
+            continue  # Sin cambios desde la última corrida.
+        variantes = _variantes_o_vacio(data, nombre)
+        if not variantes:
+            continue
+        for archivo, contenido in variantes.values():
+            with open(os.path.join(destino, archivo), "wb") as fh:
+                fh.write(contenido)
+        antes += len(data)
+        despues += len(variantes["webp"][1])
+        manifest[nombre] = {"source": fuente, **{clave: f"/{IMAGE_VARIANTS_DIR}/{archivo}"
+                                                 for clave, (archivo, _) in variantes.items()}}
+    with open(ruta_manifest, "w") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+
+    # Enlazar las variantes a los productos que usan esas imágenes locales.
+    enlazados = 0
+    for product in Product.query.all():
+        imagenes = [product.imagen, *(product.imagenes_adicionales or [])]
+        variantes = dict(product.imagen_variantes or {})
+        for imagen in imagenes:
+            if not isinstance(imagen, str) or imagen.startswith(("http://", "https://")):
+                continue
+            entrada = manifest.get(os.path.basename(imagen))
+            if entrada:
+                variantes[imagen] = {k: v for k, v in entrada.items() if k != "source"}
+        if variantes != (product.imagen_variantes or {}):
+            product.imagen_variantes = variantes
+            enlazados += 1
+    db.session.commit()
+    print(f"Variants for {len(manifest)} images ({antes} -> {despues} bytes rebuilt); {enlazados} products updated.")
+
+@click.command("build-assets")
+@with_appcontext
+@click.option("--source", default=STATIC_FOLDER, show_default=True)
+@click.option("--output", default=ASSETS_BUILD_DIR, show_default=True)
+def build_assets_command(source, output):
+    """Builds content-hashed, precompressed copies of static/ and their manifest."""
+    manifest = construir_assets(source, output)
+    print(f"Built {len(manifest)} assets into {output}.")
+
+@click.command("rebuild-leaderboard")
+@with_appcontext
+def rebuild_leaderboard_command():
+    """Rebuilds the aura leaderboard histogram from the users table."""
+    distintos = reconstruir_histograma()
+    db.session.commit()
+    print(f"Leaderboard rebuilt: {distintos} distinct point values.")
+
+@click.command("rebuild-sales-rollups")
+@with_appcontext
+@click.option("--batch-size", type=int, default=SALES_ROLLUP_BATCH_SIZE, show_default=True,
+              help="Pedidos leídos y sumados por transacción.")
+def rebuild_sales_rollups_command(batch_size):
+    """Rebuilds the daily sales rollups from the order history."""
+    pedidos = reconstruir_ventas(batch_size)
+    print(f"Sales rollups rebuilt from {pedidos} orders.")
+
+@click.command("hash-password")
+@with_appcontext
+@click.argument("password")
+def hash_password_command(password):
+    """Hashes the given password."""
+    hashed_password = generate_password_hash(password)
+    print("--- Hashed Admin Password ---")
+    print(hashed_password)
+    print("--- End Hashed Admin Password ---")
+    print("\nSet this value as the ADMIN_PASSWORD_HASH environment variable.")
+
+
+COMMANDS = (init_db_command, cache_status_command, purge_carts_command, outbox_worker_command,
+            purge_outbox_command, build_image_variants_command, build_assets_command, rebuild_leaderboard_command,
+            rebuild_sales_rollups_command, hash_password_command)
+
+
+def init_app(app):
+    for command in COMMANDS:
+        app.cli.add_command(command)
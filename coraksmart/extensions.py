@@ -0,0 +1,80 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+class RoutingSession(Session):
+    """
+    Con session.info["leer_de_replica"] (lo fija replica.py en las rutas de
+    solo lectura) los SELECT van a la réplica. Las escrituras, los SELECT ...
+    FOR UPDATE y todo lo que venga después de una escritura en la misma
+    sesión van a la base principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info["escribio"] = True
+            elif (self.info.get("leer_de_replica") and not self.info.get("escribio")
+                  and isinstance(clause, Select) and clause._for_update_arg is None):
+                replica = current_app.extensions.get("replica_engine")
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def upsert(tabla, filas, sumar=(), asignar=(), conn=None):
+    """
+    INSERT de `filas` (dicts) en una sola sentencia; si la clave primaria ya
+    existe suma las columnas de `sumar` y reemplaza las de `asignar`. Con
+    `conn` se ejecuta en esa conexión (p. ej. dentro de un evento de flush).
+    """
+    if not filas:
+        return
+    dialecto = (conn or db.session.get_bind()).dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"upsert no soporta {dialecto}")
+    stmt = insert(tabla)
+    valores = {columna: tabla.c[columna] + stmt.excluded[columna] for columna in sumar}
+    valores.update({columna: stmt.excluded[columna] for columna in asignar})
+    stmt = stmt.on_conflict_do_update(index_elements=[c.name for c in tabla.primary_key], set_=valores)
+    (conn or db.session).execute(stmt, filas)
+
+
+@click.command("db", add_help_option=False,
+               context_settings={"ignore_unknown_options": True, "allow_extra_args": True})
+@with_appcontext
+def migraciones_command():
+    """Perform database migrations."""
+    # Flask-Migrate importa alembic, que es la quinta parte del arranque y
+    # ningún request lo necesita: se carga sólo al correr `flask db ...`.
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as grupo
+
+    app = current_app._get_current_object()
+    if "migrate" not in app.extensions:
+        Migrate(app, db)
+    ctx = click.get_current_context()
+    grupo.main(args=ctx.args, prog_name=ctx.command_path, obj=ctx.obj, standalone_mode=False)
+
+
+def reiniciar_conexiones_tras_fork(app):
+    """
+    Descarta en el worker las conexiones heredadas del proceso maestro
+    (preload_app) para que cada worker abra las suyas.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    if app.extensions.get("replica_engine") is not None:
+        app.extensions["replica_engine"].dispose(close=False)
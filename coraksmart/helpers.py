@@ -0,0 +1,135 @@
+import base64
+import functools
+import json
+import os
+
+from sqlalchemy import select
+
+from .cache import (INTERNAL_CONFIG_PREFIX, CONFIG_VERSION_KEY, EMOJIS_VERSION_KEY, USERS_VERSION_KEY,
+                    VersionedCache, catalog_cache, bundle_cache, price_cache, aura_level_cache)
+from .extensions import db
+from .models import User, Config, Emoji
+
+
+@functools.lru_cache()
+def get_default_config():
+    return {
+        "horarios_atencion": "Lunes a Viernes: 9:00 AM - 6:00 PM",
+        "whatsapp_principal": "5215513361764",
+        "whatsapp_secundario": "5215625877420",
+        "whatsapp_1": "5215513361764",
+        "whatsapp_2": "5215625877420",
+        "whatsapp_3": "",
+        "whatsapp_1_nombre": "Corak",
+        "whatsapp_2_nombre": "Rubadub",
+        "whatsapp_3_nombre": "Terciario"
+    }
+
+def _cargar_config():
+    config_db = Config.query.filter(~Config.key.startswith(INTERNAL_CONFIG_PREFIX, autoescape=True)).all()
+    if not config_db:
+        return get_default_config()
+    return {item.key: item.value for item in config_db}
+
+CONFIG_CACHE_TTL = float(os.environ.get("CONFIG_CACHE_TTL", 60))
+config_cache = VersionedCache(CONFIG_VERSION_KEY, _cargar_config, ttl=CONFIG_CACHE_TTL)
+
+def get_config():
+    """Cargar configuración desde la base de datos (vía caché con TTL)."""
+    return config_cache.get()
+
+def get_productos():
+    """Catálogo de productos (dicts) indexado por id, servido desde la caché."""
+    return catalog_cache.get()
+
+def get_bundles():
+    """Componentes de cada bundle, {bundle_id: {product_id: cantidad}}, desde la caché."""
+    return bundle_cache.get()
+
+def expandir_bundles(carrito, bundles, precios=None):
+    """
+    Unidades por producto base del carrito, con los bundles expandidos en sus
+    componentes. El producto de cada línea sale de la tabla de precios: los
+    ids de producto pueden tener guiones (p. ej. uuid4).
+    """
+    if precios is None:
+        precios = price_cache.get()
+    unidades = {}
+    for cart_id, cantidad in carrito.items():
+        linea = precios.get(cart_id)
+        base_id = linea.base_id if linea is not None else cart_id
+        componentes = bundles.get(base_id)
+        if componentes:
+            for product_id, por_bundle in componentes.items():
+                unidades[product_id] = unidades.get(product_id, 0) + por_bundle * cantidad
+        else:
+            unidades[base_id] = unidades.get(base_id, 0) + cantidad
+    return unidades
+
+def detalle_carrito(carrito, precios=None):
+    if precios is None:
+        precios = price_cache.get()
+    productos_detalle = {}
+    for cart_id in carrito:
+        linea = precios.get(cart_id)
+        if linea is not None:
+            productos_detalle[cart_id] = {
+                "nombre": linea.nombre,
+                "precio": linea.precio,
+                "imagen": linea.imagen
+            }
+    return productos_detalle
+
+def get_aura_level_index():
+    """Tabla compilada de niveles de aura (AuraLevelIndex), servida desde la caché."""
+    return aura_level_cache.get()
+
+def _cargar_emojis():
+    return [e.emoji for e in Emoji.query.order_by(Emoji.id).all()]
+
+def _cargar_emojis_ocupados():
+    return frozenset(db.session.execute(select(User.emoji)).scalars())
+
+emoji_cache = VersionedCache(EMOJIS_VERSION_KEY, _cargar_emojis)
+occupied_emoji_cache = VersionedCache(USERS_VERSION_KEY, _cargar_emojis_ocupados)
+
+def get_emoji_list():
+    """Cargar lista de emojis desde la base de datos (vía caché)."""
+    return emoji_cache.get()
+
+def codificar_cursor(*valores):
+    """Cursor opaco de paginación (base64 de la lista JSON de `valores`)."""
+    return base64.urlsafe_b64encode(json.dumps(valores).encode("utf-8")).decode("ascii")
+
+def decodificar_cursor(cursor, tipos):
+    """
+    Valores de un cursor de codificar_cursor, uno por tipo de `tipos` y de
+    ese tipo. None si el cursor no es válido.
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != len(tipos):
+        return None
+    if not all(isinstance(valor, tipo) for valor, tipo in zip(valores, tipos)):
+        return None
+    return tuple(valores)
+
+def codificar_ocupacion(all_emojis, ocupados, formato):
+    """
+    Ocupación de emojis en el formato pedido: "list" (emojis), "indices"
+    (posiciones en all_emojis) o "bitmap" (base64, bit i = all_emojis[i]).
+    """
+    if formato == "list":
+        en_lista = [e for e in all_emojis if e in ocupados]
+        return {"occupied_emojis": en_lista + sorted(ocupados.difference(all_emojis))}
+    indices = [i for i, e in enumerate(all_emojis) if e in ocupados]
+    if formato == "indices":
+        return {"occupied_indices": indices}
+    bitmap = bytearray((len(all_emojis) + 7) // 8)
+    for i in indices:
+        bitmap[i // 8] |= 1 << (i % 8)
+    return {"occupied_bitmap": base64.b64encode(bytes(bitmap)).decode("ascii")}
+
+EMOJI_OCCUPANCY_FORMATS = ("list", "indices", "bitmap")
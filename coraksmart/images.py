@@ -0,0 +1,103 @@
+# Cada imagen de producto se acompaña de versiones WebP (tamaño completo y
+# reducidas) con el hash del contenido en el nombre, así se pueden cachear
+# para siempre. Se generan al subir y con `flask build-image-variants` para
+# static/. Product.imagen_variantes guarda {url_original: {clave: url}}.
+import hashlib
+import io
+import os
+
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from . import storage
+from .settings import PROJECT_ROOT
+
+UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, "static")
+IMAGE_VARIANT_WIDTHS = {"thumb": 160, "medium": 480}
+IMAGE_WEBP_QUALITY = int(os.environ.get("IMAGE_WEBP_QUALITY", 80))
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg", ".webp")
+IMAGE_VARIANTS_DIR = "variants"
+
+
+def generar_variantes(data, nombre):
+    """
+    Variantes WebP de la imagen `data` (bytes o archivo binario abierto):
+    {clave: (nombre_archivo, bytes)}, con
+    "webp" a tamaño completo y una por ancho de IMAGE_VARIANT_WIDTHS (sin
+    agrandar). Los GIF animados conservan la animación.
+    """
+    from PIL import Image, ImageSequence
+
+    stem = os.path.splitext(secure_filename(nombre))[0] or "imagen"
+    with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as img:
+        animada = getattr(img, "is_animated", False)
+        modo = "RGBA" if "A" in img.getbands() or "transparency" in img.info or img.mode == "P" else "RGB"
+        frames, duraciones = [], []
+        for frame in ImageSequence.Iterator(img) if animada else [img]:
+            frames.append(frame.convert(modo))
+            duraciones.append(frame.info.get("duration", 100))
+        opciones = {"quality": IMAGE_WEBP_QUALITY}
+        if animada:
+            opciones.update(save_all=True, duration=duraciones, loop=img.info.get("loop", 0))
+
+    variantes = {}
+    for clave, ancho in [("webp", None), *IMAGE_VARIANT_WIDTHS.items()]:
+        escalados = frames
+        if ancho is not None and frames[0].width > ancho:
+            alto = max(1, round(frames[0].height * ancho / frames[0].width))
+            escalados = [f.resize((ancho, alto), Image.LANCZOS) for f in frames]
+        buf = io.BytesIO()
+        escalados[0].save(buf, "WEBP", append_images=escalados[1:], **opciones)
+        contenido = buf.getvalue()
+        digest = hashlib.sha256(contenido).hexdigest()[:12]
+        variantes[clave] = (f"{stem}.{clave}.{digest}.webp", contenido)
+    return variantes
+
+def _variantes_o_vacio(data, nombre):
+    try:
+        return generar_variantes(data, nombre)
+    except (OSError, ValueError):
+        current_app.logger.warning("No se pudieron generar variantes de %s", nombre, exc_info=True)
+        return {}
+
+# Opciones de subir() para las variantes: el nombre ya lleva el hash del contenido.
+_OPCIONES_VARIANTE = {"carpeta": IMAGE_VARIANTS_DIR, "conservar_nombre": True}
+
+def _preparar_variantes(file_storage):
+    """
+    Variantes del archivo subido leídas de su stream, que vuelve al inicio
+    para subir el original en streaming. Regresa (claves, [(archivo, opciones)]).
+    """
+    stream = file_storage.stream
+    inicio = stream.tell()
+    variantes = _variantes_o_vacio(stream, file_storage.filename)
+    stream.seek(inicio)
+    return list(variantes), [(FileStorage(io.BytesIO(contenido), filename=archivo, content_type="image/webp"),
+                              _OPCIONES_VARIANTE) for archivo, contenido in variantes.values()]
+
+def subir_imagen_con_variantes(file_storage):
+    """Sube la imagen y sus variantes WebP; regresa (url, {clave: url})."""
+    urls, variantes = subir_galeria_con_variantes([file_storage])
+    return urls[0], variantes.get(urls[0], {})
+
+def subir_galeria_con_variantes(files):
+    """
+    Como subir_galeria_a_supabase, pero regresa (urls, {url: variantes}).
+    Originales y variantes van todos en paralelo en un solo subir_varios.
+    """
+    files = [f for f in files if f and f.filename]
+    preparadas = [_preparar_variantes(f) for f in files]
+    urls = storage.supabase_storage.subir_varios(
+        files + [archivo for _, archivos in preparadas for archivo in archivos])
+    urls_variantes = iter(urls[len(files):])
+    variantes = {url: {clave: next(urls_variantes) for clave in claves}
+                 for url, (claves, _) in zip(urls, preparadas) if claves}
+    return urls[:len(files)], variantes
+
+def miniatura(producto, imagen=None):
+    """URL de la miniatura de `imagen` (por defecto, la principal); sin variantes, la imagen original."""
+    imagen = imagen if imagen is not None else producto.get("imagen")
+    if not imagen:
+        return ""
+    return ((producto.get("imagen_variantes") or {}).get(imagen) or {}).get("thumb") or imagen
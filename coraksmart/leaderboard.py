@@ -0,0 +1,109 @@
+# Leaderboard de aura. El top-N sale del índice ix_user_aura_points (cursor
+# sobre aura_points, emoji) y la posición de cada usuario y los conteos por
+# nivel de AuraScoreCount: cuántos usuarios hay con cada cantidad de puntos.
+# El histograma se ajusta en la misma transacción que cambia los puntos:
+# ajustar_aura llama a registrar_cambios_de_puntos y las altas, bajas y
+# cambios hechos con el ORM pasan por el before_flush de abajo.
+# `flask rebuild-leaderboard` lo recalcula desde cero.
+import collections
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from sqlalchemy import event, select, delete, func, inspect as sa_inspect
+
+from .cache import VersionedCache, LEADERBOARD_VERSION_KEY, renovar_version
+from .extensions import db, upsert
+from .models import User, AuraScoreCount
+
+LEADERBOARD_MAX_LIMIT = 100
+
+
+def registrar_cambios_de_puntos(cambios, session=None, conn=None):
+    """
+    Suma al histograma los cambios {puntos: delta de usuarios} y renueva el
+    sello del leaderboard, dentro de la transacción en curso.
+    """
+    session = session if session is not None else db.session
+    # En orden de puntos: dos transacciones toman los locks en el mismo orden.
+    filas = [{"aura_points": puntos, "usuarios": n} for puntos, n in sorted(cambios.items()) if n]
+    if not filas:
+        return
+    upsert(AuraScoreCount.__table__, filas, sumar=("usuarios",), conn=conn)
+    renovar_version(session, LEADERBOARD_VERSION_KEY, conn=conn)
+
+@event.listens_for(db.session, "before_flush")
+def _contar_usuarios(session, flush_context, instances):
+    """Lleva al histograma las altas, bajas y cambios de aura_points hechos con el ORM."""
+    cambios = collections.Counter()
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, User):
+                cambios[obj.aura_points or 0] += 1
+        for obj in session.deleted:
+            if isinstance(obj, User):
+                cambios[obj.aura_points or 0] -= 1
+        for obj in session.dirty:
+            atributo = sa_inspect(obj).attrs.aura_points if isinstance(obj, User) else None
+            if atributo is not None and atributo.history.has_changes():
+                historia = atributo.load_history()
+                for puntos in historia.deleted:
+                    cambios[puntos or 0] -= 1
+                for puntos in historia.added:
+                    cambios[puntos or 0] += 1
+    if any(cambios.values()):
+        registrar_cambios_de_puntos(cambios, session, conn=session.connection())
+
+def reconstruir_histograma():
+    """Recalcula AuraScoreCount desde la tabla de usuarios; devuelve cuántos puntos distintos hay."""
+    puntos = func.coalesce(User.aura_points, 0)
+    filas = [{"aura_points": p, "usuarios": n}
+             for p, n in db.session.execute(select(puntos, func.count()).group_by(puntos))]
+    db.session.execute(delete(AuraScoreCount))
+    if filas:
+        db.session.execute(AuraScoreCount.__table__.insert(), filas)
+    renovar_version(db.session, LEADERBOARD_VERSION_KEY)
+    return len(filas)
+
+
+class LeaderboardIndex:
+    """
+    Histograma de puntos compilado: los puntos distintos ordenados y cuántos
+    usuarios quedan por debajo de cada uno, para resolver posiciones y conteos
+    por rango de puntos con bisect en O(log n).
+    """
+
+    def __init__(self, conteos):
+        pares = sorted((puntos, n) for puntos, n in conteos if n > 0)
+        self.puntos = [puntos for puntos, _ in pares]
+        # _debajo[i]: usuarios con menos puntos que self.puntos[i].
+        self._debajo = [0, *accumulate(n for _, n in pares)]
+        self.total = self._debajo[-1]
+
+    def __len__(self):
+        return len(self.puntos)
+
+    def posicion(self, puntos):
+        """Lugar (1 = primero) de quien tiene `puntos`; los empates comparten lugar."""
+        return self.total - self._debajo[bisect_right(self.puntos, puntos)] + 1
+
+    def contar_entre(self, desde, hasta):
+        """Usuarios con desde <= puntos < hasta (admite infinitos)."""
+        return self._debajo[bisect_left(self.puntos, hasta)] - self._debajo[bisect_left(self.puntos, desde)]
+
+    def por_nivel(self, niveles):
+        """{level: usuarios} para un AuraLevelIndex, con el mismo criterio que nivel_para."""
+        conteos = {level["level"]: 0 for level in niveles.levels}
+        limites = [*niveles.thresholds, float("inf")]
+        for i, level in enumerate(niveles.levels):
+            conteos[level["level"]] += self.contar_entre(limites[i], limites[i + 1])
+        # Sin umbral alcanzado cuenta en el nivel por defecto.
+        debajo = self.contar_entre(-float("inf"), limites[0])
+        if debajo and len(niveles):
+            conteos[niveles.nivel_para(-float("inf"))["level"]] += debajo
+        return conteos
+
+def _compilar_leaderboard():
+    return LeaderboardIndex(db.session.execute(
+        select(AuraScoreCount.aura_points, AuraScoreCount.usuarios).where(AuraScoreCount.usuarios > 0)).all())
+
+leaderboard_cache = VersionedCache(LEADERBOARD_VERSION_KEY, _compilar_leaderboard)
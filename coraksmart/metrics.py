@@ -0,0 +1,84 @@
+# Con PROMETHEUS_MULTIPROC_DIR (lo fija gunicorn.conf.py) cada worker escribe
+# sus valores en ese directorio y /metrics los agrega entre procesos.
+import os
+import time
+
+from flask import request, jsonify, g, has_request_context
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+# Opción de ejecución para las sentencias internas (p. ej. la medición del
+# retraso de la réplica o la reserva de números de pedido) que no cuentan como
+# SQL del request ni para su presupuesto.
+SIN_REGISTRO = "coraksmart_sin_registro"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram("coraksmart_request_duration_seconds", "Latencia por endpoint.",
+                            ["endpoint", "method"], buckets=LATENCY_BUCKETS)
+REQUESTS = Counter("coraksmart_requests_total", "Requests por endpoint y status.",
+                   ["endpoint", "method", "status"])
+SQL_STATEMENTS = Histogram("coraksmart_sql_statements_per_request", "Sentencias SQL por request.",
+                           ["endpoint"], buckets=(0, 1, 2, 3, 4, 6, 8, 12, 20, 50, 100))
+DB_TIME = Histogram("coraksmart_db_seconds_per_request", "Tiempo total en la base de datos por request.",
+                    ["endpoint"], buckets=LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram("coraksmart_response_size_bytes", "Tamaño de la respuesta por endpoint.",
+                          ["endpoint"], buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576))
+READ_ROUTING = Counter("coraksmart_read_routing_total", "Requests de solo lectura por base elegida.", ["target"])
+CACHE_LOOKUPS = Counter("coraksmart_cache_lookups_total", "Consultas a cachés en memoria.", ["cache", "result"])
+HASH_QUEUE_TIME = Histogram("coraksmart_password_hash_queue_seconds", "Espera en cola del pool de hashes.",
+                            buckets=LATENCY_BUCKETS)
+HASH_TIME = Histogram("coraksmart_password_hash_seconds", "Duración de cada hash de contraseña.",
+                      buckets=LATENCY_BUCKETS)
+HASH_REJECTED = Counter("coraksmart_password_hash_rejected_total", "Hashes rechazados por falta de capacidad.")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _inicio_sql(conn, cursor, statement, parameters, context, executemany):
+    if conn.get_execution_options().get(SIN_REGISTRO):
+        return
+    conn.info.setdefault("_sql_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _fin_sql(conn, cursor, statement, parameters, context, executemany):
+    if conn.get_execution_options().get(SIN_REGISTRO):
+        return
+    elapsed = time.perf_counter() - conn.info["_sql_start"].pop()
+    if has_request_context():
+        g._sql_count = g.get("_sql_count", 0) + 1
+        g._sql_time = g.get("_sql_time", 0.0) + elapsed
+
+def _iniciar_metricas():
+    g._request_start = time.perf_counter()
+
+def _registrar_metricas(response):
+    start = g.pop("_request_start", None)
+    if start is None:
+        return response
+    # Sin el prefijo del blueprint: las series conservan los nombres de siempre.
+    endpoint = (request.endpoint or "unmatched").rpartition(".")[2]
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    SQL_STATEMENTS.labels(endpoint).observe(g.get("_sql_count", 0))
+    DB_TIME.labels(endpoint).observe(g.get("_sql_time", 0.0))
+    size = response.calculate_content_length()
+    if size is not None:
+        RESPONSE_SIZE.labels(endpoint).observe(size)
+    return response
+
+def metrics():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"error": "Not authorized"}), 401
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+
+def init_app(app):
+    app.before_request(_iniciar_metricas)
+    app.after_request(_registrar_metricas)
+    app.add_url_rule("/metrics", view_func=metrics)
@@ -0,0 +1,203 @@
+import json
+
+from sqlalchemy import event, false, select, inspect as sa_inspect
+from sqlalchemy.types import JSON
+
+from .extensions import db
+
+
+class Product(db.Model):
+    id = db.Column(db.String, primary_key=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    descripcion = db.Column(db.Text)
+    precio = db.Column(db.Float)
+    stock = db.Column(db.Integer)
+    imagen = db.Column(db.String(512))
+    whatsapp_asignado = db.Column(db.String(10), default='1')
+    orden = db.Column(db.Integer, default=999)
+    promocion = db.Column(db.Boolean, default=False)
+    variaciones = db.Column(JSON)
+    bundle_items = db.Column(JSON)
+    bundle_precio = db.Column(db.Float)
+    imagenes_adicionales = db.Column(JSON)
+    # {url_imagen: {"webp": url, "thumb": url, "medium": url}} (ver IMAGE VARIANTS).
+    imagen_variantes = db.Column(JSON)
+    aura_multiplier = db.Column(db.Float, default=1.0)
+
+    # Espejo normalizado de bundle_items, mantenido al guardar (ver BundleItem).
+    bundle_members = db.relationship("BundleItem", cascade="all, delete-orphan", lazy="select")
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+class User(db.Model):
+    emoji = db.Column(db.String(10), primary_key=True)
+    password_hash = db.Column(db.String(256))
+    aura_points = db.Column(db.Integer, default=0)
+    claimed_levels = db.Column(JSON, default=list)
+    reward_codes = db.Column(JSON, default=dict)
+    # Se incrementa en cada cambio de claimed_levels/reward_codes (compare-and-swap).
+    rewards_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Orden del leaderboard: puntos y emoji de desempate, ambos descendentes.
+        db.Index("ix_user_aura_points", "aura_points", "emoji"),
+    )
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+class Order(db.Model):
+    id = db.Column(db.String(100), primary_key=True)
+    user_emoji = db.Column(db.String(10), db.ForeignKey('user.emoji'))
+    timestamp = db.Column(db.String(100))
+    detalle = db.Column(JSON)
+    detalle_completo = db.Column(JSON)
+    total = db.Column(db.Float)
+    aura_ganada = db.Column(db.Integer)
+    aura_potencial = db.Column(db.Integer)
+    aura_otorgada = db.Column(db.Integer)
+    delivery_info = db.Column(JSON)
+    completado = db.Column(db.Boolean, default=False)
+    whatsapp_usado = db.Column(JSON)
+    # Qué parte del pedido ya está sumada en los rollups de ventas (ver rollups.py).
+    ventas_registradas = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
+    ventas_completado = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
+
+    # Listado admin paginado por (timestamp, id), con y sin filtros.
+    __table_args__ = (
+        db.Index("ix_order_timestamp_id", "timestamp", "id"),
+        db.Index("ix_order_completado_timestamp_id", "completado", "timestamp", "id"),
+        db.Index("ix_order_user_emoji_timestamp_id", "user_emoji", "timestamp", "id"),
+    )
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+class Config(db.Model):
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Text)
+
+class AuraLevel(db.Model):
+    level = db.Column(db.Integer, primary_key=True)
+    points_needed = db.Column(db.Float, nullable=False)
+    flame_color = db.Column(db.String(50))
+    name = db.Column(db.String(100))
+    prize = db.Column(db.String(255))
+    character_size = db.Column(db.Integer)
+
+    def to_dict(self):
+        d = {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        if d.get('points_needed') == -float('inf'):
+             d['points_needed'] = "-Infinity"
+        return d
+
+class Emoji(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    emoji = db.Column(db.String(10), unique=True, nullable=False)
+
+
+class BundleItem(db.Model):
+    """Pertenencia normalizada (bundle_id, product_id) de Product.bundle_items."""
+    bundle_id = db.Column(db.String, db.ForeignKey('product.id', ondelete="CASCADE"), primary_key=True)
+    product_id = db.Column(db.String, primary_key=True, index=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=1)
+
+class CartLine(db.Model):
+    """Una línea del carrito del lado del servidor: (cart_sid, cart_id) -> cantidad."""
+    cart_sid = db.Column(db.String(32), primary_key=True)
+    cart_id = db.Column(db.String(150), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.Float, nullable=False, index=True)
+
+
+class AuraScoreCount(db.Model):
+    """Usuarios con exactamente `aura_points` puntos, mantenido al cambiar los puntos (ver leaderboard.py)."""
+    aura_points = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    usuarios = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SalesByProductDay(db.Model):
+    """Ventas de un día por producto y variación ("" sin variación), por fecha del pedido."""
+    dia = db.Column(db.String(10), primary_key=True)
+    product_id = db.Column(db.String, primary_key=True)
+    variacion = db.Column(db.String(100), primary_key=True)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    importe = db.Column(db.Float, nullable=False, default=0)
+    pedidos_completados = db.Column(db.Integer, nullable=False, default=0)
+    unidades_completadas = db.Column(db.Integer, nullable=False, default=0)
+    importe_completado = db.Column(db.Float, nullable=False, default=0)
+
+class SalesByWhatsappDay(db.Model):
+    """Ventas de un día por número de WhatsApp al que se envió el pedido."""
+    dia = db.Column(db.String(10), primary_key=True)
+    whatsapp = db.Column(db.String(10), primary_key=True)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    importe = db.Column(db.Float, nullable=False, default=0)
+    pedidos_completados = db.Column(db.Integer, nullable=False, default=0)
+    unidades_completadas = db.Column(db.Integer, nullable=False, default=0)
+    importe_completado = db.Column(db.Float, nullable=False, default=0)
+
+
+class OutboxEvent(db.Model):
+    """Efecto secundario pendiente, escrito en la misma transacción que lo origina (ver OUTBOX)."""
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    payload = db.Column(JSON)
+    created_at = db.Column(db.Float, nullable=False)
+    available_at = db.Column(db.Float, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    processed_at = db.Column(db.Float)
+    last_error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index("ix_outbox_event_pending", "processed_at", "available_at", "id"),
+    )
+
+
+# --- BUNDLE MEMBERSHIP ---
+
+def parse_bundle_items(bundle_items):
+    """
+    Normaliza bundle_items a {product_id: cantidad}. Acepta la lista de ids
+    (repetidos suman cantidad), un dict {id: cantidad} y el mismo contenido
+    guardado como texto JSON. Los datos mal formados dan un dict vacío.
+    """
+    if isinstance(bundle_items, str):
+        try:
+            bundle_items = json.loads(bundle_items)
+        except json.JSONDecodeError:
+            return {}
+    componentes = {}
+    if isinstance(bundle_items, dict):
+        for product_id, cantidad in bundle_items.items():
+            componentes[str(product_id)] = cantidad if isinstance(cantidad, int) and cantidad > 0 else 1
+    elif isinstance(bundle_items, list):
+        for product_id in bundle_items:
+            if isinstance(product_id, (str, int)):
+                componentes[str(product_id)] = componentes.get(str(product_id), 0) + 1
+    return componentes
+
+@event.listens_for(db.session, "before_flush")
+def _sincronizar_bundles(session, flush_context, instances):
+    """Reescribe las filas BundleItem de los productos cuyo bundle_items cambió."""
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, Product):
+                continue
+            if obj not in session.new and not sa_inspect(obj).attrs.bundle_items.history.has_changes():
+                continue
+            componentes = parse_bundle_items(obj.bundle_items)
+            obj.bundle_members = [BundleItem(product_id=product_id, cantidad=cantidad)
+                                  for product_id, cantidad in componentes.items()]
+
+def bundles_que_contienen(product_id):
+    """Nombres de los bundles que incluyen `product_id` (consulta indexada)."""
+    return db.session.execute(
+        select(Product.nombre)
+        .join(BundleItem, BundleItem.bundle_id == Product.id)
+        .where(BundleItem.product_id == product_id)
+        .order_by(Product.nombre)
+    ).scalars().all()
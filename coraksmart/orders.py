@@ -0,0 +1,162 @@
+import os
+import random
+import string
+import threading
+from datetime import datetime
+
+from sqlalchemy import select, update, insert, func, case, or_
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .helpers import get_config
+from .metrics import SIN_REGISTRO
+from .models import Product, Order, Config
+
+
+def codificar_numero(numero):
+    if not isinstance(numero, int) or numero < 0: return str(numero)
+    letras = string.ascii_uppercase
+    indice_letra = numero % 26
+    letra_codificada = letras[indice_letra]
+    numero_ciclo = numero // 26
+    return f"{letra_codificada}{numero_ciclo}" if numero_ciclo > 0 else letra_codificada
+
+ORDER_SEQUENCE_KEY = "_order_seq"
+ORDER_SEQUENCE_BLOCK = int(os.environ.get("ORDER_SEQUENCE_BLOCK", 20))
+
+class OrderSequence:
+    """
+    Reparte números de pedido consecutivos sin contar la tabla de pedidos.
+
+    Cada proceso reserva un bloque de números con un compare-and-swap sobre
+    un contador en Config y lo consume en memoria; dos workers nunca reciben
+    el mismo número, aunque los números de workers distintos se intercalan.
+    Reservar usa una conexión propia del pool: conviene llamar a next() antes
+    de que db.session tome la suya (ver procesar_pedido).
+    """
+
+    def __init__(self, key=ORDER_SEQUENCE_KEY, block_size=ORDER_SEQUENCE_BLOCK, max_attempts=10):
+        self.key = key
+        self.block_size = block_size
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._next = 0
+        self._limit = 0
+
+    def next(self):
+        with self._lock:
+            numero = self._tomar()
+        if numero is not None:
+            return numero
+        # La conexión se pide antes del lock: quien lo tiene ya no espera al
+        # pool, que pueden estar ocupando los hilos que esperan el lock. Una
+        # reserva cada block_size pedidos no cuenta para el presupuesto de la ruta.
+        with db.engine.connect().execution_options(**{SIN_REGISTRO: True}) as conn, self._lock:
+            numero = self._tomar()
+            if numero is None:
+                self._next, self._limit = self._reservar_bloque(conn)
+                numero = self._tomar()
+            return numero
+
+    def _tomar(self):
+        """Siguiente número del bloque en memoria o None si se agotó. Con el lock tomado."""
+        if self._pid != os.getpid():
+            # Un bloque heredado por fork se descarta para no repetir números.
+            self._reset()
+        if self._next >= self._limit:
+            return None
+        numero = self._next
+        self._next += 1
+        return numero
+
+    def _reservar_bloque(self, conn):
+        for _ in range(self.max_attempts):
+            try:
+                with conn.begin():
+                    actual = conn.execute(select(Config.value).where(Config.key == self.key)).scalar()
+                    if actual is None:
+                        # Primera vez: se continúa la numeración que daba el conteo.
+                        inicio = conn.execute(select(func.count()).select_from(Order)).scalar()
+                        conn.execute(insert(Config).values(key=self.key, value=str(inicio + self.block_size)))
+                        return inicio, inicio + self.block_size
+                    inicio = int(actual)
+                    reservado = conn.execute(
+                        update(Config)
+                        .where(Config.key == self.key, Config.value == actual)
+                        .values(value=str(inicio + self.block_size))
+                    ).rowcount
+                    if reservado:
+                        return inicio, inicio + self.block_size
+            except IntegrityError:
+                continue
+        raise RuntimeError("No se pudo reservar un bloque de números de pedido.")
+
+order_sequence = OrderSequence()
+
+def generar_id_pedido():
+    now = datetime.now()
+    parte_fecha = f"{codificar_numero(now.day - 1)}{codificar_numero(now.month - 1)}{now.strftime('%y')}"
+    parte_hora = f"{codificar_numero(now.hour)}{codificar_numero(now.minute)}{codificar_numero(now.second)}"
+    parte_pedido = codificar_numero(100 + order_sequence.next())
+    sello_aleatorio = "".join(random.choices(string.ascii_uppercase + string.digits, k=3))
+    return f"{parte_fecha}-{parte_hora}-{parte_pedido}-{sello_aleatorio}"
+
+def generar_codigo_recompensa():
+    return "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
+
+def crear_mensaje_pedido(pedido, detalle_completo):
+    delivery_info = pedido.get("delivery_info", {})
+    mensaje_partes = [f"¡Que onda! 🛒", f"*Pedido #{pedido['id']}*"]
+    for cart_id, info in detalle_completo.items():
+        mensaje_partes.append(f"• {info['cantidad']}x {info['nombre']}")
+    mensaje_partes.extend([f"*Total: ${pedido['total']:.2f}*",
+                           f"📅 *Horario:* {delivery_info.get('day', 'N/A')} a las {delivery_info.get('time', 'N/A')}"])
+    if delivery_info.get('station'): mensaje_partes.append(f"📍 *Zona:* {delivery_info.get('station', 'N/A')}")
+    if delivery_info.get('instructions'): mensaje_partes.append(f"📝 *Notas:* {delivery_info['instructions']}")
+    if delivery_info.get('phone'): mensaje_partes.append(f"📱 *Teléfono:* {delivery_info['phone']}")
+    return "\n".join(mensaje_partes)
+
+def determinar_whatsapp_destino(whatsapp_counts):
+    """Número de WhatsApp con más unidades del pedido (whatsapp_counts de cotizar_carrito)."""
+    CONFIG = get_config()
+    max_whatsapp = max(whatsapp_counts, key=whatsapp_counts.get)
+    whatsapp_map = {
+        "1": CONFIG.get('whatsapp_1'), "2": CONFIG.get('whatsapp_2'), "3": CONFIG.get('whatsapp_3')
+    }
+    whatsapp_numero = whatsapp_map.get(max_whatsapp) or CONFIG.get('whatsapp_principal')
+    return whatsapp_numero, max_whatsapp
+
+
+# --- STOCK RESERVATION ---
+# El stock se descuenta en la transacción del pedido con un UPDATE
+# condicional: sólo se bloquean las filas de los productos del pedido y el
+# pedido entero falla si a alguna línea no le alcanza. stock NULL = sin límite.
+# El stock del catálogo en caché es informativo; estos UPDATE no lo invalidan.
+
+def reservar_stock(unidades):
+    """
+    Descuenta {product_id: unidades} de Product.stock. Devuelve los ids sin
+    stock suficiente; si no está vacío, el caller debe hacer rollback.
+    """
+    pedido = {product_id: n for product_id, n in unidades.items() if n > 0}
+    if not pedido:
+        return []
+    productos = Product.__table__
+    ids = sorted(pedido)
+    # Bloquear en orden de id evita deadlocks entre pedidos que comparten productos.
+    db.session.execute(
+        select(productos.c.id).where(productos.c.id.in_(ids)).order_by(productos.c.id).with_for_update()
+    )
+    cantidad = case(pedido, value=productos.c.id)
+    reservados = db.session.execute(
+        update(productos)
+        .where(productos.c.id.in_(ids), or_(productos.c.stock.is_(None), productos.c.stock >= cantidad))
+        .values(stock=productos.c.stock - cantidad)
+        .returning(productos.c.id)
+    ).scalars().all()
+    return sorted(set(ids).difference(reservados))
+
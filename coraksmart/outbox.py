@@ -0,0 +1,130 @@
+# Los efectos secundarios (notificaciones, agregados, recibos) se guardan como
+# OutboxEvent en la transacción del cambio que los origina y los ejecuta
+# `flask outbox-worker` fuera del request. Si la transacción se revierte el
+# evento tampoco existe; si un handler falla, el evento se reintenta.
+import collections
+import os
+import time
+
+from flask import current_app
+from sqlalchemy import event, select, insert, update, delete, and_
+
+from .extensions import db
+from .models import Order, OutboxEvent
+from .orders import crear_mensaje_pedido
+
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+# Segundos que un worker se reserva un lote antes de que otro pueda tomarlo.
+OUTBOX_LEASE = float(os.environ.get("OUTBOX_LEASE", 300))
+# Segundos que se conservan los eventos ya procesados (`flask purge-outbox`).
+OUTBOX_RETENTION = float(os.environ.get("OUTBOX_RETENTION", 7 * 24 * 3600))
+ORDER_WEBHOOK_URL = os.environ.get("ORDER_WEBHOOK_URL")
+
+_outbox_handlers = collections.defaultdict(list)
+
+def outbox_handler(topic):
+    """Registra la función como handler de los eventos `topic`; recibe el payload."""
+    def decorator(fn):
+        _outbox_handlers[topic].append(fn)
+        return fn
+    return decorator
+
+def emitir_evento(topic, payload):
+    """
+    Encola el evento en la transacción de db.session: se guarda con el
+    próximo commit del caller y desaparece si se revierte.
+    """
+    sesion = db.session()
+    if not sesion.in_transaction():
+        sesion.begin()
+    ahora = time.time()
+    sesion.info.setdefault("eventos_pendientes", []).append(
+        {"topic": topic, "payload": payload, "created_at": ahora, "available_at": ahora, "attempts": 0})
+
+@event.listens_for(db.session, "before_commit")
+def _guardar_eventos(session):
+    # Todos los eventos de la transacción en un solo INSERT de varias filas.
+    eventos = session.info.pop("eventos_pendientes", None)
+    if eventos:
+        session.execute(insert(OutboxEvent), eventos)
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _descartar_eventos(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop("eventos_pendientes", None)
+
+def reclamar_eventos(limite=OUTBOX_BATCH_SIZE):
+    """
+    Reserva hasta `limite` eventos pendientes por OUTBOX_LEASE segundos y los
+    devuelve. En Postgres los workers concurrentes se saltan las filas ya
+    bloqueadas (SKIP LOCKED); en SQLite las escrituras ya van en serie.
+    """
+    ahora = time.time()
+    pendiente = and_(OutboxEvent.processed_at.is_(None), OutboxEvent.available_at <= ahora,
+                     OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS)
+    ids = (
+        select(OutboxEvent.id).where(pendiente)
+        .order_by(OutboxEvent.id).limit(limite)
+        .with_for_update(skip_locked=True)
+    )
+    eventos = db.session.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(ids), pendiente)
+        .values(available_at=ahora + OUTBOX_LEASE)
+        .returning(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload, OutboxEvent.attempts)
+    ).all()
+    db.session.commit()
+    return sorted(eventos)
+
+def procesar_outbox(limite=OUTBOX_BATCH_SIZE):
+    """Ejecuta un lote de eventos, cada uno en su propia transacción. Devuelve cuántos tomó."""
+    eventos = reclamar_eventos(limite)
+    for event_id, topic, payload, attempts in eventos:
+        try:
+            for handler in _outbox_handlers.get(topic, ()):
+                handler(payload)
+            marcado = db.session.execute(
+                update(OutboxEvent).where(OutboxEvent.id == event_id, OutboxEvent.processed_at.is_(None))
+                .values(processed_at=time.time(), last_error=None)
+            ).rowcount
+            if not marcado:
+                # Otro worker lo tomó al vencer el lease y ya lo terminó: se
+                # descarta lo hecho aquí para no aplicarlo dos veces.
+                db.session.rollback()
+                continue
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            current_app.logger.exception("Falló el evento %s (%s)", event_id, topic)
+            db.session.execute(
+                update(OutboxEvent).where(OutboxEvent.id == event_id)
+                .values(attempts=attempts + 1, last_error=repr(exc)[:1000],
+                        available_at=time.time() + min(2 ** attempts, 3600))
+            )
+            db.session.commit()
+    return len(eventos)
+
+def purgar_eventos(max_age=OUTBOX_RETENTION):
+    """
+    Borra los eventos procesados hace más de max_age segundos. Los que
+    agotaron sus intentos se conservan con su last_error. Devuelve cuántos borró.
+    """
+    return db.session.execute(
+        delete(OutboxEvent).where(OutboxEvent.processed_at < time.time() - max_age)
+    ).rowcount
+
+@outbox_handler("pedido_creado")
+def notificar_pedido(payload):
+    """Avisa del pedido nuevo al webhook ORDER_WEBHOOK_URL, con el recibo ya renderizado."""
+    if not ORDER_WEBHOOK_URL:
+        return
+    import requests
+
+    order = db.session.get(Order, payload["order_id"])
+    if order is None:
+        return
+    recibo = crear_mensaje_pedido(order.to_dict(), order.detalle_completo or {})
+    respuesta = requests.post(ORDER_WEBHOOK_URL, json=dict(payload, recibo=recibo), timeout=10)
+    respuesta.raise_for_status()
+
@@ -0,0 +1,141 @@
+# QUERY_BUDGET_MODE: "off", "header" (agrega X-Query-* a cada respuesta) o
+# "raise" (falla el request que excede el presupuesto declarado por su ruta).
+import collections
+import threading
+
+from flask import current_app, request, g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import SIN_REGISTRO
+
+N_PLUS_ONE_THRESHOLD = 3
+
+_query_recorders = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """Un bloque o una ruta ejecutó más sentencias SQL de las declaradas."""
+
+
+class QueryRecorder:
+    """
+    Registra las sentencias SQL que ejecuta el hilo actual mientras está
+    activo. Las sentencias con el mismo texto repetidas `n_plus_one_threshold`
+    veces o más (mismo SQL, otros parámetros) se reportan como posible N+1.
+    Si una caché se recarga mientras está activo (en_frio), el presupuesto
+    pasa a ser `budget_frio`, cuando lo hay.
+    """
+
+    def __init__(self, budget=None, label=None, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD, budget_frio=None):
+        self.budget = budget
+        self.budget_frio = budget_frio
+        self.en_frio = False
+        self.label = label
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statements = []
+
+    def __enter__(self):
+        if not hasattr(_query_recorders, "stack"):
+            _query_recorders.stack = []
+        _query_recorders.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        if exc_type is None:
+            self.check()
+        return False
+
+    def stop(self):
+        stack = getattr(_query_recorders, "stack", [])
+        if self in stack:
+            stack.remove(self)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def presupuesto(self):
+        """Presupuesto que aplica: el de en frío si se recargó alguna caché."""
+        if self.en_frio and self.budget_frio is not None:
+            return self.budget_frio
+        return self.budget
+
+    @property
+    def exceeded(self):
+        return self.presupuesto is not None and self.count > self.presupuesto
+
+    def repeated(self):
+        """Sentencias repetidas como lista de (sql, veces), de la más repetida a la menos."""
+        counts = collections.Counter(self.statements)
+        return [(sql, n) for sql, n in counts.most_common() if n >= self.n_plus_one_threshold]
+
+    def check(self):
+        if self.exceeded:
+            detalle = "; ".join(f"{n}x {sql[:80]}" for sql, n in self.repeated()[:3])
+            raise QueryBudgetExceeded(
+                f"{self.label or 'bloque'}: {self.count} sentencias SQL, presupuesto {self.presupuesto}"
+                + (" (en frío)" if self.presupuesto != self.budget else "")
+                + (f" (repetidas: {detalle})" if detalle else "")
+            )
+
+
+def query_budget(max_queries, en_frio=None):
+    """
+    Declara cuántas sentencias SQL puede ejecutar una ruta (ver
+    QUERY_BUDGET_MODE) con las cachés calientes y, con `en_frio`, cuántas
+    en los requests que recargan alguna caché.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.query_budget_frio = en_frio
+        return view
+    return decorator
+
+def marcar_en_frio():
+    """Avisa a los recorders activos del hilo que se está recargando una caché."""
+    for recorder in getattr(_query_recorders, "stack", ()):
+        recorder.en_frio = True
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _registrar_sentencia(conn, cursor, statement, parameters, context, executemany):
+    if conn.get_execution_options().get(SIN_REGISTRO):
+        return
+    for recorder in getattr(_query_recorders, "stack", ()):
+        recorder.statements.append(statement)
+
+def _iniciar_presupuesto():
+    if current_app.config['QUERY_BUDGET_MODE'] == "off":
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    g._query_recorder = QueryRecorder(getattr(view, "query_budget", None), label=request.endpoint,
+                                      budget_frio=getattr(view, "query_budget_frio", None)).__enter__()
+
+def _revisar_presupuesto(response):
+    recorder = g.pop("_query_recorder", None)
+    if recorder is None:
+        return response
+    recorder.stop()
+    repeated = recorder.repeated()
+    response.headers["X-Query-Count"] = str(recorder.count)
+    if recorder.presupuesto is not None:
+        response.headers["X-Query-Budget"] = str(recorder.presupuesto)
+    if repeated:
+        response.headers["X-Query-Repeated"] = str(len(repeated))
+        current_app.logger.warning("Posible N+1 en %s: %s", request.endpoint,
+                                   "; ".join(f"{n}x {sql[:120]}" for sql, n in repeated))
+    if current_app.config['QUERY_BUDGET_MODE'] == "raise":
+        recorder.check()
+    return response
+
+def _descartar_presupuesto(exc):
+    recorder = g.pop("_query_recorder", None)
+    if recorder is not None:
+        recorder.stop()
+
+def init_app(app):
+    app.before_request(_iniciar_presupuesto)
+    app.after_request(_revisar_presupuesto)
+    app.teardown_request(_descartar_presupuesto)
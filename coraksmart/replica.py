@@ -0,0 +1,110 @@
+# Con DATABASE_REPLICA_URL las rutas marcadas con @solo_lectura leen de la
+# réplica (RoutingSession en extensions.py). Se lee de la principal si la
+# réplica no responde o va más de REPLICA_MAX_LAG segundos atrás, y durante
+# READ_YOUR_WRITES_WINDOW segundos (y hasta el doble) después de que el cliente
+# escribió algo, para que vea sus propios cambios (checkout, carrito, recompensas).
+import threading
+import time
+
+from flask import current_app, request, session
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .extensions import db
+from .metrics import READ_ROUTING, SIN_REGISTRO
+from .settings import engine_options
+
+PRINCIPAL_HASTA_KEY = "_principal_hasta"
+
+# Postgres en standby: segundos desde la última transacción aplicada, 0 si ya
+# aplicó todo lo recibido. En una base que no es standby ambas LSN son NULL.
+PG_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def solo_lectura(view):
+    """Marca la ruta como de solo lectura: puede leer de la réplica."""
+    view.solo_lectura = True
+    return view
+
+
+class ReplicaMonitor:
+    """
+    Retraso de la réplica, medido a lo más cada `interval` segundos por
+    proceso. Si la réplica no responde el retraso es infinito hasta la
+    siguiente medición.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._lag = None
+        self._checked_at = None
+
+    def medir(self, engine):
+        # Corre dentro de un request, pero no es SQL de la ruta: no cuenta para su presupuesto.
+        with engine.connect().execution_options(**{SIN_REGISTRO: True}) as conn:
+            if engine.dialect.name == "postgresql":
+                return float(conn.execute(PG_REPLICA_LAG_SQL).scalar() or 0)
+            # Sin forma de medir el retraso: basta con que responda.
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def retraso(self, engine):
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.interval:
+                return self._lag
+        try:
+            lag = self.medir(engine)
+        except SQLAlchemyError:
+            current_app.logger.warning("La réplica no responde; se lee de la principal.", exc_info=True)
+            lag = float("inf")
+        with self._lock:
+            self._lag, self._checked_at = lag, now
+        return lag
+
+
+def _elegir_base():
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, "solo_lectura", False):
+        return
+    engine = current_app.extensions["replica_engine"]
+    if engine is None:
+        return
+    if time.time() < session.get(PRINCIPAL_HASTA_KEY, 0):
+        READ_ROUTING.labels("primary_sticky").inc()
+        return
+    if current_app.extensions["replica_monitor"].retraso(engine) > current_app.config["REPLICA_MAX_LAG"]:
+        READ_ROUTING.labels("primary_lag").inc()
+        return
+    READ_ROUTING.labels("replica").inc()
+    db.session.info["leer_de_replica"] = True
+
+def _recordar_escritura(response):
+    if current_app.extensions["replica_engine"] is not None and db.session.info.get("escribio"):
+        # La cookie guarda hasta cuándo leer de la principal, con dos ventanas
+        # de margen: sólo se vuelve a firmar y enviar cuando queda menos de
+        # una, no en cada escritura.
+        ventana = current_app.config["READ_YOUR_WRITES_WINDOW"]
+        ahora = time.time()
+        if session.get(PRINCIPAL_HASTA_KEY, 0) - ahora < ventana:
+            session[PRINCIPAL_HASTA_KEY] = ahora + 2 * ventana
+    return response
+
+def _olvidar_base(exc):
+    # Una sesión puede durar más que el request (p. ej. en un app_context de los tests).
+    db.session.info.pop("leer_de_replica", None)
+    db.session.info.pop("escribio", None)
+
+def init_app(app):
+    # Engine propio y no un bind de SQLALCHEMY_BINDS: los modelos no tienen
+    # bind_key y create_all/drop_all no deben tocar la réplica.
+    uri = app.config.get("REPLICA_DATABASE_URI")
+    app.extensions["replica_engine"] = create_engine(uri, **engine_options(uri)) if uri else None
+    app.extensions["replica_monitor"] = ReplicaMonitor(app.config["REPLICA_LAG_CHECK_INTERVAL"])
+    app.before_request(_elegir_base)
+    app.after_request(_recordar_escritura)
+    app.teardown_request(_olvidar_base)
@@ -0,0 +1,211 @@
+# Rollups de ventas por día: SalesByProductDay (día × producto × variación)
+# y SalesByWhatsappDay (día × número de WhatsApp). Los suma el outbox-worker
+# con el evento SALES_ROLLUP_TOPIC, que emiten el checkout y el completado de
+# pedidos, así el checkout y el panel no compiten por las mismas filas. Borrar
+# un pedido lo resta en la misma transacción (quitar_pedido). Los reportes de
+# admin leen sólo estas tablas. `flask rebuild-sales-rollups` los recalcula.
+import os
+
+from sqlalchemy import select, update, delete, func
+
+from .cache import WHATSAPP_SLOTS, cotizar_carrito, price_cache
+from .extensions import db, upsert
+from .models import Order, SalesByProductDay, SalesByWhatsappDay
+from .orders import determinar_whatsapp_destino
+from .outbox import emitir_evento, outbox_handler
+
+SALES_ROLLUP_BATCH_SIZE = int(os.environ.get("SALES_ROLLUP_BATCH_SIZE", 500))
+# Tópico propio: si falla otro handler (p. ej. el webhook de pedido_creado)
+# los rollups no se quedan sin actualizar, ni se reenvía el webhook si fallan ellos.
+SALES_ROLLUP_TOPIC = "rollup_ventas"
+SALES_METRICS = ("pedidos", "unidades", "importe", "pedidos_completados", "unidades_completadas",
+                 "importe_completado")
+
+_pedidos = Order.__table__
+_COLUMNAS = (_pedidos.c.id, _pedidos.c.timestamp, _pedidos.c.detalle, _pedidos.c.detalle_completo,
+             _pedidos.c.total, _pedidos.c.whatsapp_usado)
+
+
+def _slot(pedido):
+    """Número de WhatsApp del pedido; los anteriores a whatsapp_usado se recalculan con el catálogo actual."""
+    if pedido.whatsapp_usado in WHATSAPP_SLOTS:
+        return pedido.whatsapp_usado
+    if not isinstance(pedido.detalle, dict):
+        return WHATSAPP_SLOTS[0]
+    return determinar_whatsapp_destino(cotizar_carrito(pedido.detalle).whatsapp_counts)[1]
+
+def _producto_y_variacion(cart_id, linea, precios):
+    """
+    (product_id, variación) de una línea de detalle_completo. Los ids de
+    producto pueden tener guiones: se usa el product_id guardado en el
+    checkout y, en pedidos anteriores, el de la tabla de precios actual.
+    """
+    product_id = linea.get("product_id")
+    if product_id is None:
+        precio = precios.get(cart_id)
+        product_id = precio.base_id if precio is not None else cart_id
+    return product_id, cart_id[len(product_id) + 1:] if cart_id.startswith(product_id) else ""
+
+
+class AportesVentas:
+    """Sumas a los rollups acumuladas en memoria y escritas con un upsert por tabla."""
+
+    def __init__(self):
+        self.productos = {}
+        self.whatsapp = {}
+        self._precios = None
+
+    def agregar(self, pedido, completado=False, signo=1):
+        """
+        Suma el pedido (fila con las columnas de _COLUMNAS) a las métricas de
+        venta o, con `completado`, a las de completados. Los pedidos sin
+        timestamp no tienen día y no se cuentan.
+        """
+        dia = (pedido.timestamp or "")[:10]
+        if not dia:
+            return
+        columnas = SALES_METRICS[3:] if completado else SALES_METRICS[:3]
+        unidades_pedido = 0
+        for cart_id, linea in (pedido.detalle_completo or {}).items():
+            if not isinstance(linea, dict):
+                continue
+            if "product_id" not in linea and self._precios is None:
+                self._precios = price_cache.get()
+            product_id, variacion = _producto_y_variacion(cart_id, linea, self._precios)
+            cantidad = linea.get("cantidad") or 0
+            unidades_pedido += cantidad
+            self._sumar(self.productos, (dia, product_id, variacion), columnas,
+                        (signo, signo * cantidad, signo * (linea.get("subtotal") or 0)))
+        self._sumar(self.whatsapp, (dia, _slot(pedido)), columnas,
+                    (signo, signo * unidades_pedido, signo * (pedido.total or 0)))
+
+    @staticmethod
+    def _sumar(filas, clave, columnas, valores):
+        fila = filas.setdefault(clave, dict.fromkeys(SALES_METRICS, 0))
+        for columna, valor in zip(columnas, valores):
+            fila[columna] += valor
+
+    def guardar(self):
+        # Ordenadas por clave: dos transacciones toman los locks en el mismo orden.
+        upsert(SalesByProductDay.__table__,
+               [dict(dia=dia, product_id=product_id, variacion=variacion, **metricas)
+                for (dia, product_id, variacion), metricas in sorted(self.productos.items())],
+               sumar=SALES_METRICS)
+        upsert(SalesByWhatsappDay.__table__,
+               [dict(dia=dia, whatsapp=whatsapp, **metricas)
+                for (dia, whatsapp), metricas in sorted(self.whatsapp.items())],
+               sumar=SALES_METRICS)
+
+
+def sincronizar_ventas(order_ids):
+    """
+    Lleva a los rollups lo que falte de cada pedido: la venta si todavía no
+    está registrada y el cambio de completado si difiere del ya sumado. Las
+    marcas del pedido se actualizan en el mismo UPDATE que devuelve sus
+    datos, así que reintentos, eventos repetidos o una reconstrucción en
+    paralelo no cuentan nada dos veces.
+    """
+    if not order_ids:
+        return
+    aportes = AportesVentas()
+    nuevos = db.session.execute(
+        update(_pedidos)
+        .where(_pedidos.c.id.in_(order_ids), _pedidos.c.ventas_registradas.is_(False))
+        .values(ventas_registradas=True)
+        .returning(*_COLUMNAS)
+    )
+    for pedido in nuevos:
+        aportes.agregar(pedido)
+    completado = func.coalesce(_pedidos.c.completado, False)
+    cambiados = db.session.execute(
+        update(_pedidos)
+        .where(_pedidos.c.id.in_(order_ids), _pedidos.c.ventas_registradas.is_(True),
+               _pedidos.c.ventas_completado != completado)
+        .values(ventas_completado=completado)
+        .returning(*_COLUMNAS, _pedidos.c.ventas_completado)
+    )
+    for pedido in cambiados:
+        aportes.agregar(pedido, completado=True, signo=1 if pedido.ventas_completado else -1)
+    aportes.guardar()
+
+@outbox_handler(SALES_ROLLUP_TOPIC)
+def sumar_ventas(payload):
+    """Pedidos creados, completados o desmarcados ({"order_ids": [...]})."""
+    sincronizar_ventas(payload["order_ids"])
+
+def emitir_ventas(order_ids):
+    """Encola la actualización de los rollups con el próximo commit del caller."""
+    emitir_evento(SALES_ROLLUP_TOPIC, {"order_ids": list(order_ids)})
+
+def quitar_pedido(order_id):
+    """
+    Borra el pedido y resta de los rollups lo que ya se había sumado de él,
+    en la transacción en curso. Devuelve False si el pedido no existe.
+    """
+    pedido = db.session.execute(
+        delete(_pedidos).where(_pedidos.c.id == order_id)
+        .returning(*_COLUMNAS, _pedidos.c.ventas_registradas, _pedidos.c.ventas_completado)
+    ).first()
+    if pedido is None:
+        return False
+    aportes = AportesVentas()
+    if pedido.ventas_registradas:
+        aportes.agregar(pedido, signo=-1)
+    if pedido.ventas_completado:
+        aportes.agregar(pedido, completado=True, signo=-1)
+    aportes.guardar()
+    return True
+
+def reconstruir_ventas(batch_size=SALES_ROLLUP_BATCH_SIZE):
+    """
+    Vacía los rollups y vuelve a sumar todos los pedidos en lotes de
+    `batch_size` ids, con un commit por lote. Devuelve cuántos pedidos leyó.
+    """
+    db.session.execute(update(_pedidos).values(ventas_registradas=False, ventas_completado=False))
+    db.session.execute(delete(SalesByProductDay))
+    db.session.execute(delete(SalesByWhatsappDay))
+    db.session.commit()
+    leidos, ultimo = 0, None
+    while True:
+        query = select(_pedidos.c.id).order_by(_pedidos.c.id).limit(batch_size)
+        if ultimo is not None:
+            query = query.where(_pedidos.c.id > ultimo)
+        ids = db.session.execute(query).scalars().all()
+        if not ids:
+            return leidos
+        sincronizar_ventas(ids)
+        db.session.commit()
+        leidos, ultimo = leidos + len(ids), ids[-1]
+
+
+def resumen_ventas(desde, hasta):
+    """
+    Ventas entre los días `desde` y `hasta` (YYYY-MM-DD, inclusive), leídas
+    sólo de los rollups: por producto y variación, por día y por WhatsApp.
+    """
+    def sumas(tabla):
+        return [func.sum(tabla.c[m]).label(m) for m in SALES_METRICS]
+
+    productos = SalesByProductDay.__table__
+    whatsapp = SalesByWhatsappDay.__table__
+    por_producto = db.session.execute(
+        select(productos.c.product_id, productos.c.variacion, *sumas(productos))
+        .where(productos.c.dia.between(desde, hasta))
+        .group_by(productos.c.product_id, productos.c.variacion)
+        .order_by(func.sum(productos.c.unidades).desc(), productos.c.product_id, productos.c.variacion)
+    ).mappings().all()
+    por_dia = db.session.execute(
+        select(whatsapp.c.dia, *sumas(whatsapp))
+        .where(whatsapp.c.dia.between(desde, hasta))
+        .group_by(whatsapp.c.dia).order_by(whatsapp.c.dia)
+    ).mappings().all()
+    por_whatsapp = db.session.execute(
+        select(whatsapp.c.whatsapp, *sumas(whatsapp))
+        .where(whatsapp.c.dia.between(desde, hasta))
+        .group_by(whatsapp.c.whatsapp).order_by(whatsapp.c.whatsapp)
+    ).mappings().all()
+    return {
+        "productos": [dict(row) for row in por_producto],
+        "por_dia": [dict(row) for row in por_dia],
+        "whatsapp": [dict(row) for row in por_whatsapp],
+    }
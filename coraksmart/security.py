@@ -0,0 +1,261 @@
+# check/generate_password_hash son caros a propósito. Se ejecutan en un pool
+# acotado para que una ráfaga de logins no acapare los workers que atienden
+# carrito y checkout: si no hay lugar en la cola se rechaza de inmediato.
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from .metrics import HASH_QUEUE_TIME, HASH_TIME, HASH_REJECTED
+
+HASH_MAX_WORKERS = int(os.environ.get("HASH_MAX_WORKERS", 2))
+HASH_MAX_PENDING = int(os.environ.get("HASH_MAX_PENDING", 8))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 10))
+LOGIN_MAX_FAILURES = int(os.environ.get("LOGIN_MAX_FAILURES", 5))
+LOGIN_LOCKOUT_SECONDS = float(os.environ.get("LOGIN_LOCKOUT_SECONDS", 60))
+
+
+class HashingBusy(Exception):
+    """No hay capacidad para calcular otro hash en este momento."""
+
+
+def _semaforo_compartido(valor):
+    """
+    Semáforo que comparten los procesos creados con fork después de él. Con
+    preload_app el de password_hasher se crea en el maestro de gunicorn, así
+    que el límite vale para todos los workers y no para cada uno.
+    """
+    try:
+        return multiprocessing.BoundedSemaphore(valor)
+    except OSError:
+        # Sin /dev/shm (algunos sandboxes) el límite queda por proceso.
+        return threading.BoundedSemaphore(valor)
+
+def _lock_compartido():
+    try:
+        return multiprocessing.Lock()
+    except OSError:
+        return threading.Lock()
+
+def _arreglo_compartido(tipo, largo):
+    """Arreglo de `largo` ceros en memoria compartida (tipo de `array`); una lista si no hay /dev/shm."""
+    try:
+        return multiprocessing.Array(tipo, largo, lock=False)
+    except OSError:
+        return [0] * largo
+
+
+class _CupoCompartido:
+    """
+    `valor` lugares que comparten los procesos creados con fork después de
+    crearlo. Anota qué pid ocupa cada lugar: si un worker muere sin
+    soltarlos (SIGKILL por OOM o timeout de gunicorn), el maestro los
+    devuelve con liberar_de() desde el hook child_exit.
+    """
+
+    def __init__(self, valor):
+        self._semaforo = _semaforo_compartido(valor)
+        self._duenos = _arreglo_compartido("i", valor)
+        self._lock = _lock_compartido()
+
+    def acquire(self, block=True, timeout=None):
+        if not self._semaforo.acquire(block, timeout):
+            return False
+        with self._lock:
+            self._duenos[self._duenos[:].index(0)] = os.getpid()
+        return True
+
+    def release(self):
+        with self._lock:
+            self._duenos[self._duenos[:].index(os.getpid())] = 0
+        self._semaforo.release()
+
+    def liberar_de(self, pid):
+        """Devuelve los lugares que ocupa `pid`; cuántos eran."""
+        with self._lock:
+            tomados = [i for i, dueno in enumerate(self._duenos[:]) if dueno == pid]
+            for i in tomados:
+                self._duenos[i] = 0
+        for _ in tomados:
+            self._semaforo.release()
+        return len(tomados)
+
+
+class PasswordHasher:
+    """
+    Pool de hilos acotado para hashes de contraseña, con métricas de cola y
+    cómputo. Los límites (max_workers calculando, max_pending esperando) se
+    cuentan entre todos los procesos: con workers sync cada proceso atiende
+    un request a la vez y un límite por proceso no acotaría nada. Los lugares
+    de un worker que muere a la mitad los devuelve child_exit (liberar_de).
+    """
+
+    def __init__(self, max_workers=HASH_MAX_WORKERS, max_pending=HASH_MAX_PENDING, timeout=HASH_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = _CupoCompartido(max_workers + max_pending)
+        self._calculando = _CupoCompartido(max_workers)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.completed = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    def _pool(self):
+        with self._lock:
+            # Los hilos no sobreviven a un fork: cada worker crea su propio pool.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="password-hash")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _registrar(self, queued, elapsed):
+        with self._lock:
+            self.completed += 1
+            self.queue_time_total += queued
+            self.queue_time_max = max(self.queue_time_max, queued)
+            self.hash_time_total += elapsed
+            self.hash_time_max = max(self.hash_time_max, elapsed)
+        HASH_QUEUE_TIME.observe(queued)
+        HASH_TIME.observe(elapsed)
+
+    def _rechazar(self):
+        with self._lock:
+            self.rejected += 1
+        HASH_REJECTED.inc()
+        return HashingBusy()
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(False):
+            raise self._rechazar()
+        enqueued = time.perf_counter()
+
+        def tarea():
+            # Espera turno entre todos los procesos hasta agotar el timeout del caller.
+            if not self._calculando.acquire(True, max(enqueued + self.timeout - time.perf_counter(), 0)):
+                raise HashingBusy()
+            try:
+                started = time.perf_counter()
+                result = fn(*args)
+            finally:
+                self._calculando.release()
+            self._registrar(started - enqueued, time.perf_counter() - started)
+            return result
+
+        try:
+            future = self._pool().submit(tarea)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except (FutureTimeoutError, HashingBusy):
+            future.cancel()
+            raise self._rechazar()
+
+    def liberar_de(self, pid):
+        """Para child_exit: devuelve los lugares de un worker que ya no existe."""
+        return self._calculando.liberar_de(pid) + self._slots.liberar_de(pid)
+
+    def check(self, password_hash, password):
+        return self.run(check_password_hash, password_hash, password)
+
+    def generate(self, password):
+        return self.run(generate_password_hash, password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_time_total": self.queue_time_total,
+                "queue_time_max": self.queue_time_max,
+                "hash_time_total": self.hash_time_total,
+                "hash_time_max": self.hash_time_max,
+            }
+
+
+class LoginThrottle:
+    """
+    Bloquea temporalmente un emoji tras varios intentos fallidos, sin calcular
+    hashes. Los fallos viven en memoria compartida, creada antes del fork como
+    la del hasher, así que cuentan entre todos los workers: con workers sync
+    los intentos de un mismo emoji caen en procesos distintos.
+
+    Tabla de `max_entries` lugares por crc32 del emoji (direccionamiento
+    abierto); si se llena se vacía entera.
+    """
+
+    def __init__(self, max_failures=LOGIN_MAX_FAILURES, lockout_seconds=LOGIN_LOCKOUT_SECONDS, max_entries=4096):
+        self.max_failures = max_failures
+        self.lockout_seconds = lockout_seconds
+        self.max_entries = max_entries
+        self._claves = _arreglo_compartido("Q", max_entries)
+        self._fallos = _arreglo_compartido("i", max_entries)
+        self._ultimo = _arreglo_compartido("d", max_entries)
+        self._lock = _lock_compartido()
+
+    def _lugar(self, emoji, crear=False):
+        """Índice del emoji en la tabla (o uno libre con `crear`); None si no está. Con el lock tomado."""
+        # 0 marca un lugar libre.
+        clave = zlib.crc32(emoji.encode()) + 1
+        inicio = clave % self.max_entries
+        for paso in range(self.max_entries):
+            i = (inicio + paso) % self.max_entries
+            if self._claves[i] == clave:
+                return i
+            if self._claves[i] == 0:
+                if not crear:
+                    return None
+                self._claves[i], self._fallos[i] = clave, 0
+                return i
+        if not crear:
+            return None
+        self._vaciar()
+        return self._lugar(emoji, crear=True)
+
+    def bloqueado(self, emoji):
+        with self._lock:
+            i = self._lugar(emoji)
+            if i is None or not self._fallos[i]:
+                return False
+            if time.monotonic() - self._ultimo[i] >= self.lockout_seconds:
+                self._fallos[i] = 0
+                return False
+            return self._fallos[i] >= self.max_failures
+
+    def fallo(self, emoji):
+        with self._lock:
+            i = self._lugar(emoji, crear=True)
+            self._fallos[i] += 1
+            self._ultimo[i] = time.monotonic()
+
+    def exito(self, emoji):
+        with self._lock:
+            i = self._lugar(emoji)
+            if i is not None:
+                self._fallos[i] = 0
+
+    def limpiar(self):
+        """Olvida todos los fallos."""
+        with self._lock:
+            self._vaciar()
+
+    def _vaciar(self):
+        for i in range(self.max_entries):
+            self._claves[i] = self._fallos[i] = 0
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
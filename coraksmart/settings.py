@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Raíz del proyecto: static/, templates/ e instance/ quedan junto al paquete.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def secret_key():
+    key = os.environ.get('SECRET_KEY')
+    if not key:
+        if os.environ.get('RENDER'):
+            raise ValueError("No SECRET_KEY set for production environment!")
+        key = 'dev-secret-key-for-local-testing-only'
+        print("WARNING: Using default SECRET_KEY for local development.", file=sys.stderr)
+    return key
+
+
+def _normalizar_url(db_url):
+    if db_url and db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql://", 1)
+    return db_url
+
+
+def database_url():
+    # Use the DATABASE_URL from Render, fallback to a local SQLite DB for development
+    return _normalizar_url(os.environ.get('DATABASE_URL', 'sqlite:///corak.db'))
+
+
+def replica_url():
+    """Réplica de lectura opcional (DATABASE_REPLICA_URL); None si no hay."""
+    return _normalizar_url(os.environ.get('DATABASE_REPLICA_URL')) or None
+
+
+def engine_options(db_url):
+    if db_url.startswith("sqlite"):
+        return {}
+    # Pool por worker. Con gthread, DB_POOL_SIZE debe cubrir GUNICORN_THREADS
+    # (ver "Despliegue con gthread" en el README).
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 5)),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+    }
+
+
+def desde_entorno():
+    """Configuración de la app tomada de las variables de entorno."""
+    return {
+        "SECRET_KEY": secret_key(),
+        "SQLALCHEMY_DATABASE_URI": database_url(),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "REPLICA_DATABASE_URI": replica_url(),
+        # Retraso máximo de la réplica (s) antes de leer de la principal, cada
+        # cuánto se mide y cuánto tiempo tras escribir un cliente lee de la principal.
+        "REPLICA_MAX_LAG": float(os.environ.get("REPLICA_MAX_LAG", 2)),
+        "REPLICA_LAG_CHECK_INTERVAL": float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 5)),
+        "READ_YOUR_WRITES_WINDOW": float(os.environ.get("READ_YOUR_WRITES_WINDOW", 5)),
+        # QUERY_BUDGET_MODE: "off", "header" o "raise" (ver querybudget.py).
+        "QUERY_BUDGET_MODE": os.environ.get(
+            "QUERY_BUDGET_MODE", "header" if os.environ.get('FLASK_ENV') == 'development' else "off"
+        ),
+    }
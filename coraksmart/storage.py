@@ -0,0 +1,129 @@
+# requests se importa al subir el primer archivo: ningún otro request lo usa.
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from werkzeug.utils import secure_filename
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+SUPABASE_BUCKET = os.environ.get("SUPABASE_BUCKET", "media")
+
+SUPABASE_POOL_SIZE = int(os.environ.get("SUPABASE_POOL_SIZE", 4))
+SUPABASE_UPLOAD_RETRIES = int(os.environ.get("SUPABASE_UPLOAD_RETRIES", 3))
+SUPABASE_UPLOAD_CHUNK = 64 * 1024
+
+
+class SupabaseStorage:
+    """
+    Cliente de Supabase Storage: una sesión HTTP con pool de conexiones por
+    proceso, cuerpo enviado en streaming desde el archivo subido y reintentos
+    con backoff exponencial ante errores de red, 429 y 5xx.
+    """
+
+    def __init__(self, url, key, bucket, pool_size=SUPABASE_POOL_SIZE, retries=SUPABASE_UPLOAD_RETRIES,
+                 backoff=0.5, timeout=(5, 30), chunk_size=SUPABASE_UPLOAD_CHUNK):
+        self.url = url
+        self.key = key
+        self.bucket = bucket
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._http = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _session(self):
+        import requests
+
+        with self._lock:
+            if self._http is None or self._pid != os.getpid():
+                http = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                http.mount("http://", adapter)
+                http.mount("https://", adapter)
+                self._http, self._pid = http, os.getpid()
+            return self._http
+
+    def _trozos(self, stream):
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def public_url(self, ruta):
+        return f"{self.url}/storage/v1/object/public/{self.bucket}/{ruta}"
+
+    def subir(self, file_storage, carpeta="uploads", conservar_nombre=False):
+        """
+        Sube el archivo al bucket (público) y regresa la URL pública. Con
+        conservar_nombre=True (nombres con hash de contenido) se sube con ese
+        nombre y se sobrescribe si ya existe, que es el mismo contenido.
+        """
+        import requests
+
+        nombre = secure_filename(file_storage.filename)
+        if not conservar_nombre:
+            nombre = f"{uuid4().hex}_{nombre}"
+        ruta = f"{carpeta}/{nombre}"  # carpeta lógica en el bucket
+        url_upload = f"{self.url}/storage/v1/object/{self.bucket}/{ruta}"
+        headers = {
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": file_storage.mimetype or "application/octet-stream",
+            "x-upsert": "true" if conservar_nombre else "false",
+        }
+
+        stream = file_storage.stream
+        seekable = hasattr(stream, "seekable") and stream.seekable()
+        inicio = stream.tell() if seekable else None
+        error = None
+        for intento in range(self.retries + 1):
+            if intento:
+                if not seekable:
+                    break  # El cuerpo ya se consumió, no se puede reenviar.
+                stream.seek(inicio)
+                time.sleep(self.backoff * 2 ** (intento - 1))
+            # Un stream con posición se envía con Content-Length; si no, por chunks.
+            data = stream if seekable else self._trozos(stream)
+            try:
+                resp = self._session().post(url_upload, headers=headers, data=data, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = exc
+                continue
+            if resp.status_code == 429 or resp.status_code >= 500:
+                error = requests.HTTPError(f"{resp.status_code} al subir {ruta}", response=resp)
+                continue
+            resp.raise_for_status()
+            return self.public_url(ruta)
+        raise error
+
+    def subir_varios(self, files, max_workers=None, **kwargs):
+        """
+        Sube varios archivos en paralelo; las URLs regresan en el mismo orden.
+        Un elemento (archivo, opciones) usa esas opciones de subir() en lugar
+        de las de kwargs.
+        """
+        tareas = [f if isinstance(f, tuple) else (f, kwargs) for f in files]
+        tareas = [(f, opciones) for f, opciones in tareas if f and f.filename]
+        if not tareas:
+            return []
+        workers = min(max_workers or self.pool_size, len(tareas))
+        with ThreadPoolExecutor(workers, thread_name_prefix="supabase-upload") as executor:
+            return list(executor.map(lambda tarea: self.subir(tarea[0], **tarea[1]), tareas))
+
+supabase_storage = SupabaseStorage(SUPABASE_URL, SUPABASE_KEY, SUPABASE_BUCKET)
+
+def subir_a_supabase(file_storage):
+    """
+    Sube el archivo a Supabase Storage (bucket público) y regresa la URL pública.
+    """
+    return supabase_storage.subir(file_storage)
+
+def subir_galeria_a_supabase(files):
+    """Sube las imagenes_adicionales en paralelo y regresa sus URLs públicas."""
+    return supabase_storage.subir_varios(files)
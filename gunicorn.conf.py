@@ -1,10 +1,17 @@
 # Configuración de Gunicorn para producción
 import multiprocessing
 import os
+import shutil
 
 # Configuración de workers
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"  # Worker estándar para Flask
+# GUNICORN_WORKER_CLASS=gthread atiende varios requests por worker con hilos;
+# cada worker necesita entonces DB_POOL_SIZE >= GUNICORN_THREADS (ver README).
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")  # Worker estándar para Flask
+if worker_class == "gthread":
+    workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() + 1))
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+else:
+    workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
 max_requests = 1000
 max_requests_jitter = 100
 
@@ -34,6 +41,30 @@ group = None
 max_requests_jitter = 100
 worker_tmp_dir = "/dev/shm"
 
+# Métricas Prometheus compartidas entre workers: cada worker escribe en este
+# directorio y /metrics agrega todos los archivos. Se vacía al arrancar.
+prometheus_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(worker_tmp_dir, "coraksmart-metrics")
+)
+shutil.rmtree(prometheus_dir, ignore_errors=True)
+os.makedirs(prometheus_dir, exist_ok=True)
+
+# Hooks de procesos
+def post_fork(server, worker):
+    # Con preload_app el engine de SQLAlchemy se crea en el maestro; cada
+    # worker descarta el pool heredado y abre sus propias conexiones.
+    from app import reiniciar_conexiones_tras_fork
+    reiniciar_conexiones_tras_fork()
+
+def child_exit(server, worker):
+    # Conserva los contadores del worker que sale pero deja de reportar sus gauges.
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+    # Un worker muerto por SIGKILL (OOM o timeout) a la mitad de un hash no
+    # soltó sus lugares del pool compartido: se devuelven aquí.
+    from coraksmart.security import password_hasher
+    password_hasher.liberar_de(worker.pid)
+
 # Configuración para Render
 forwarded_allow_ips = "*"
 proxy_allow_ips = "*"
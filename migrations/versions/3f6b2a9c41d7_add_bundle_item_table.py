@@ -0,0 +1,63 @@
+"""Add bundle_item table and backfill it from product.bundle_items
+
+Revision ID: 3f6b2a9c41d7
+Revises: e0bef348793c
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b2a9c41d7'
+down_revision = 'e0bef348793c'
+branch_labels = None
+depends_on = None
+
+
+def _parse_bundle_items(bundle_items):
+    # Copia de coraksmart.models.parse_bundle_items: la migración no debe importar la app.
+    if isinstance(bundle_items, str):
+        try:
+            bundle_items = json.loads(bundle_items)
+        except json.JSONDecodeError:
+            return {}
+    componentes = {}
+    if isinstance(bundle_items, dict):
+        for product_id, cantidad in bundle_items.items():
+            componentes[str(product_id)] = cantidad if isinstance(cantidad, int) and cantidad > 0 else 1
+    elif isinstance(bundle_items, list):
+        for product_id in bundle_items:
+            if isinstance(product_id, (str, int)):
+                componentes[str(product_id)] = componentes.get(str(product_id), 0) + 1
+    return componentes
+
+
+def upgrade():
+    bundle_item = op.create_table(
+        'bundle_item',
+        sa.Column('bundle_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('cantidad', sa.Integer(), nullable=False, server_default='1'),
+        sa.ForeignKeyConstraint(['bundle_id'], ['product.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('bundle_id', 'product_id'),
+    )
+    op.create_index('ix_bundle_item_product_id', 'bundle_item', ['product_id'], unique=False)
+
+    product = sa.table('product', sa.column('id', sa.String()), sa.column('bundle_items', sa.JSON()))
+    conn = op.get_bind()
+    rows = []
+    for bundle_id, bundle_items in conn.execute(
+            sa.select(product.c.id, product.c.bundle_items).where(product.c.bundle_items.isnot(None))):
+        for product_id, cantidad in _parse_bundle_items(bundle_items).items():
+            rows.append({'bundle_id': bundle_id, 'product_id': product_id, 'cantidad': cantidad})
+    if rows:
+        op.bulk_insert(bundle_item, rows)
+
+
+def downgrade():
+    op.drop_index('ix_bundle_item_product_id', table_name='bundle_item')
+    op.drop_table('bundle_item')
@@ -0,0 +1,117 @@
+import os
+import pytest
+import tempfile
+import threading
+
+# `import app` (p. ej. en los subprocesos de test_app_factory) crea la app con
+# el DATABASE_URL del entorno: apuntarla a una base desechable.
+_tmpdir = tempfile.mkdtemp(prefix="coraksmart-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+
+from coraksmart import create_app
+from coraksmart.extensions import db
+from coraksmart.orders import order_sequence
+
+
+@pytest.fixture
+def app_config():
+    """Configuración extra de la app de prueba; un archivo la redefine si necesita otra."""
+    return {}
+
+
+@pytest.fixture
+def seed():
+    """Filas que se guardan antes de cada test; cada archivo redefine las suyas."""
+    return []
+
+
+@pytest.fixture
+def session_data():
+    """Claves con las que arranca la sesión de `client` (p. ej. logged_in)."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config, seed):
+    """
+    App de prueba con su propia base SQLite, las tablas creadas y las filas
+    de `seed` ya guardadas. Las cachés son por app: cada test arranca en frío.
+    """
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+                      **app_config})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(seed)
+        db.session.commit()
+    # El bloque de números de pedido es del proceso y venía de otra base.
+    order_sequence._reset()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app, session_data):
+    with app.test_client() as client:
+        if session_data:
+            with client.session_transaction() as session:
+                session.update(session_data)
+        yield client
+
+
+@pytest.fixture
+def client_factory(app, session_data):
+    """
+    Clientes nuevos, p. ej. uno por hilo. Cada uno arranca con `session_data`
+    más las claves que se le pasen: client_factory(logged_in_user_emoji="u1").
+    """
+    def make(**sesion):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session.update(session_data, **sesion)
+        return client
+    return make
+
+
+@pytest.fixture
+def en_paralelo():
+    """Corre cada trabajo en su propio hilo, espera a todos y falla si alguno lanzó."""
+    def correr_todos(trabajos):
+        errores = []
+
+        def correr(trabajo):
+            try:
+                trabajo()
+            except Exception as exc:  # pragma: no cover - se reporta abajo
+                errores.append(exc)
+
+        hilos = [threading.Thread(target=correr, args=(t,)) for t in trabajos]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert not errores, errores
+    return correr_todos
+
+
+@pytest.fixture
+def ctx(app):
+    """App context abierto durante todo el test."""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Limita las sentencias SQL de un bloque:
+
+        with query_budget(4) as queries:
+            client.post('/procesar_pedido')
+        assert not queries.repeated()
+    """
+    from coraksmart.querybudget import QueryRecorder
+
+    def recorder(max_queries=None, **kwargs):
+        return QueryRecorder(budget=max_queries, **kwargs)
+    return recorder
@@ -0,0 +1,61 @@
+import pytest
+from coraksmart.models import Order
+
+
+@pytest.fixture
+def seed():
+    return [
+        Order(
+            id=f"pedido-{i}",
+            user_emoji="🐱" if i % 2 else "🐶",
+            # Dos pedidos por segundo: el id desempata el cursor.
+            timestamp=f"2026-01-01T10:00:0{i // 2}",
+            total=10.0 * i,
+            completado=i < 3,
+            detalle={"choco": i},
+            delivery_info={"day": "Lunes"},
+        )
+        for i in range(7)
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in': True}
+
+
+def _todas_las_paginas(client, query):
+    ids, cursor = [], None
+    while True:
+        url = f"/admin/api/pedidos?{query}" + (f"&cursor={cursor}" if cursor else "")
+        data = client.get(url).get_json()
+        ids += [p["id"] for p in data["pedidos"]]
+        cursor = data["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_pages_walk_newest_first_without_gaps(client):
+    ids = _todas_las_paginas(client, "limit=2")
+
+    assert ids == [f"pedido-{i}" for i in (6, 5, 4, 3, 2, 1, 0)]
+
+
+def test_filters_apply_to_every_page(client):
+    assert _todas_las_paginas(client, "limit=1&completado=false&user_emoji=🐱") == ["pedido-5", "pedido-3"]
+
+
+def test_json_columns_only_when_requested(client):
+    pedido = client.get("/admin/api/pedidos?limit=1").get_json()["pedidos"][0]
+    assert "detalle" not in pedido and "delivery_info" not in pedido
+
+    pedido = client.get("/admin/api/pedidos?limit=1&fields=detalle").get_json()["pedidos"][0]
+    assert pedido["detalle"] == {"choco": 6}
+    assert client.get("/admin/api/pedidos?fields=password").status_code == 400
+
+
+def test_listing_requires_admin(client):
+    with client.session_transaction() as session:
+        session.pop('logged_in')
+
+    assert client.get("/admin/api/pedidos").status_code == 401
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import insert
+
+from coraksmart import create_app
+from coraksmart.extensions import db
+from coraksmart.models import Emoji
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_app_leaves_heavy_dependencies_unloaded():
+    codigo = ("import sys, app\n"
+              "print(sorted(m for m in ('requests', 'flask_migrate', 'alembic', 'PIL', 'brotli')"
+              " if m in sys.modules))")
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=os.environ,
+                            capture_output=True, text=True, check=True).stdout
+    assert salida.strip() == "[]"
+
+
+def test_factory_builds_independent_apps(tmp_path):
+    otra = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'otra.db'}"})
+    with otra.app_context():
+        db.create_all()
+        db.session.add(Emoji(emoji="🦊"))
+        db.session.commit()
+
+    response = otra.test_client().get('/api/get-emojis')
+
+    assert response.get_json()["all_emojis"] == ["🦊"]
+    assert {"shop", "auth", "admin", "rewards"} <= set(otra.blueprints)
+
+
+def test_apps_do_not_share_cached_values(tmp_path):
+    # Sin sellos de versión en ninguna de las dos bases (inserts directos),
+    # una caché del proceso le daría a la segunda app los emojis de la primera.
+    apps = []
+    for emoji in ("🐱", "🦊"):
+        otra = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / f'{len(apps)}.db'}"})
+        with otra.app_context():
+            db.create_all()
+            db.session.execute(insert(Emoji).values(emoji=emoji))
+            db.session.commit()
+        apps.append(otra)
+
+    respuestas = [otra.test_client().get('/api/get-emojis').get_json()["all_emojis"] for otra in apps]
+
+    assert respuestas == [["🐱"], ["🦊"]]
+
+
+def test_migration_commands_load_on_demand(app, monkeypatch):
+    monkeypatch.chdir(RAIZ)
+
+    result = app.test_cli_runner().invoke(args=["db", "heads"])
+
+    assert result.exit_code == 0, result.output
+    assert "(head)" in result.output
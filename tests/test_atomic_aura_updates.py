@@ -0,0 +1,94 @@
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import AuraLevel, Order, User
+
+HILOS = 8
+
+
+@pytest.fixture
+def seed():
+    return [
+        User(emoji="🐱", password_hash="x", aura_points=0, claimed_levels=[], reward_codes={}),
+        AuraLevel(level=1, points_needed=0, name="Chispa", prize="Sticker"),
+        AuraLevel(level=2, points_needed=50, name="Llama", prize="Dulce"),
+        AuraLevel(level=3, points_needed=100, name="Fénix", prize="Combo"),
+        *(Order(id=f"p{i}", user_emoji="🐱", aura_ganada=10, completado=False) for i in range(40)),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in': True, 'logged_in_user_emoji': '🐱'}
+
+
+def _usuario(app):
+    with app.app_context():
+        return db.session.get(User, "🐱")
+
+
+def test_parallel_completions_do_not_lose_aura(app, client_factory, en_paralelo):
+    def completar(ids):
+        def trabajo():
+            client = client_factory()
+            for order_id in ids:
+                assert client.post(f'/admin/completar-pedido/{order_id}').status_code == 200
+        return trabajo
+
+    def completar_en_lote(ids):
+        def trabajo():
+            response = client_factory().post('/admin/completar-pedidos', json={"ids": ids, "accion": "completar"})
+            assert response.status_code == 200
+        return trabajo
+
+    lotes = [[f"p{i}" for i in range(n, 40, HILOS)] for n in range(HILOS)]
+    en_paralelo([completar(l) if n % 2 else completar_en_lote(l) for n, l in enumerate(lotes)])
+
+    assert _usuario(app).aura_points == 400
+    with app.app_context():
+        assert Order.query.filter_by(completado=True).count() == 40
+
+
+def test_parallel_claims_of_one_level_succeed_once(app, client_factory, en_paralelo):
+    with app.app_context():
+        db.session.get(User, "🐱").aura_points = 120
+        db.session.commit()
+    respuestas = []
+
+    def reclamar():
+        respuestas.append(client_factory().post('/generate-reward-code', json={"level": 2}).status_code)
+
+    en_paralelo([reclamar] * HILOS)
+
+    assert sorted(respuestas) == [200] + [400] * (HILOS - 1)
+    assert _usuario(app).claimed_levels == [2]
+    assert set(_usuario(app).reward_codes) == {"2"}
+
+
+def test_parallel_claims_of_different_levels_all_persist(app, client_factory, en_paralelo):
+    with app.app_context():
+        db.session.get(User, "🐱").aura_points = 120
+        db.session.commit()
+
+    def reclamar(level):
+        return lambda: client_factory().post('/admin/recompensas', json={
+            "user_emoji": "🐱", "level": level, "action": "confirm"})
+
+    en_paralelo([reclamar(level) for level in (1, 2, 3)] + [
+        lambda: client_factory().post('/admin/completar-pedido/p0') for _ in range(1)])
+
+    usuario = _usuario(app)
+    assert sorted(usuario.claimed_levels) == [1, 2, 3]
+    assert set(usuario.reward_codes) == {"1", "2", "3"}
+    assert usuario.aura_points == 130
+    assert usuario.rewards_version == 3
+
+
+def test_pending_reward_claim_takes_lowest_unclaimed_level(app, client_factory):
+    with app.app_context():
+        db.session.get(User, "🐱").aura_points = 60
+        db.session.commit()
+    client = client_factory()
+
+    assert client.post('/reclamar_recompensa').get_json()["level"] == 1
+    assert client.post('/reclamar_recompensa').get_json()["prize"] == "Dulce"
+    assert client.post('/reclamar_recompensa').status_code == 400
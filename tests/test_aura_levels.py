@@ -0,0 +1,55 @@
+import pytest
+from coraksmart.cache import AuraLevelIndex
+from coraksmart.extensions import db
+from coraksmart.models import AuraLevel, User
+
+
+@pytest.fixture
+def seed():
+    return [
+        AuraLevel(level=1, points_needed=-float('inf'), name="Chispa"),
+        AuraLevel(level=2, points_needed=100, name="Llama"),
+        AuraLevel(level=3, points_needed=500, name="Fénix"),
+        User(emoji="🐱", password_hash="x", aura_points=120),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱'}
+
+
+def test_index_normalizes_thresholds_and_bisects():
+    index = AuraLevelIndex([
+        {"level": 3, "points_needed": 500.0},
+        {"level": 1, "points_needed": "negative_infinity"},
+        {"level": 2, "points_needed": "100"},
+        {"level": 0, "points_needed": "-Infinity"},
+    ])
+
+    assert index.thresholds == [-float('inf'), -float('inf'), 100.0, 500.0]
+    assert [l["level"] for l in index.niveles_para([-5, 99, 100, 10_000])] == [1, 1, 2, 3]
+    assert index.umbral(2) == 100.0
+    assert index.umbral(9) is None
+
+
+def test_profile_resolves_level_from_compiled_index(client):
+    data = client.get('/api/profile').get_json()
+
+    assert (data["aura_level"], data["level_name"]) == (2, "Llama")
+
+
+def test_level_changes_rebuild_index(app, client):
+    client.get('/api/profile')
+    with app.app_context():
+        db.session.get(AuraLevel, 2).points_needed = 200
+        db.session.commit()
+
+    assert client.get('/api/profile').get_json()["aura_level"] == 1
+
+
+def test_reward_code_checks_threshold_from_index(client):
+    assert client.post('/generate-reward-code', json={"level": 3}).status_code == 400
+
+    response = client.post('/generate-reward-code', json={"level": 2})
+    assert response.get_json()["success"] is True
@@ -0,0 +1,51 @@
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import Order, User
+
+
+@pytest.fixture
+def seed():
+    return [
+        User(emoji="🐱", password_hash="x", aura_points=100),
+        User(emoji="🐶", password_hash="x", aura_points=0),
+        Order(id="a", user_emoji="🐱", aura_ganada=10, completado=False),
+        Order(id="b", user_emoji="🐱", aura_ganada=20, completado=False),
+        Order(id="c", user_emoji="🐶", aura_ganada=5, completado=True),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in': True}
+
+
+def _puntos(app):
+    with app.app_context():
+        return {u.emoji: u.aura_points for u in User.query.all()}
+
+
+def test_complete_many_orders_aggregates_aura_per_user(app, client, query_budget):
+    # Lectura, UPDATE de pedidos, UPDATE de aura, histograma del leaderboard,
+    # su sello y el evento para los rollups de ventas.
+    with query_budget(6) as queries:
+        data = client.post('/admin/completar-pedidos', json={"ids": ["a", "b", "c", "zzz"], "accion": "completar"}).get_json()
+
+    assert data["aura_por_usuario"] == {"🐱": 30}
+    assert [r["success"] for r in data["resultados"]] == [True, True, True, False]
+    assert data["resultados"][2]["cambio"] is False
+    assert _puntos(app) == {"🐱": 130, "🐶": 0}
+    assert not queries.repeated()
+
+
+def test_toggle_mixes_completion_and_uncompletion(app, client):
+    data = client.post('/admin/completar-pedidos', json={"ids": ["a", "c"]}).get_json()
+
+    assert [r["completado"] for r in data["resultados"]] == [True, False]
+    assert _puntos(app) == {"🐱": 110, "🐶": -5}
+    with app.app_context():
+        assert db.session.get(Order, "c").completado is False
+
+
+def test_invalid_payload_is_rejected(client):
+    assert client.post('/admin/completar-pedidos', json={"ids": "a"}).status_code == 400
+    assert client.post('/admin/completar-pedidos', json={"ids": ["a"], "accion": "borrar"}).status_code == 400
@@ -0,0 +1,56 @@
+import json
+import pytest
+from coraksmart.extensions import db
+from coraksmart.helpers import expandir_bundles, get_bundles
+from coraksmart.models import Product, BundleItem, bundles_que_contienen, parse_bundle_items
+
+
+@pytest.fixture
+def seed():
+    return [
+        Product(id="choco", nombre="Chocolate", precio=5.0),
+        Product(id="gomitas", nombre="Gomitas", precio=3.0),
+    ]
+
+
+def _miembros(bundle_id):
+    return {(i.product_id, i.cantidad) for i in BundleItem.query.filter_by(bundle_id=bundle_id)}
+
+
+def test_parse_accepts_lists_dicts_and_json_strings():
+    assert parse_bundle_items(json.dumps(["a", "b", "a"])) == {"a": 2, "b": 1}
+    assert parse_bundle_items({"a": 3}) == {"a": 3}
+    assert parse_bundle_items("no es json") == {}
+
+
+def test_membership_follows_bundle_create_edit_and_delete(ctx):
+    db.session.add(Product(id="combo", nombre="Combo", bundle_items=json.dumps(["choco", "gomitas"])))
+    db.session.commit()
+    assert _miembros("combo") == {("choco", 1), ("gomitas", 1)}
+
+    db.session.get(Product, "combo").bundle_items = ["gomitas", "gomitas"]
+    db.session.commit()
+    assert _miembros("combo") == {("gomitas", 2)}
+    assert bundles_que_contienen("gomitas") == ["Combo"]
+    assert bundles_que_contienen("choco") == []
+
+    db.session.delete(db.session.get(Product, "combo"))
+    db.session.commit()
+    assert BundleItem.query.count() == 0
+
+
+def test_bundle_lookup_is_a_single_query(ctx, query_budget):
+    db.session.add(Product(id="combo", nombre="Combo", bundle_items=["choco"]))
+    db.session.commit()
+
+    with query_budget(1):
+        assert bundles_que_contienen("choco") == ["Combo"]
+
+
+def test_cart_bundles_expand_into_components(ctx):
+    db.session.add(Product(id="combo", nombre="Combo", bundle_items=["choco", "gomitas"]))
+    db.session.commit()
+
+    unidades = expandir_bundles({"combo": 2, "choco": 1}, get_bundles())
+
+    assert unidades == {"choco": 3, "gomitas": 2}
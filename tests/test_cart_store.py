@@ -0,0 +1,138 @@
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+from coraksmart.cart import DBCartStore, MemoryCartStore, cart_store
+from coraksmart.extensions import db
+from coraksmart.models import CartLine, Order, Product, User
+
+
+@pytest.fixture
+def seed():
+    return [
+        Product(id="choco", nombre="Chocolate", precio=5.0),
+        Product(id="gomitas", nombre="Gomitas", precio=3.0),
+        User(emoji="🐱", password_hash=generate_password_hash("secreto", method="pbkdf2:sha256:1000")),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱'}
+
+
+@pytest.mark.parametrize("store_class", [DBCartStore, MemoryCartStore])
+def test_incr_decr_touch_single_lines(ctx, store_class):
+    store = store_class()
+    store.incr("a", "choco")
+    store.incr("a", "choco")
+    store.incr("a", "gomitas", 3)
+    store.incr("b", "choco")
+    store.decr("a", "gomitas")
+    store.decr("b", "choco")
+    store.decr("b", "no-existe")
+
+    assert store.get("a") == {"choco": 2, "gomitas": 2}
+    assert store.get("b") == {}
+
+    store.clear("a")
+    assert store.get("a") == {}
+
+
+@pytest.mark.parametrize("store_class", [DBCartStore, MemoryCartStore])
+def test_new_lines_stop_at_the_cap(ctx, store_class):
+    store = store_class()
+
+    assert store.incr("a", "choco", max_lineas=2)
+    assert store.incr("a", "gomitas", max_lineas=2)
+    assert not store.incr("a", "agua", max_lineas=2)
+    assert store.incr("a", "choco", max_lineas=2)
+
+    assert store.get("a") == {"choco": 2, "gomitas": 1}
+
+
+def test_racing_insert_keeps_the_rest_of_the_transaction(ctx, monkeypatch):
+    store = DBCartStore()
+    store.incr("a", "choco")
+    db.session.commit()
+    db.session.add(Product(id="agua", nombre="Agua", precio=1.0))
+    # Como si otra petición hubiera insertado la línea entre el UPDATE y el INSERT.
+    ejecutar = db.session.execute
+    primero = []
+
+    def update_perdido(stmt, *args, **kwargs):
+        if not primero and stmt.is_dml and stmt.table.name == "cart_line":
+            primero.append(stmt)
+            return type("Resultado", (), {"rowcount": 0})()
+        return ejecutar(stmt, *args, **kwargs)
+    monkeypatch.setattr(db.session, "execute", update_perdido)
+
+    assert store.incr("a", "choco")
+    monkeypatch.undo()
+    db.session.commit()
+
+    assert store.get("a") == {"choco": 2}
+    assert db.session.get(Product, "agua") is not None
+
+
+@pytest.mark.parametrize("store_class", [DBCartStore, MemoryCartStore])
+def test_purge_drops_only_abandoned_carts(ctx, store_class, monkeypatch):
+    store = store_class()
+    ahora = time.time()
+    monkeypatch.setattr(time, "time", lambda: ahora - 7200)
+    store.incr("viejo", "choco")
+    store.incr("activo", "choco")
+    monkeypatch.setattr(time, "time", lambda: ahora)
+    store.incr("activo", "gomitas")
+
+    assert store.purge(3600) == 1
+    assert store.get("viejo") == {}
+    assert store.get("activo") == {"choco": 1, "gomitas": 1}
+
+
+def test_cart_routes_keep_cart_out_of_the_cookie(app, client):
+    client.post('/api/agregar/choco')
+    response = client.post('/api/agregar/choco')
+    assert response.get_json()["carrito"] == {"choco": 2}
+
+    with client.session_transaction() as session:
+        assert "carrito" not in session
+        sid = session["cart_sid"]
+    with app.app_context():
+        assert db.session.get(CartLine, (sid, "choco")).cantidad == 2
+
+    # Las siguientes escrituras no vuelven a emitir la cookie de sesión.
+    response = client.post('/api/quitar/choco')
+    assert response.get_json()["carrito"] == {"choco": 1}
+    assert "Set-Cookie" not in response.headers
+
+
+def test_only_catalog_ids_reach_the_store(app, client, monkeypatch):
+    assert client.post('/api/agregar/no-existe').status_code == 404
+    assert client.post(f'/api/agregar/choco-{"x" * 200}').status_code == 404
+
+    monkeypatch.setattr(cart_store, "incr", lambda sid, cart_id: False)
+    assert client.post('/api/agregar/choco').status_code == 400
+    with app.app_context():
+        assert db.session.query(CartLine).count() == 0
+
+
+def test_legacy_cookie_cart_is_moved_to_the_store(client):
+    with client.session_transaction() as session:
+        session['carrito'] = {"gomitas": 2}
+
+    assert client.get('/api/carrito').get_json()["carrito"] == {"gomitas": 2}
+    with client.session_transaction() as session:
+        assert "carrito" not in session
+
+
+def test_checkout_empties_the_stored_cart(app, client):
+    client.post('/api/agregar/choco')
+
+    response = client.post('/procesar_pedido', data={"delivery_day": "Lunes"})
+
+    assert response.status_code == 200
+    assert client.get('/api/carrito').get_json()["carrito"] == {}
+    with app.app_context():
+        assert db.session.query(CartLine).count() == 0
+        assert Order.query.one().detalle == {"choco": 1}
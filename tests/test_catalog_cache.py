@@ -0,0 +1,65 @@
+import pytest
+from coraksmart.cache import catalog_cache, price_cache
+from coraksmart.extensions import db
+from coraksmart.models import Product
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱', 'logged_in': True}
+
+
+def _crear_producto(app, **kwargs):
+    with app.app_context():
+        db.session.add(Product(**kwargs))
+        db.session.commit()
+
+
+def test_cart_endpoints_reuse_cached_catalog(app, client):
+    _crear_producto(app, id="choco", nombre="Chocolate", precio=5.0)
+
+    response = client.post('/api/agregar/choco')
+    assert response.get_json()["productos_detalle"]["choco"]["nombre"] == "Chocolate"
+    misses = catalog_cache.misses, price_cache.misses
+
+    client.get('/api/carrito')
+    client.post('/api/agregar/choco')
+    client.post('/api/quitar/choco')
+
+    assert (catalog_cache.misses, price_cache.misses) == misses
+    assert price_cache.hits >= 3
+
+
+def test_product_write_bumps_catalog_version(app, client):
+    _crear_producto(app, id="choco", nombre="Chocolate", precio=5.0)
+    client.post('/api/agregar/choco')
+    misses = catalog_cache.misses
+
+    with app.app_context():
+        db.session.get(Product, "choco").precio = 7.5
+        db.session.commit()
+
+    detalle = client.get('/api/carrito').get_json()["productos_detalle"]
+    assert detalle["choco"]["precio"] == 7.5
+    assert catalog_cache.misses == misses + 1
+
+
+def test_admin_delete_invalidates_catalog(app, client):
+    _crear_producto(app, id="choco", nombre="Chocolate", precio=5.0)
+    client.post('/api/agregar/choco')
+
+    assert client.post('/admin/eliminar-producto/choco').status_code == 200
+
+    assert client.get('/api/carrito').get_json()["productos_detalle"] == {}
+
+
+def test_checkout_prices_from_cached_catalog(app, client):
+    _crear_producto(app, id="choco", nombre="Chocolate", precio=5.0, aura_multiplier=2.0)
+    client.post('/api/agregar/choco')
+    client.post('/api/agregar/choco')
+    misses = catalog_cache.misses
+
+    response = client.post('/procesar_pedido', data={"delivery_day": "Lunes"})
+
+    assert response.get_json()["success"] is True
+    assert catalog_cache.misses == misses
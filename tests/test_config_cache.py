@@ -0,0 +1,56 @@
+import json
+import pytest
+from sqlalchemy import update
+from coraksmart.cache import CONFIG_VERSION_KEY
+from coraksmart.extensions import db
+from coraksmart.helpers import config_cache, get_config
+from coraksmart.models import Config
+
+
+@pytest.fixture
+def seed():
+    return [Config(key="whatsapp_1", value="111")]
+
+
+def _escribir_desde_otro_worker(key, value):
+    # Cambios hechos por otro proceso: sin pasar por la sesión de este.
+    with db.engine.begin() as conn:
+        conn.execute(update(Config).where(Config.key == key).values(value=value))
+        conn.execute(update(Config).where(Config.key == CONFIG_VERSION_KEY).values(value="otro-worker"))
+
+
+def test_config_is_served_from_cache_within_ttl(ctx):
+    assert get_config()["whatsapp_1"] == "111"
+    misses = config_cache.misses
+
+    _escribir_desde_otro_worker("whatsapp_1", "222")
+
+    assert get_config()["whatsapp_1"] == "111"
+    assert config_cache.misses == misses
+
+
+def test_expired_ttl_reloads_when_version_changed(ctx, monkeypatch):
+    monkeypatch.setattr(config_cache, "ttl", 0)
+    get_config()
+    _escribir_desde_otro_worker("whatsapp_1", "222")
+    db.session.remove()
+
+    assert get_config()["whatsapp_1"] == "222"
+
+
+def test_local_config_write_invalidates_immediately(ctx):
+    get_config()
+
+    db.session.get(Config, "whatsapp_1").value = "333"
+    db.session.commit()
+
+    assert get_config()["whatsapp_1"] == "333"
+    assert "_config_version" not in get_config()
+
+
+def test_cache_status_command_reports_caches(app, ctx):
+    result = app.test_cli_runner().invoke(args=["cache-status"])
+
+    status = json.loads(result.output)
+    assert set(status) == {"catalog", "prices", "aura_levels", "config"}
+    assert status["config"]["entries"] == 1
@@ -0,0 +1,48 @@
+import base64
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import Emoji, User
+
+
+@pytest.fixture
+def seed():
+    return [*(Emoji(emoji=e) for e in ["🐱", "🐶", "🦊", "🐸"]), User(emoji="🐶", password_hash="x")]
+
+
+def test_full_listing_keeps_existing_shape(client):
+    data = client.get('/api/get-emojis').get_json()
+
+    assert data == {"all_emojis": ["🐱", "🐶", "🦊", "🐸"], "occupied_emojis": ["🐶"]}
+
+
+def test_compact_occupancy_formats(client):
+    indices = client.get('/api/get-emojis?format=indices').get_json()
+    bitmap = client.get('/api/get-emojis?format=bitmap').get_json()
+
+    assert indices["occupied_indices"] == [1]
+    assert base64.b64decode(bitmap["occupied_bitmap"]) == bytes([0b10])
+    assert client.get('/api/get-emojis?format=xml').status_code == 400
+
+
+def test_unchanged_emojis_answer_304(client):
+    first = client.get('/api/get-emojis')
+    etag = first.headers["ETag"]
+
+    second = client.get('/api/get-emojis', headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert client.get('/api/get-emojis?format=bitmap', headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_registration_changes_etag_but_aura_updates_do_not(app, client):
+    etag = client.get('/api/get-emojis').headers["ETag"]
+    with app.app_context():
+        db.session.get(User, "🐶").aura_points = 50
+        db.session.commit()
+    assert client.get('/api/get-emojis', headers={"If-None-Match": etag}).status_code == 304
+
+    client.post('/api/emoji-access', json={"emoji": "🦊", "password": "secreto"})
+
+    response = client.get('/api/get-emojis', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["occupied_emojis"] == ["🐶", "🦊"]
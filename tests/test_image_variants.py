@@ -0,0 +1,68 @@
+import io
+import json
+import os
+
+from PIL import Image
+from coraksmart.extensions import db
+from coraksmart.images import generar_variantes
+from coraksmart.models import Product
+
+
+def _png(ancho, alto, color=(200, 30, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", (ancho, alto), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _gif_animado(frames=3):
+    buf = io.BytesIO()
+    imagenes = [Image.new("RGB", (40, 40), (i * 80, 0, 0)) for i in range(frames)]
+    imagenes[0].save(buf, "GIF", save_all=True, append_images=imagenes[1:], duration=80, loop=0)
+    return buf.getvalue()
+
+
+def test_variants_are_resized_webp_with_content_hashed_names():
+    variantes = generar_variantes(_png(1200, 600), "Foto Grande.png")
+
+    assert set(variantes) == {"webp", "thumb", "medium"}
+    for clave, (nombre, contenido) in variantes.items():
+        assert nombre.startswith(f"Foto_Grande.{clave}.") and nombre.endswith(".webp")
+        assert Image.open(io.BytesIO(contenido)).format == "WEBP"
+    assert Image.open(io.BytesIO(variantes["thumb"][1])).size == (160, 80)
+    assert Image.open(io.BytesIO(variantes["webp"][1])).size == (1200, 600)
+    # Mismo contenido, mismo nombre; otro contenido, otro nombre.
+    assert generar_variantes(_png(1200, 600), "Foto Grande.png")["thumb"][0] == variantes["thumb"][0]
+    assert generar_variantes(_png(1200, 600, (0, 0, 0)), "Foto Grande.png")["thumb"][0] != variantes["thumb"][0]
+
+
+def test_animated_gifs_stay_animated_and_small_images_are_not_upscaled():
+    variantes = generar_variantes(_gif_animado(), "flame.gif")
+
+    thumb = Image.open(io.BytesIO(variantes["thumb"][1]))
+    assert thumb.size == (40, 40)
+    assert thumb.n_frames == 3
+
+
+def test_cli_builds_variants_for_static_and_links_products(app, ctx, client_factory, tmp_path):
+    (tmp_path / "choco.png").write_bytes(_png(800, 800))
+    (tmp_path / "notas.txt").write_text("no es imagen")
+    db.session.add(Product(id="choco", nombre="Chocolate", precio=5.0, imagen="/static/choco.png"))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["build-image-variants", "--folder", str(tmp_path)])
+
+    assert result.exit_code == 0, result.output
+    manifest = json.loads((tmp_path / "variants" / "manifest.json").read_text())
+    assert list(manifest) == ["choco.png"]
+    thumb = manifest["choco.png"]["thumb"]
+    assert os.path.exists(tmp_path / thumb.lstrip("/"))
+    variantes = db.session.get(Product, "choco").imagen_variantes
+    assert variantes["/static/choco.png"]["thumb"] == thumb
+
+    client = client_factory(logged_in_user_emoji='🐱')
+    detalle = client.post('/api/agregar/choco').get_json()["productos_detalle"]
+    assert detalle["choco"]["imagen"] == thumb
+
+    # Una segunda corrida no regenera lo que no cambió.
+    again = app.test_cli_runner().invoke(args=["build-image-variants", "--folder", str(tmp_path)])
+    assert "(0 -> 0 bytes rebuilt); 0 products updated" in again.output
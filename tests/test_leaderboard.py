@@ -0,0 +1,98 @@
+import pytest
+from coraksmart.cache import AuraLevelIndex
+from coraksmart.extensions import db
+from coraksmart.leaderboard import LeaderboardIndex, reconstruir_histograma
+from coraksmart.models import AuraLevel, AuraScoreCount, Emoji, Order, User
+
+
+@pytest.fixture
+def seed():
+    return [
+        AuraLevel(level=1, points_needed=10, name="Chispa"),
+        AuraLevel(level=2, points_needed=100, name="Llama"),
+        Emoji(emoji="🦊"),
+        User(emoji="🐱", password_hash="x", aura_points=120),
+        User(emoji="🐶", password_hash="x", aura_points=50),
+        User(emoji="🐸", password_hash="x", aura_points=50),
+        User(emoji="🐭", password_hash="x", aura_points=0),
+        Order(id="a", user_emoji="🐭", aura_ganada=80, completado=False),
+        Order(id="b", user_emoji="🐶", aura_ganada=10, completado=True),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in': True, 'logged_in_user_emoji': '🐶'}
+
+
+def _histograma(app):
+    with app.app_context():
+        return {p: n for p, n in db.session.execute(
+            db.select(AuraScoreCount.aura_points, AuraScoreCount.usuarios).where(AuraScoreCount.usuarios > 0))}
+
+
+def _reconstruido(app):
+    with app.app_context():
+        reconstruir_histograma()
+        db.session.commit()
+    return _histograma(app)
+
+
+def test_histogram_follows_order_completion_and_registration(app, client):
+    assert _histograma(app) == {0: 1, 50: 2, 120: 1}
+
+    client.post('/admin/completar-pedido/a')
+    client.post('/admin/completar-pedidos', json={"ids": ["b"], "accion": "desmarcar"})
+    client.post('/api/emoji-access', json={"emoji": "🦊", "password": "secreto"})
+    with app.app_context():
+        db.session.get(User, "🐸").aura_points = 7
+        db.session.commit()
+
+    esperado = {0: 1, 7: 1, 40: 1, 80: 1, 120: 1}
+    assert _histograma(app) == esperado
+    assert _reconstruido(app) == esperado
+
+
+def test_top_is_paginated_by_cursor_with_shared_positions(client):
+    data = client.get('/api/leaderboard?limit=2').get_json()
+
+    assert [(u["emoji"], u["posicion"]) for u in data["usuarios"]] == [("🐱", 1), ("🐸", 2)]
+    assert data["usuarios"][0]["level_name"] == "Llama"
+    assert data["total"] == 4
+
+    resto = client.get(f'/api/leaderboard?limit=2&cursor={data["next_cursor"]}').get_json()
+    assert [(u["emoji"], u["posicion"]) for u in resto["usuarios"]] == [("🐶", 2), ("🐭", 4)]
+    assert resto["next_cursor"] is None
+    assert client.get('/api/leaderboard?cursor=xx').status_code == 400
+
+
+def test_my_position_and_level_counts_follow_aura_changes(client):
+    assert client.get('/api/leaderboard/me').get_json()["posicion"] == 2
+
+    client.post('/admin/completar-pedido/a')
+
+    me = client.get('/api/leaderboard/me').get_json()
+    assert (me["aura_points"], me["posicion"], me["total"]) == (50, 3, 4)
+    niveles = client.get('/api/leaderboard/niveles').get_json()["niveles"]
+    assert [(n["name"], n["usuarios"]) for n in niveles] == [("Chispa", 3), ("Llama", 1)]
+
+
+def test_index_counts_users_below_every_threshold_in_the_default_level():
+    index = LeaderboardIndex([(0, 3), (15, 1), (100, 2), (250, 0)])
+    niveles = AuraLevelIndex([{"level": 1, "points_needed": 10}, {"level": 2, "points_needed": 100}])
+
+    assert index.total == 6
+    assert [index.posicion(p) for p in (100, 15, 0, 500)] == [1, 3, 4, 1]
+    assert index.por_nivel(niveles) == {1: 4, 2: 2}
+
+
+def test_rebuild_command_restores_the_histogram(app, client):
+    with app.app_context():
+        db.session.execute(db.delete(AuraScoreCount))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-leaderboard"])
+
+    assert result.exit_code == 0, result.output
+    assert _histograma(app) == {0: 1, 50: 2, 120: 1}
+    assert client.get('/api/leaderboard/me').get_json()["total"] == 4
@@ -0,0 +1,41 @@
+import pytest
+from coraksmart.models import Product
+
+
+@pytest.fixture
+def seed():
+    return [Product(id="choco", nombre="Chocolate", precio=5.0)]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱'}
+
+
+def _valor(texto, metrica):
+    for linea in texto.splitlines():
+        if linea.startswith(metrica + " "):
+            return float(linea.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_report_latency_sql_and_size_per_endpoint(client):
+    antes = client.get('/metrics').get_data(as_text=True)
+    latencia = 'coraksmart_request_duration_seconds_count{endpoint="api_carrito",method="GET"}'
+    sentencias = 'coraksmart_sql_statements_per_request_sum{endpoint="api_carrito"}'
+
+    client.get('/api/carrito')
+    client.get('/api/carrito')
+
+    texto = client.get('/metrics').get_data(as_text=True)
+    assert _valor(texto, latencia) - _valor(antes, latencia) == 2
+    assert _valor(texto, sentencias) > _valor(antes, sentencias)
+    assert 'coraksmart_response_size_bytes_count{endpoint="api_carrito"}' in texto
+    assert 'coraksmart_cache_lookups_total{cache="prices",result="hit"}' in texto
+
+
+def test_metrics_token_is_enforced(client, monkeypatch):
+    monkeypatch.setattr("coraksmart.metrics.METRICS_TOKEN", "s3cr3t")
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={"Authorization": "Bearer s3cr3t"}).status_code == 200
@@ -0,0 +1,63 @@
+import threading
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import Order, Config, Product, User
+from coraksmart.orders import OrderSequence, ORDER_SEQUENCE_KEY, generar_id_pedido, codificar_numero
+
+CLIENTES = 16
+# Menos conexiones que checkouts simultáneos: pool_size + max_overflow = 3.
+POOL_CHICO = {"SQLALCHEMY_ENGINE_OPTIONS": {"pool_size": 2, "max_overflow": 1, "pool_timeout": 5}}
+
+
+def test_sequence_continues_from_existing_orders(ctx):
+    for i in range(3):
+        db.session.add(Order(id=f"old-{i}"))
+    db.session.commit()
+
+    sequence = OrderSequence(block_size=5)
+
+    assert [sequence.next() for _ in range(7)] == list(range(3, 10))
+    assert db.session.get(Config, ORDER_SEQUENCE_KEY).value == "13"
+
+
+def test_workers_get_disjoint_blocks(ctx):
+    worker_a = OrderSequence(block_size=4)
+    worker_b = OrderSequence(block_size=4)
+
+    numeros = [worker_a.next(), worker_b.next(), worker_a.next(), worker_b.next()]
+
+    assert sorted(numeros) == [0, 1, 4, 5]
+
+
+def test_order_id_keeps_encoded_format(ctx):
+    parte_pedido = generar_id_pedido().split("-")[2]
+
+    assert parte_pedido == codificar_numero(100)
+
+
+@pytest.mark.parametrize("app_config", [POOL_CHICO])
+def test_checkouts_beyond_the_pool_size_all_get_a_number(app, client_factory, en_paralelo):
+    with app.app_context():
+        db.session.add(Product(id="choco", nombre="Chocolate", precio=5.0))
+        db.session.add_all([User(emoji=f"u{i}", password_hash="x") for i in range(CLIENTES)])
+        db.session.commit()
+    clientes = [client_factory(logged_in_user_emoji=f"u{i}") for i in range(CLIENTES)]
+    for client in clientes:
+        client.post('/api/agregar/choco')
+    estados = []
+    salida = threading.Barrier(CLIENTES)
+
+    def comprar(client):
+        def trabajo():
+            salida.wait()
+            estados.append(client.post('/procesar_pedido', data={}).status_code)
+        return trabajo
+
+    # El bloque de números se reserva con la secuencia fría, a la vez que
+    # los demás checkouts ocupan el pool.
+    en_paralelo([comprar(c) for c in clientes])
+
+    assert estados == [200] * CLIENTES
+    with app.app_context():
+        numeros = [order_id.split("-")[2] for order_id in db.session.execute(db.select(Order.id)).scalars()]
+    assert sorted(numeros) == sorted(codificar_numero(100 + n) for n in range(CLIENTES))
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import OutboxEvent, Product, User
+from coraksmart.outbox import _outbox_handlers, emitir_evento, procesar_outbox, reclamar_eventos
+
+
+@pytest.fixture
+def handlers():
+    registrados = []
+
+    def registrar(topic, fn):
+        _outbox_handlers[topic].append(fn)
+        registrados.append((topic, fn))
+    yield registrar
+    for topic, fn in registrados:
+        _outbox_handlers[topic].remove(fn)
+
+
+def test_events_are_written_only_with_their_transaction(ctx):
+    emitir_evento("prueba", {"n": 1})
+    db.session.rollback()
+    emitir_evento("prueba", {"n": 2})
+    db.session.commit()
+
+    assert [e.payload for e in OutboxEvent.query.all()] == [{"n": 2}]
+
+
+def test_worker_runs_handlers_and_retries_failures(ctx, handlers):
+    vistos = []
+    handlers("prueba", lambda payload: vistos.append(payload["n"]))
+
+    def falla(payload):
+        raise RuntimeError("webhook caído")
+    handlers("roto", falla)
+
+    emitir_evento("prueba", {"n": 1})
+    emitir_evento("roto", {})
+    emitir_evento("prueba", {"n": 2})
+    db.session.commit()
+
+    assert procesar_outbox() == 3
+    assert vistos == [1, 2]
+    roto = OutboxEvent.query.filter_by(topic="roto").one()
+    assert roto.processed_at is None
+    assert roto.attempts == 1 and "webhook caído" in roto.last_error
+    # El reintento espera su backoff: no se vuelve a tomar de inmediato.
+    assert procesar_outbox() == 0
+
+
+def test_claimed_events_are_not_handed_out_twice(ctx):
+    for n in range(5):
+        emitir_evento("prueba", {"n": n})
+    db.session.commit()
+
+    primeros = reclamar_eventos(3)
+    resto = reclamar_eventos(10)
+
+    assert [e.id for e in primeros] == [1, 2, 3]
+    assert [e.id for e in resto] == [4, 5]
+    assert reclamar_eventos(10) == []
+
+
+def test_checkout_enqueues_order_event(app, ctx, handlers, client_factory, query_budget):
+    db.session.add_all([Product(id="choco", nombre="Chocolate", precio=5.0), User(emoji="🐱", password_hash="x")])
+    db.session.commit()
+    pedidos = []
+    handlers("pedido_creado", pedidos.append)
+
+    client = client_factory(logged_in_user_emoji='🐱')
+    client.post('/api/agregar/choco')
+    with query_budget() as queries:
+        response = client.post('/procesar_pedido', data={"delivery_day": "Lunes"})
+
+    assert response.get_json()["whatsapp_link"].startswith("https://wa.me/")
+    # pedido_creado y rollup_ventas van en un solo INSERT.
+    assert sum(sql.startswith("INSERT INTO outbox_event") for sql in queries.statements) == 1
+    assert pedidos == []
+    result = app.test_cli_runner().invoke(args=["outbox-worker", "--once"])
+    assert "Processed 2 outbox events." in result.output
+    assert pedidos[0]["user_emoji"] == "🐱" and pedidos[0]["total"] == 5.0
+
+
+def test_purge_deletes_only_old_processed_events(app, ctx):
+    ahora = time.time()
+    db.session.add_all([
+        OutboxEvent(topic="viejo", payload={}, created_at=0, available_at=0, attempts=0, processed_at=ahora - 3600),
+        OutboxEvent(topic="reciente", payload={}, created_at=0, available_at=0, attempts=0, processed_at=ahora - 60),
+        OutboxEvent(topic="agotado", payload={}, created_at=0, available_at=0, attempts=8, last_error="x"),
+        OutboxEvent(topic="pendiente", payload={}, created_at=0, available_at=0, attempts=0),
+    ])
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["purge-outbox", "--max-age", "600"])
+
+    assert "Purged 1 outbox events." in result.output
+    assert sorted(e.topic for e in OutboxEvent.query.all()) == ["agotado", "pendiente", "reciente"]
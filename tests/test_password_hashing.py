@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import signal
+import threading
+import pytest
+from coraksmart.models import Emoji, User
+from coraksmart.security import LoginThrottle, PasswordHasher, HashingBusy, login_throttle
+from werkzeug.security import generate_password_hash
+
+
+@pytest.fixture
+def seed():
+    return [Emoji(emoji="🐱"), User(emoji="🐱", password_hash=generate_password_hash("secreto"))]
+
+
+@pytest.fixture(autouse=True)
+def _olvidar_fallos():
+    yield
+    login_throttle.limpiar()
+
+
+def test_hasher_rejects_when_queue_is_full():
+    liberar = threading.Event()
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+    ocupado = threading.Thread(target=hasher.run, args=(liberar.wait,))
+    ocupado.start()
+    try:
+        with pytest.raises(HashingBusy):
+            hasher.run(lambda: None)
+    finally:
+        liberar.set()
+        ocupado.join()
+
+    assert hasher.run(lambda: 42) == 42
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["completed"] == 2
+
+
+def test_hasher_limit_is_shared_by_forked_workers():
+    # Como gunicorn con workers sync y preload_app: el hasher se crea antes
+    # del fork y cada proceso atiende un solo request a la vez.
+    fork = multiprocessing.get_context("fork")
+    calculando, liberar = fork.Event(), fork.Event()
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+
+    def hash_lento():
+        calculando.set()
+        liberar.wait(10)
+
+    worker = fork.Process(target=hasher.run, args=(hash_lento,))
+    worker.start()
+    try:
+        assert calculando.wait(10)
+        with pytest.raises(HashingBusy):
+            hasher.run(lambda: None)
+    finally:
+        liberar.set()
+        worker.join(10)
+
+    assert worker.exitcode == 0
+    assert hasher.run(lambda: 42) == 42
+
+
+def test_slots_of_a_killed_worker_are_returned():
+    fork = multiprocessing.get_context("fork")
+    calculando = fork.Event()
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+
+    def hash_eterno():
+        calculando.set()
+        threading.Event().wait()
+
+    worker = fork.Process(target=hasher.run, args=(hash_eterno,))
+    worker.start()
+    assert calculando.wait(10)
+    os.kill(worker.pid, signal.SIGKILL)
+    worker.join(10)
+
+    with pytest.raises(HashingBusy):
+        hasher.run(lambda: None)
+    # Lo que hace el hook child_exit de gunicorn.conf.py.
+    assert hasher.liberar_de(worker.pid) == 2
+    assert hasher.run(lambda: 42) == 42
+
+
+def test_failures_count_across_forked_workers():
+    fork = multiprocessing.get_context("fork")
+    throttle = LoginThrottle(max_failures=3)
+
+    for _ in range(2):
+        worker = fork.Process(target=throttle.fallo, args=("🐱",))
+        worker.start()
+        worker.join(10)
+    throttle.fallo("🐱")
+
+    assert throttle.bloqueado("🐱")
+    assert not throttle.bloqueado("🐶")
+    throttle.exito("🐱")
+    assert not throttle.bloqueado("🐱")
+
+
+def test_login_goes_through_hasher(client):
+    response = client.post('/api/emoji-access', json={"emoji": "🐱", "password": "secreto"})
+
+    assert response.get_json()["success"] is True
+
+
+def test_repeated_failures_are_rejected_without_hashing(client, monkeypatch):
+    monkeypatch.setattr(login_throttle, "max_failures", 2)
+    for _ in range(2):
+        client.post('/api/emoji-access', json={"emoji": "🐱", "password": "mala"})
+
+    response = client.post('/api/emoji-access', json={"emoji": "🐱", "password": "secreto"})
+
+    assert response.status_code == 429
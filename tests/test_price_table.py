@@ -0,0 +1,77 @@
+import pytest
+from coraksmart.cache import PriceTable, cotizar_carrito
+from coraksmart.extensions import db
+from coraksmart.models import Order, Product, User
+
+
+PRODUCTOS = {
+    "choco": {"nombre": "Chocolate", "precio": 5.0, "aura_multiplier": 2.0, "whatsapp_asignado": "2",
+              "variaciones": {"grande": {"precio": 8.0}}, "bundle_precio": None, "imagen": "choco.png"},
+    "pack": {"nombre": "Pack", "precio": 20.0, "aura_multiplier": None, "whatsapp_asignado": None,
+             "variaciones": {"mini": {"precio": 1.0}}, "bundle_precio": 12.0},
+    "te-verde": {"nombre": "Té verde", "precio": 4.0, "aura_multiplier": 0, "whatsapp_asignado": "3"},
+}
+
+
+def test_table_resolves_variations_bundles_and_defaults():
+    precios = PriceTable(PRODUCTOS)
+
+    assert precios.get("choco") == (5.0, 10.0, "Chocolate", "2", "choco", "choco.png")
+    assert precios.get("choco-grande").precio == 8.0
+    # Una variación desconocida se cobra al precio base.
+    assert precios.get("choco-otra").precio == 5.0
+    # El precio de bundle gana sobre la variación; sin multiplicador se usa el 3.0 de siempre.
+    assert precios.get("pack-mini")[:2] == (12.0, 36.0)
+    assert precios.get("pack").whatsapp == "1"
+    # Ids con guion se resuelven por su clave exacta, y un multiplicador 0 no da aura.
+    assert precios.get("te-verde")[:2] == (4.0, 0.0)
+    assert precios.get("te-verde-grande").base_id == "te-verde"
+    assert precios.get("choco-grande-xl").base_id == "choco"
+    assert precios.get("nada") is None
+
+
+def test_quote_prices_the_cart_in_one_pass():
+    cotizacion = cotizar_carrito({"choco-grande": 2, "pack": 1, "te-verde": 3}, PriceTable(PRODUCTOS))
+
+    assert cotizacion.total == 8.0 * 2 + 12.0 + 4.0 * 3
+    assert cotizacion.aura == 32 + 36 + 0
+    assert cotizacion.whatsapp_counts == {"1": 1, "2": 2, "3": 3}
+    assert cotizacion.detalle["choco-grande"] == {"product_id": "choco", "nombre": "Chocolate", "precio": 8.0, "cantidad": 2, "subtotal": 16.0}
+    assert cotizacion.faltantes == []
+
+    assert cotizar_carrito({"nada-x": 1}, PriceTable(PRODUCTOS)).faltantes == ["nada"]
+
+
+@pytest.fixture
+def seed():
+    return [
+        Product(id="choco", nombre="Chocolate", precio=5.0, aura_multiplier=2.0,
+                variaciones={"grande": {"precio": 8.0}}),
+        User(emoji="🐱", password_hash="x"),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱'}
+
+
+def test_checkout_and_cart_detail_share_the_price_table(app, client):
+    client.post('/api/agregar/choco-grande')
+    detalle = client.post('/api/agregar/choco-grande').get_json()["productos_detalle"]
+    assert detalle["choco-grande"]["precio"] == 8.0
+
+    assert client.post('/procesar_pedido', data={"delivery_day": "Lunes"}).status_code == 200
+    with app.app_context():
+        order = Order.query.one()
+        assert (order.total, order.aura_ganada) == (16.0, 32)
+
+
+def test_price_table_is_rebuilt_when_products_change(app, client):
+    client.post('/api/agregar/choco')
+    with app.app_context():
+        db.session.get(Product, "choco").variaciones = {"grande": {"precio": 9.5}}
+        db.session.commit()
+
+    detalle = client.post('/api/agregar/choco-grande').get_json()["productos_detalle"]
+    assert detalle["choco-grande"]["precio"] == 9.5
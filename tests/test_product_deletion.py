@@ -1,5 +1,7 @@
 import pytest
-from app import app, db, Product
+from app import app
+from coraksmart.extensions import db
+from coraksmart.models import Product
 import json
 import uuid
 
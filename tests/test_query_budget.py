@@ -0,0 +1,93 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from coraksmart.extensions import db
+from coraksmart.models import AuraLevel, Emoji, Order, Product, User
+from coraksmart.helpers import get_productos
+from coraksmart.querybudget import QueryBudgetExceeded
+
+
+@pytest.fixture
+def seed():
+    return [
+        Product(id="choco", nombre="Chocolate", precio=5.0),
+        Product(id="gomitas", nombre="Gomitas", precio=3.0),
+        AuraLevel(level=1, points_needed=0, name="Chispa"),
+        Emoji(emoji="🐱"),
+        User(emoji="🐱", password_hash=generate_password_hash("secreto", method="pbkdf2:sha256:1000")),
+        Order(id="pedido-1", user_emoji="🐱", aura_ganada=10, completado=False),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱', 'logged_in': True}
+
+
+def test_recorder_flags_repeated_statements(ctx, query_budget):
+    with query_budget(n_plus_one_threshold=3) as queries:
+        for product_id in ("a", "b", "c"):
+            db.session.get(Product, product_id)
+
+    assert queries.count == 3
+    assert queries.repeated()[0][1] == 3
+
+
+def test_recorder_raises_over_budget(ctx, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match="2 sentencias SQL, presupuesto 1"):
+        with query_budget(1):
+            Product.query.all()
+            User.query.all()
+
+
+def test_cold_budget_applies_only_when_a_cache_reloads(ctx, query_budget):
+    with query_budget(1, budget_frio=3) as queries:
+        get_productos()
+        User.query.all()
+    assert queries.en_frio and queries.presupuesto == 3
+
+    with pytest.raises(QueryBudgetExceeded, match="presupuesto 1"):
+        with query_budget(1, budget_frio=3):
+            get_productos()
+            User.query.all()
+            Order.query.all()
+
+
+def test_warm_checkout_has_its_own_budget(app, client):
+    app.config['QUERY_BUDGET_MODE'] = "header"
+    presupuestos = []
+    for _ in range(3):
+        client.post('/api/agregar/choco')
+        response = client.post('/procesar_pedido', data={"delivery_day": "Lunes"})
+        presupuestos.append(response.headers["X-Query-Budget"])
+        assert int(response.headers["X-Query-Count"]) <= int(response.headers["X-Query-Budget"])
+
+    # Sólo el primero recarga las cachés; la reserva de números no cuenta.
+    assert presupuestos == ["10", "7", "7"]
+
+
+def test_hot_routes_stay_within_declared_budgets(app, client):
+    app.config['QUERY_BUDGET_MODE'] = "raise"
+
+    # Dos pasadas: con las cachés frías y ya calientes.
+    for _ in range(2):
+        client.get('/api/get-emojis')
+        client.post('/api/emoji-access', json={"emoji": "🐱", "password": "secreto"})
+        client.post('/api/agregar/choco')
+        client.post('/api/agregar/gomitas')
+        client.get('/api/carrito')
+        client.post('/api/quitar/gomitas')
+        client.get('/api/profile')
+        client.get('/api/leaderboard')
+        client.get('/api/leaderboard/me')
+        client.get('/api/leaderboard/niveles')
+        assert client.post('/procesar_pedido', data={"delivery_day": "Lunes"}).status_code == 200
+        client.post('/admin/completar-pedido/pedido-1')
+
+
+def test_header_mode_reports_query_counts(app, client):
+    app.config['QUERY_BUDGET_MODE'] = "header"
+
+    response = client.get('/api/carrito')
+
+    assert response.headers["X-Query-Budget"] == "3"
+    assert int(response.headers["X-Query-Count"]) <= 3
@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from coraksmart.extensions import db
+from coraksmart.models import CartLine, Product, User
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {
+        "REPLICA_DATABASE_URI": f"sqlite:///{tmp_path / 'replica.db'}",
+        "REPLICA_MAX_LAG": 2,
+        "REPLICA_LAG_CHECK_INTERVAL": 0,
+        "READ_YOUR_WRITES_WINDOW": 5,
+    }
+
+
+@pytest.fixture
+def seed():
+    return [User(emoji="🐱", password_hash="x", aura_points=50), Product(id="choco", nombre="Chocolate", precio=5.0)]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱'}
+
+
+@pytest.fixture
+def replica_app(app):
+    replica = app.extensions["replica_engine"]
+    db.metadata.create_all(replica)
+    # La réplica va atrás: todavía no ve los últimos puntos.
+    with replica.begin() as conn:
+        conn.execute(User.__table__.insert().values(emoji="🐱", password_hash="x", aura_points=10))
+    return app
+
+
+def _puntos(client):
+    return client.get('/api/profile').get_json()["aura_points"]
+
+
+def test_read_only_routes_read_from_the_replica(replica_app, client_factory):
+    client = client_factory()
+
+    assert _puntos(client) == 10
+    # Las rutas que escriben siguen en la principal.
+    assert client.post('/api/agregar/choco').status_code == 200
+    with replica_app.app_context():
+        assert CartLine.query.count() == 1
+
+
+def test_client_reads_its_own_writes_for_a_window(replica_app, client_factory, monkeypatch):
+    client = client_factory()
+    client.post('/api/agregar/choco')
+
+    assert _puntos(client) == 50
+    assert client.get('/api/carrito').get_json()["carrito"] == {"choco": 1}
+    # Otro cliente sin escrituras recientes sigue en la réplica.
+    assert _puntos(client_factory()) == 10
+
+    import coraksmart.replica as replica
+    ahora = replica.time.time()
+    monkeypatch.setattr(replica.time, "time", lambda: ahora + 11)
+    assert _puntos(client) == 10
+
+
+def test_writes_inside_the_window_do_not_resend_the_cookie(replica_app, client_factory, monkeypatch):
+    import coraksmart.replica as replica
+    ahora = replica.time.time()
+    reloj = [ahora]
+    monkeypatch.setattr(replica.time, "time", lambda: reloj[0])
+    client = client_factory()
+
+    assert "Set-Cookie" in client.post('/api/agregar/choco').headers
+    reloj[0] = ahora + 4
+    assert "Set-Cookie" not in client.post('/api/agregar/choco').headers
+    # Queda menos de una ventana: se renueva, y cubre otra ventana completa.
+    reloj[0] = ahora + 6
+    assert "Set-Cookie" in client.post('/api/agregar/choco').headers
+    reloj[0] = ahora + 10.5
+    assert _puntos(client) == 50
+
+
+def test_lagging_or_missing_replica_falls_back_to_primary(replica_app, client_factory, monkeypatch):
+    monitor = replica_app.extensions["replica_monitor"]
+    client = client_factory()
+
+    monkeypatch.setattr(monitor, "medir", lambda engine: 30.0)
+    assert _puntos(client) == 50
+
+    def caida(engine):
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+    monkeypatch.setattr(monitor, "medir", caida)
+    assert _puntos(client) == 50
+
+
+@pytest.mark.parametrize("app_config", [{"REPLICA_DATABASE_URI": None}])
+def test_without_replica_everything_uses_the_primary(app, client_factory):
+    client = client_factory()
+
+    assert _puntos(client) == 50
+    client.post('/api/agregar/choco')
+    # El primer producto fija cart_sid; después la sesión no cambia.
+    response = client.post('/api/agregar/choco')
+    assert "Set-Cookie" not in response.headers
+
+
+def test_lag_probe_does_not_count_against_the_route_budget(replica_app, client_factory):
+    # REPLICA_LAG_CHECK_INTERVAL es 0: cada request mide el retraso.
+    replica_app.config["QUERY_BUDGET_MODE"] = "raise"
+    client = client_factory(logged_in=True)
+
+    response = client.get('/admin/api/pedidos')
+
+    assert response.status_code == 200
+    assert response.headers["X-Query-Count"] == "1"
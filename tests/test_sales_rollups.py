@@ -0,0 +1,152 @@
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import Order, Product, SalesByProductDay, SalesByWhatsappDay, User, OutboxEvent
+from coraksmart.outbox import _outbox_handlers, procesar_outbox
+from coraksmart.rollups import emitir_ventas, quitar_pedido
+
+
+@pytest.fixture
+def seed():
+    return [
+        Product(id="choco", nombre="Chocolate", precio=5.0, whatsapp_asignado="1",
+                variaciones={"grande": {"precio": 8.0}}),
+        Product(id="te-verde", nombre="Té verde", precio=4.0, whatsapp_asignado="1",
+                variaciones={"frio": {"precio": 4.5}}),
+        Product(id="gomitas", nombre="Gomitas", precio=3.0, whatsapp_asignado="2"),
+        User(emoji="🐱", password_hash="x"),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': '🐱', 'logged_in': True}
+
+
+def _pedido(app, client, *cart_ids):
+    for cart_id in cart_ids:
+        client.post(f'/api/agregar/{cart_id}')
+    assert client.post('/procesar_pedido', data={"delivery_day": "Lunes"}).status_code == 200
+    with app.app_context():
+        return db.session.execute(db.select(Order.id).order_by(Order.timestamp.desc())).scalars().first()
+
+
+def _rollups(app):
+    with app.app_context():
+        productos = {(r.product_id, r.variacion): (r.pedidos, r.unidades, r.importe, r.pedidos_completados,
+                                                   r.unidades_completadas, r.importe_completado)
+                     for r in SalesByProductDay.query.all()}
+        whatsapp = {r.whatsapp: (r.pedidos, r.unidades, r.importe, r.pedidos_completados)
+                    for r in SalesByWhatsappDay.query.all()}
+        return productos, whatsapp
+
+
+def _procesar(app):
+    with app.app_context():
+        procesar_outbox()
+
+
+def test_rollups_follow_order_creation_and_completion(app, client):
+    primero = _pedido(app, client, "choco-grande", "choco-grande", "gomitas")
+    _pedido(app, client, "choco", "gomitas", "gomitas", "gomitas")
+    _procesar(app)
+
+    productos, whatsapp = _rollups(app)
+    assert productos == {("choco", "grande"): (1, 2, 16.0, 0, 0, 0), ("choco", ""): (1, 1, 5.0, 0, 0, 0),
+                         ("gomitas", ""): (2, 4, 12.0, 0, 0, 0)}
+    assert whatsapp == {"1": (1, 3, 19.0, 0), "2": (1, 4, 14.0, 0)}
+
+    client.post(f'/admin/completar-pedido/{primero}')
+    client.post('/admin/completar-pedidos', json={"ids": [primero], "accion": "desmarcar"})
+    client.post('/admin/completar-pedidos', json={"ids": [primero], "accion": "completar"})
+    _procesar(app)
+
+    productos, whatsapp = _rollups(app)
+    assert productos[("choco", "grande")] == (1, 2, 16.0, 1, 2, 16.0)
+    assert productos[("gomitas", "")] == (2, 4, 12.0, 1, 1, 3.0)
+    assert whatsapp["1"] == (1, 3, 19.0, 1)
+
+
+def test_repeated_events_are_not_counted_twice(app, client):
+    order_id = _pedido(app, client, "gomitas")
+    with app.app_context():
+        emitir_ventas([order_id])
+        emitir_ventas([order_id])
+        db.session.commit()
+    _procesar(app)
+
+    productos, _ = _rollups(app)
+    assert productos == {("gomitas", ""): (1, 1, 3.0, 0, 0, 0)}
+
+
+def test_failing_webhook_does_not_hold_back_the_rollups(app, client, monkeypatch):
+    def webhook_caido(payload):
+        raise RuntimeError("webhook caído")
+
+    monkeypatch.setitem(_outbox_handlers, "pedido_creado", [webhook_caido])
+    _pedido(app, client, "gomitas")
+    _procesar(app)
+
+    productos, _ = _rollups(app)
+    assert productos == {("gomitas", ""): (1, 1, 3.0, 0, 0, 0)}
+    with app.app_context():
+        pendientes = db.session.execute(
+            db.select(OutboxEvent.topic).where(OutboxEvent.processed_at.is_(None))).scalars().all()
+    assert pendientes == ["pedido_creado"]
+
+
+def test_hyphenated_product_ids_keep_their_variation(app, client):
+    _pedido(app, client, "te-verde-frio", "te-verde")
+    _procesar(app)
+
+    productos, _ = _rollups(app)
+    assert productos == {("te-verde", "frio"): (1, 1, 4.5, 0, 0, 0), ("te-verde", ""): (1, 1, 4.0, 0, 0, 0)}
+
+
+def test_deleted_orders_are_subtracted(app, client):
+    borrado = _pedido(app, client, "choco-grande", "gomitas")
+    _pedido(app, client, "gomitas")
+    client.post(f'/admin/completar-pedido/{borrado}')
+    _procesar(app)
+
+    assert client.post(f'/admin/delete-order/{borrado}').get_json()["success"]
+
+    productos, whatsapp = _rollups(app)
+    assert productos[("choco", "grande")] == (0, 0, 0.0, 0, 0, 0.0)
+    assert productos[("gomitas", "")] == (1, 1, 3.0, 0, 0, 0.0)
+    assert whatsapp == {"1": (0, 0, 0.0, 0), "2": (1, 1, 3.0, 0)}
+    assert client.post(f'/admin/delete-order/{borrado}').status_code == 404
+    with app.app_context():
+        assert not quitar_pedido(borrado)
+
+
+def test_rebuild_command_matches_incremental_rollups(app, client):
+    completado = _pedido(app, client, "choco-grande", "gomitas")
+    _pedido(app, client, "gomitas")
+    client.post(f'/admin/completar-pedido/{completado}')
+    _procesar(app)
+    incrementales = _rollups(app)
+    with app.app_context():
+        db.session.execute(db.delete(SalesByProductDay))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-sales-rollups", "--batch-size", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert "from 2 orders" in result.output
+    assert _rollups(app) == incrementales
+
+
+def test_sales_report_reads_only_the_rollups(app, client, query_budget):
+    _pedido(app, client, "choco-grande", "gomitas", "gomitas")
+    _procesar(app)
+    with app.app_context():
+        dia = db.session.execute(db.select(SalesByWhatsappDay.dia)).scalar()
+
+    with query_budget(5) as queries:
+        data = client.get(f'/admin/api/ventas?desde={dia}&hasta={dia}').get_json()
+
+    assert not any('FROM "order"' in sql for sql in queries.statements)
+    assert [(p["nombre"], p["variacion"], p["unidades"]) for p in data["productos"]] == [
+        ("Gomitas", "", 2), ("Chocolate", "grande", 1)]
+    assert [(d["dia"], d["pedidos"], d["importe"]) for d in data["por_dia"]] == [(dia, 1, 14.0)]
+    assert client.get('/admin/api/ventas?desde=ayer').status_code == 400
@@ -0,0 +1,62 @@
+import gzip
+import json
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from coraksmart.assets import STATIC_MAX_AGE, asset_url, configurar_whitenoise, construir_assets
+
+
+def _no_encontrado(environ, start_response):
+    return Response("no static", status=404)(environ, start_response)
+
+
+@pytest.fixture
+def build(tmp_path):
+    origen = tmp_path / "static"
+    (origen / "js").mkdir(parents=True)
+    (origen / "style.css").write_text("body { color: red; }\n" * 200)
+    (origen / "js" / "game.js").write_text("console.log('hola');\n" * 200)
+    (origen / "logo.png").write_bytes(b"\x89PNG" + b"\x00" * 64)
+    (origen / "flame.thumb.0123456789ab.webp").write_bytes(b"RIFF")
+    destino = tmp_path / "build"
+    manifest = construir_assets(str(origen), str(destino))
+    return manifest, destino
+
+
+def test_build_writes_hashed_copies_compressed_variants_and_manifest(build):
+    manifest, destino = build
+
+    assert set(manifest) == {"style.css", "js/game.js", "logo.png", "flame.thumb.0123456789ab.webp"}
+    assert manifest["js/game.js"].startswith("js/game.") and manifest["js/game.js"].endswith(".js")
+    # Lo que ya trae hash no se vuelve a renombrar.
+    assert manifest["flame.thumb.0123456789ab.webp"] == "flame.thumb.0123456789ab.webp"
+    css = destino / manifest["style.css"]
+    assert gzip.decompress((destino / (manifest["style.css"] + ".gz")).read_bytes()) == css.read_bytes()
+    assert not (destino / (manifest["logo.png"] + ".gz")).exists()
+    assert json.loads((destino / "manifest.json").read_text())["paths"] == manifest
+
+
+def test_whitenoise_serves_hashed_urls_as_immutable(build):
+    manifest, destino = build
+    client = Client(configurar_whitenoise(_no_encontrado, manifest, str(destino)))
+
+    hashed = client.get(f"/static/{manifest['style.css']}", headers={"Accept-Encoding": "gzip"})
+    assert hashed.status_code == 200
+    assert "immutable" in hashed.headers["Cache-Control"]
+    assert hashed.headers["Content-Encoding"] == "gzip"
+
+    original = client.get("/style.css")
+    assert original.status_code == 200
+    assert "immutable" not in original.headers["Cache-Control"]
+    assert f"max-age={STATIC_MAX_AGE}" in original.headers["Cache-Control"]
+
+
+def test_asset_url_resolves_through_the_manifest(app, build, monkeypatch):
+    manifest, _ = build
+    monkeypatch.setitem(app.extensions, "asset_manifest", manifest)
+
+    with app.test_request_context():
+        assert asset_url("js/game.js") == f"/static/{manifest['js/game.js']}"
+        assert asset_url("otro.css") == "/static/otro.css"
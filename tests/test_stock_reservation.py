@@ -0,0 +1,86 @@
+import pytest
+from coraksmart.extensions import db
+from coraksmart.models import CartLine, Order, Product, User
+
+HILOS = 8
+
+
+@pytest.fixture
+def seed():
+    return [
+        Product(id="choco", nombre="Chocolate", precio=5.0, stock=3),
+        Product(id="gomitas", nombre="Gomitas", precio=3.0, stock=10),
+        Product(id="agua", nombre="Agua", precio=1.0, stock=None),
+        Product(id="combo", nombre="Combo", precio=0, bundle_precio=12.0, stock=None,
+                bundle_items=["choco", "gomitas", "gomitas"]),
+        *(User(emoji=f"u{i}", password_hash="x") for i in range(HILOS)),
+    ]
+
+
+@pytest.fixture
+def session_data():
+    return {'logged_in_user_emoji': 'u0'}
+
+
+def _stock(app):
+    with app.app_context():
+        return {p.id: p.stock for p in Product.query.all()}
+
+
+def _comprar(client, *cart_ids):
+    for cart_id in cart_ids:
+        client.post(f'/api/agregar/{cart_id}')
+    return client.post('/procesar_pedido', data={"delivery_day": "Lunes"})
+
+
+def test_checkout_reserves_stock_with_bundles_expanded(app, client_factory):
+    response = _comprar(client_factory(), "combo", "gomitas", "agua")
+
+    assert response.status_code == 200
+    assert _stock(app) == {"choco": 2, "gomitas": 7, "agua": None, "combo": None}
+
+
+def test_short_line_fails_the_whole_order(app, client_factory):
+    client = client_factory()
+    response = _comprar(client, "gomitas", "choco", "choco", "choco", "choco")
+
+    assert response.status_code == 409
+    assert response.get_json()["sin_stock"] == ["choco"]
+    assert _stock(app)["gomitas"] == 10
+    with app.app_context():
+        assert Order.query.count() == 0
+        # El carrito se conserva para que el cliente lo ajuste.
+        assert db.session.query(CartLine).count() == 2
+
+
+def test_racing_checkouts_never_oversell(app, client_factory, en_paralelo):
+    clientes = [client_factory(logged_in_user_emoji=f"u{i}") for i in range(HILOS)]
+    for client in clientes:
+        client.post('/api/agregar/choco')
+    estados = []
+
+    def comprar(client):
+        return lambda: estados.append(client.post('/procesar_pedido', data={}).status_code)
+
+    en_paralelo([comprar(c) for c in clientes])
+
+    assert sorted(estados) == [200] * 3 + [409] * (HILOS - 3)
+    assert _stock(app)["choco"] == 0
+    with app.app_context():
+        assert Order.query.count() == 3
+
+
+def test_product_ids_with_hyphens_are_reserved_whole(app, client_factory):
+    product_id = "1b887a09-24b1-4c39-9d6e-0f1f5e9b2a77"
+    with app.app_context():
+        db.session.add_all([
+            Product(id=product_id, nombre="Paleta", precio=2.0, stock=3, variaciones={"mango": {"precio": 2.5}}),
+            Product(id="combo-paletas", nombre="Combo", precio=0, bundle_precio=4.0, stock=None,
+                    bundle_items=[product_id]),
+        ])
+        db.session.commit()
+
+    response = _comprar(client_factory(), product_id, f"{product_id}-mango", "combo-paletas")
+
+    assert response.status_code == 200, response.get_json()
+    assert _stock(app)[product_id] == 0
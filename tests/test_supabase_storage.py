@@ -0,0 +1,128 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from coraksmart.storage import SupabaseStorage
+
+
+class StorageStandIn(BaseHTTPRequestHandler):
+    """Imita POST /storage/v1/object/<bucket>/<ruta> de Supabase."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers), body, self.client_address))
+            fail = server.fail_next > 0
+            server.fail_next -= 1 if fail else 0
+        status = 503 if fail else 200
+        payload = b'{"Key": "ok"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def storage_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StorageStandIn)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.fail_next = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def storage(storage_server):
+    host, port = storage_server.server_address
+    return SupabaseStorage(f"http://{host}:{port}", "service-key", "media", backoff=0.01)
+
+
+def _archivo(nombre, contenido):
+    return FileStorage(stream=io.BytesIO(contenido), filename=nombre, content_type="image/png")
+
+
+def test_upload_streams_file_and_returns_public_url(storage, storage_server):
+    contenido = b"x" * 200_000
+
+    url = storage.subir(_archivo("foto.png", contenido))
+
+    path, headers, body, _ = storage_server.requests[0]
+    assert body == contenido
+    assert headers["Authorization"] == "Bearer service-key"
+    assert path.startswith("/storage/v1/object/media/uploads/")
+    assert url == storage.public_url(path.split("/media/", 1)[1])
+
+
+def test_upload_retries_server_errors(storage, storage_server):
+    storage_server.fail_next = 2
+
+    storage.subir(_archivo("foto.png", b"imagen"))
+
+    assert [r[2] for r in storage_server.requests] == [b"imagen"] * 3
+
+
+def test_gallery_uploads_keep_order_and_reuse_connections(storage, storage_server):
+    archivos = [_archivo(f"g{i}.png", f"img{i}".encode()) for i in range(6)]
+
+    urls = storage.subir_varios(archivos, max_workers=2)
+
+    assert [u.rsplit("_", 1)[1] for u in urls] == [f"g{i}.png" for i in range(6)]
+    puertos = {r[3][1] for r in storage_server.requests}
+    assert len(puertos) <= 2
+
+
+def test_image_variants_upload_under_their_hashed_names(storage, storage_server, monkeypatch):
+    from coraksmart import images
+    monkeypatch.setattr("coraksmart.storage.supabase_storage", storage)
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 320), (10, 120, 200)).save(buf, "PNG")
+
+    url, variantes = images.subir_imagen_con_variantes(_archivo("foto.png", buf.getvalue()))
+
+    assert set(variantes) == {"webp", "thumb", "medium"}
+    rutas = {r[0]: r[1] for r in storage_server.requests}
+    for variante in variantes.values():
+        ruta = variante.split("/public/media/", 1)[1]
+        headers = rutas[f"/storage/v1/object/media/{ruta}"]
+        assert ruta.startswith("variants/foto.")
+        assert headers["x-upsert"] == "true" and headers["Content-Type"] == "image/webp"
+    assert "/uploads/" in url
+
+
+def test_gallery_streams_originals_and_variants_in_one_batch(storage, storage_server, monkeypatch):
+    from coraksmart import images
+    monkeypatch.setattr("coraksmart.storage.supabase_storage", storage)
+    lotes = []
+    subir_varios = storage.subir_varios
+    monkeypatch.setattr(storage, "subir_varios", lambda files, **kw: lotes.append(files) or subir_varios(files, **kw))
+    contenidos = []
+    for color in ((10, 120, 200), (200, 10, 10)):
+        buf = io.BytesIO()
+        Image.new("RGB", (640, 320), color).save(buf, "PNG")
+        contenidos.append(buf.getvalue())
+    archivos = [_archivo(f"g{i}.png", contenido) for i, contenido in enumerate(contenidos)]
+
+    urls, variantes = images.subir_galeria_con_variantes(archivos)
+
+    # Los originales se suben con su propio FileStorage, sin copiarlos a memoria.
+    assert len(lotes) == 1 and lotes[0][:2] == archivos and len(lotes[0]) == 8
+    assert [u.rsplit("_", 1)[1] for u in urls] == ["g0.png", "g1.png"]
+    assert [set(variantes[url]) for url in urls] == [{"webp", "thumb", "medium"}] * 2
+    assert all(v.split("/public/media/", 1)[1].startswith(f"variants/g{i}.")
+               for i, url in enumerate(urls) for v in variantes[url].values())
+    cuerpos = {r[0].split("/media/", 1)[1]: r[2] for r in storage_server.requests}
+    assert [cuerpos[url.split("/public/media/", 1)[1]] for url in urls] == contenidos